@@ -0,0 +1,95 @@
+"""Vectorized run-length streak kernel.
+
+Mirrors streak_stats() in result_analyzer_web/modules/data_processing/streaks.py
+so the desktop and web analyzers count streaks the same way. The desktop app
+ships and installs on its own (see run.bat), so it keeps its own copy; change
+both together.
+
+Streaks are computed for every student in one call from two parallel
+integer arrays: a student code (0..n_students-1) and a day ordinal (days
+since 1970-01-01) per completed task. Pairs are de-duplicated and sorted,
+student boundaries and ``diff == 1`` day steps mark the runs, and
+per-student reductions pick the longest and the current run.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Arrays of length n_students. active_days counts distinct days. Streak dates
+# are datetime64[D], NaT when the student has no active days. current_streak
+# is the run ending on the student's last active day (see streak_stats for
+# the as_of rule).
+StreakStats = namedtuple("StreakStats", ["active_days", "max_streak", "current_streak",
+                                         "longest_start", "longest_end"])
+
+def to_day_ordinals(dates):
+    """Convert dates (datetime64 values, Timestamps or ``date`` objects) to int day ordinals."""
+    values = pd.to_datetime(pd.Series(dates)).to_numpy()
+    return values.astype('datetime64[D]').astype(np.int64)
+
+def streak_stats(student_codes, day_ordinals, n_students=None, as_of=None):
+    """Compute active days, max/current streaks and the longest streak's dates per student.
+
+    ``student_codes`` and ``day_ordinals`` may be unsorted and repeat days.
+    When ``as_of`` (a day ordinal) is given, a current streak only counts if
+    it ends on ``as_of`` or the day before; otherwise it is the student's
+    final run regardless of date. The earliest run wins ties for longest.
+    """
+    student_codes = np.asarray(student_codes, dtype=np.int64)
+    day_ordinals = np.asarray(day_ordinals, dtype=np.int64)
+    if n_students is None:
+        n_students = int(student_codes.max()) + 1 if len(student_codes) else 0
+
+    active_days = np.zeros(n_students, dtype=np.int64)
+    max_streak = np.zeros(n_students, dtype=np.int64)
+    current_streak = np.zeros(n_students, dtype=np.int64)
+    longest_start = np.full(n_students, np.datetime64('NaT'), dtype='datetime64[D]')
+    longest_end = longest_start.copy()
+    if len(student_codes) == 0:
+        return StreakStats(active_days, max_streak, current_streak, longest_start, longest_end)
+
+    # Unique (student, day) pairs sorted by student, then day
+    order = np.lexsort((day_ordinals, student_codes))
+    students = student_codes[order]
+    days = day_ordinals[order]
+    keep = np.ones(len(days), dtype=bool)
+    keep[1:] = (students[1:] != students[:-1]) | (days[1:] != days[:-1])
+    students, days = students[keep], days[keep]
+
+    # A run starts at every student boundary and at every gap other than one day
+    run_starts = np.flatnonzero(np.r_[True, (students[1:] != students[:-1]) | (np.diff(days) != 1)])
+    run_lengths = np.diff(np.r_[run_starts, len(days)])
+    run_students = students[run_starts]
+    run_first_day = days[run_starts]
+    run_last_day = run_first_day + run_lengths - 1
+
+    # Runs are grouped by student; reduce each student's slice of runs
+    student_first_run = np.flatnonzero(np.r_[True, run_students[1:] != run_students[:-1]])
+    active = run_students[student_first_run]
+    active_days[active] = np.add.reduceat(run_lengths, student_first_run)
+    max_streak[active] = np.maximum.reduceat(run_lengths, student_first_run)
+
+    # Earliest run reaching each student's maximum
+    candidates = np.flatnonzero(run_lengths == max_streak[run_students])
+    candidate_students = run_students[candidates]
+    longest = candidates[np.r_[True, candidate_students[1:] != candidate_students[:-1]]]
+    longest_start[run_students[longest]] = run_first_day[longest].astype('datetime64[D]')
+    longest_end[run_students[longest]] = run_last_day[longest].astype('datetime64[D]')
+
+    # The last run of each student is their current streak
+    last_run = np.r_[student_first_run[1:] - 1, len(run_lengths) - 1]
+    current = run_lengths[last_run]
+    if as_of is not None:
+        ends = run_last_day[last_run]
+        current = np.where((ends == as_of) | (ends == as_of - 1), current, 0)
+    current_streak[active] = current
+
+    return StreakStats(active_days, max_streak, current_streak, longest_start, longest_end)
+
+def calculate_max_streak(dates):
+    """Calculate the maximum number of consecutive days in the list of dates"""
+    if len(dates) == 0:
+        return 0
+    return int(streak_stats(np.zeros(len(dates), dtype=np.int64), to_day_ordinals(dates), 1).max_streak[0])
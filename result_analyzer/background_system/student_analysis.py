@@ -9,6 +9,10 @@ import numpy as np
 import matplotlib.dates as mdates
 from matplotlib.figure import Figure
 
+from subject_schema import build_column_plan
+from streaks import calculate_max_streak, streak_stats, to_day_ordinals
+from task_table import transform_wide_to_long
+
 class StudentAnalysisApp:
     def __init__(self, root):
         self.root = root
@@ -152,89 +156,21 @@ class StudentAnalysisApp:
             # Print initial column names for debugging
             print("Original columns:", self.df.columns.tolist())
             
-            # Process the multi-subject format
-            transformed_data = []
-            
-            # Identify diagnostic columns
-            diagnostic_cols = [col for col in self.df.columns if 'Diagnostic' in str(col) and 'Accuracy' in str(col)]
+            # Detect every subject column family once for this file
+            plan = build_column_plan(self.df.columns)
+            for subject, missing in plan.incomplete.items():
+                print(f"Skipping subject {subject}, missing required columns: {missing}")
             
-            # Define main task column groups - match exactly provided format
-            task_columns = {
-                "Math": {
-                    "Practice Task": "Practice Task",
-                    "Completion Date": "Completion Date",
-                    "Practice Status": "Practice Status",
-                    "Success/Progress Rate": "Success/Progress Rate"
-                },
-                "English": {
-                    "Practice Task": "Practice Task (English)",
-                    "Completion Date": "Completion Date (English)",
-                    "Practice Status": "Practice Status (English)",
-                    "Success/Progress Rate": "Success/Progress Rate (English)"
-                }
-            }
-            
-            # Process each row in the DataFrame
-            for idx, row in self.df.iterrows():
-                student_data = {
-                    "Name": row.get("Name", ""),
-                    "Surname": row.get("Surname", ""),
-                    "Phone": row.get("Phone Number", ""),
-                    "Grade": row.get("Grade", ""),
-                    "Parent_Number": row.get("Parent Number", ""),
-                    "School": row.get("School", ""),
-                    "Registration_Date": row.get("Registration Date")
-                }
-                
-                # Extract diagnostic values
-                diagnostics = {}
-                for col in diagnostic_cols:
-                    if pd.notna(row.get(col)):
-                        diag_name = str(col).replace(" - Accuracy", "").strip()
-                        diag_value = row.get(col)
-                        if isinstance(diag_value, (int, float)) or (isinstance(diag_value, str) and diag_value.strip()):
-                            diagnostics[diag_name] = diag_value
-                
-                # Process each subject
-                for subject, columns in task_columns.items():
-                    task_col = columns["Practice Task"]
-                    date_col = columns["Completion Date"]
-                    status_col = columns["Practice Status"]
-                    rate_col = columns["Success/Progress Rate"]
-                    
-                    # Check if the subject columns exist in the dataframe
-                    if not all(col in self.df.columns for col in columns.values()):
-                        print(f"Skipping subject {subject}, missing required columns")
-                        continue
-                    
-                    # Skip if no task or "Not Started"
-                    if pd.isna(row.get(task_col)) or row.get(task_col) == "Not Started":
-                        continue
-                    
-                    # Create a record for this task
-                    task_record = {
-                        **student_data,  # Include all student data
-                        "Subject": subject,
-                        "Task": row.get(task_col, ""),
-                        "Completion_Date": row.get(date_col),
-                        "Status": row.get(status_col, ""),
-                        "Success_Rate": self._parse_rate(row.get(rate_col)),
-                        "Diagnostics": diagnostics
-                    }
-                    
-                    transformed_data.append(task_record)
-            
-            # Convert the transformed data to a DataFrame
-            if transformed_data:
-                self.df = pd.DataFrame(transformed_data)
-                print("Transformed columns:", self.df.columns.tolist())
-                
-                # Add subject filter to the GUI
-                if "Subject" in self.df.columns:
-                    self.add_subject_filter(self.df["Subject"].unique())
-            else:
+            # Reshape the multi-subject format into one row per subject task
+            transformed = transform_wide_to_long(self.df, plan)
+            if transformed.empty:
                 self.status_var.set("No task data found in the file. Check the format.")
                 return
+            self.df = transformed
+            print("Transformed columns:", self.df.columns.tolist())
+            
+            # Add subject filter to the GUI
+            self.add_subject_filter(self.df["Subject"].unique())
             
             # Convert Success_Rate to numeric, handling all possible formats
             if "Success_Rate" in self.df.columns and self.df["Success_Rate"].dtype == object:
@@ -315,25 +251,6 @@ class StudentAnalysisApp:
                 except:
                     pass  # If popup creation fails, just show the status message
     
-    def _parse_rate(self, rate_value):
-        """Helper method to parse success rate values in various formats"""
-        if pd.isna(rate_value) or rate_value == "Not Started":
-            return 0
-        
-        if isinstance(rate_value, (int, float)):
-            return float(rate_value)
-            
-        # Handle string values
-        if isinstance(rate_value, str):
-            # Remove % sign if present
-            rate_str = rate_value.replace("%", "").strip()
-            try:
-                return float(rate_str)
-            except ValueError:
-                return 0
-        
-        return 0
-    
     def analyze_data(self):
         if self.df is None:
             self.status_var.set("Error: No data loaded")
@@ -371,6 +288,14 @@ class StudentAnalysisApp:
             
             # Group by student name
             student_groups = filtered_df.groupby("Full_Name")
+
+            # Streaks for every student in one pass, in groupby's sorted name order
+            student_codes, student_names = pd.factorize(filtered_df["Full_Name"], sort=True)
+            valid = student_codes >= 0
+            streaks = streak_stats(student_codes[valid],
+                                   to_day_ordinals(filtered_df["Completion_Date"][valid]),
+                                   len(student_names))
+            max_streaks = dict(zip(student_names, streaks.max_streak))
             
             # Store student summary data
             student_summaries = []
@@ -391,7 +316,7 @@ class StudentAnalysisApp:
                     avg_success = group["Success_Rate"].mean()
                     
                     # Calculate max streak (consecutive days)
-                    max_streak = self.calculate_max_streak(completion_dates)
+                    max_streak = int(max_streaks[student_name])
                     
                     # Get first record for student info
                     first_record = group.iloc[0]
@@ -456,23 +381,7 @@ class StudentAnalysisApp:
     
     def calculate_max_streak(self, dates):
         """Calculate the maximum number of consecutive days in the list of dates"""
-        if len(dates) <= 1:
-            return len(dates)
-            
-        streak_count = 1
-        max_streak = 1
-        
-        for i in range(1, len(dates)):
-            # Calculate difference with previous date
-            date_diff = (dates[i] - dates[i-1]).days
-            
-            if date_diff == 1:  # Consecutive day
-                streak_count += 1
-                max_streak = max(max_streak, streak_count)
-            else:
-                streak_count = 1  # Reset streak counter
-        
-        return max_streak
+        return calculate_max_streak(dates)
     
     def check_for_streak(self, dates):
         """Check if there are min_days consecutive dates in the list"""
@@ -603,7 +512,9 @@ class StudentAnalysisApp:
         days_worked = len(completion_dates)
         total_tasks = len(student_data)
         avg_success = student_data["Success_Rate"].mean()
-        max_streak = self.calculate_max_streak(completion_dates)
+        streaks = streak_stats(np.zeros(days_worked, dtype=np.int64), to_day_ordinals(completion_dates), 1)
+        max_streak = int(streaks.max_streak[0])
+        current_streak = int(streaks.current_streak[0])
         
         # Count diagnostic tests
         diagnostics_count = 0
@@ -624,8 +535,11 @@ class StudentAnalysisApp:
         ttk.Label(performance_frame, text="Max Streak:").grid(row=3, column=0, sticky="w", pady=2)
         ttk.Label(performance_frame, text=str(max_streak)).grid(row=3, column=1, sticky="w", padx=10)
         
-        ttk.Label(performance_frame, text="Avg Success Rate:").grid(row=4, column=0, sticky="w", pady=2)
-        ttk.Label(performance_frame, text=f"{avg_success:.2f}%").grid(row=4, column=1, sticky="w", padx=10)
+        ttk.Label(performance_frame, text="Current Streak:").grid(row=4, column=0, sticky="w", pady=2)
+        ttk.Label(performance_frame, text=str(current_streak)).grid(row=4, column=1, sticky="w", padx=10)
+        
+        ttk.Label(performance_frame, text="Avg Success Rate:").grid(row=5, column=0, sticky="w", pady=2)
+        ttk.Label(performance_frame, text=f"{avg_success:.2f}%").grid(row=5, column=1, sticky="w", padx=10)
         
         # Recent Activity Section
         activity_frame = ttk.LabelFrame(main_frame, text="Recent Activity", padding=10)
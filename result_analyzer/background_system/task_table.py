@@ -0,0 +1,97 @@
+"""Column-wise reshaping of the wide multi-subject export into task rows.
+
+Mirrors transform_wide_to_long() in
+result_analyzer_web/modules/data_processing/file_processor.py: every
+subject column family is sliced out of the sheet in one pass and the
+families are stacked, instead of building a dict per spreadsheet row and
+subject. Rows keep the order of the row-by-row loop (student row, then
+subject).
+"""
+
+import numpy as np
+import pandas as pd
+
+from subject_schema import STUDENT_COLUMNS, build_column_plan
+
+def parse_rates(values):
+    """Vectorized success rate parsing ("85%", 85, "Not Started", NaN -> float)."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float).fillna(0.0)
+
+    # Numbers pass straight through; strings lose their % sign before parsing
+    rates = pd.to_numeric(values, errors='coerce')
+    text = values.astype(str).str.replace("%", "", regex=False).str.strip()
+    rates = rates.fillna(pd.to_numeric(text, errors='coerce'))
+    return rates.fillna(0.0).astype(float)
+
+def extract_diagnostics(df, diagnostic_cols):
+    """Build the per-row diagnostics dict from "Diagnostic ... - Accuracy" columns."""
+    if not diagnostic_cols:
+        return [{} for _ in range(len(df))]
+
+    names = [str(col).replace(" - Accuracy", "").strip() for col in diagnostic_cols]
+    values = df[diagnostic_cols].to_numpy(dtype=object)
+
+    # Keep numbers and non-blank strings only, decided once per column dtype
+    masks = []
+    for col in diagnostic_cols:
+        column = df[col]
+        if pd.api.types.is_numeric_dtype(column):
+            masks.append(column.notna().to_numpy())
+        else:
+            masks.append(column.map(
+                lambda v: (isinstance(v, (int, float, np.number)) and not pd.isna(v))
+                or (isinstance(v, str) and bool(v.strip()))
+            ).to_numpy(dtype=bool))
+    keep = np.column_stack(masks)
+
+    return [
+        {name: value for name, value, ok in zip(names, row, mask) if ok}
+        for row, mask in zip(values, keep)
+    ]
+
+def transform_wide_to_long(df, plan=None):
+    """Reshape the wide per-student export into one row per subject task.
+
+    Every complete subject column family in ``plan`` (detected from ``df``
+    when not given) becomes rows for the students with a task in it; rows
+    without a task or with "Not Started" are skipped. Returns an empty
+    DataFrame when no subject has a task.
+    """
+    if plan is None:
+        plan = build_column_plan(df.columns)
+
+    n_rows = len(df)
+    student_frame = pd.DataFrame(index=df.index)
+    for target in STUDENT_COLUMNS:
+        if target in plan.student_cols:
+            student_frame[target] = df[plan.student_cols[target]]
+        else:
+            student_frame[target] = None if target == "Registration_Date" else ""
+
+    diagnostics = pd.Series(extract_diagnostics(df, plan.diagnostic_cols), index=df.index, dtype=object)
+
+    subject_frames = []
+    for subject, columns in plan.subjects.items():
+        tasks = df[columns["Practice Task"]]
+        has_task = (tasks.notna() & (tasks != "Not Started")).to_numpy()
+        if not has_task.any():
+            continue
+
+        subject_frame = student_frame.loc[has_task].copy()
+        subject_frame["Subject"] = subject
+        subject_frame["Task"] = tasks.loc[has_task]
+        subject_frame["Completion_Date"] = df.loc[has_task, columns["Completion Date"]]
+        subject_frame["Status"] = df.loc[has_task, columns["Practice Status"]]
+        subject_frame["Success_Rate"] = parse_rates(df.loc[has_task, columns["Success/Progress Rate"]]).to_numpy()
+        subject_frame["Diagnostics"] = diagnostics.loc[has_task]
+        subject_frame["_row"] = np.arange(n_rows)[has_task]
+        subject_frames.append(subject_frame)
+
+    if not subject_frames:
+        return pd.DataFrame()
+
+    # Stable sort by source row keeps subject order within each student row
+    long_df = pd.concat(subject_frames, ignore_index=True)
+    return long_df.sort_values("_row", kind="mergesort").drop(columns="_row").reset_index(drop=True)
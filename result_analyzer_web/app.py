@@ -1,20 +1,14 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_file, abort
 import os
 import sys  # Add this import
 import pandas as pd
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
 import io
 import base64
 from werkzeug.utils import secure_filename
 import uuid
 import json
 from datetime import datetime, timedelta
-import traceback
 from urllib.parse import unquote
 import unicodedata
 from functools import wraps
@@ -24,6 +18,29 @@ import atexit
 import shutil
 import logging
 
+from modules.data_processing.file_processor import ingest_upload, shutdown_sheet_pool
+from modules.data_processing.activity import load_activity, update_activity, window_aggregates, write_activity
+from modules.data_processing.dataset_store import (
+    DATASETS_DIR, link_cached, release, store as store_dataset, sweep, upload_digest
+)
+from modules.data_processing.storage import file_version, has_processed_data, merge_tasks, processed_data_path
+from modules.data_processing.dataset_cache import dataset_cache
+from modules.data_processing.analysis import (
+    analyze_student_data, filter_mask, generate_summary_data, student_aggregates, update_student_aggregates,
+    zero_task_frame
+)
+from modules.data_processing.results_table import DEFAULT_PAGE_SIZE, ROW_FIELDS, ResultsIndex
+from modules.data_processing.student_index import has_student_index, read_student_rows, write_student_index
+from modules.utils.serialization import records_to_serializable, write_json_records
+from modules.data_processing.streaks import student_streak_stats, to_day_ordinals
+from modules.utils.job_queue import DONE, FAILED, job_queue
+from modules.utils.chart_cache import CHART_FILENAME, CHART_FORMATS, ChartCache
+from modules.utils.chart_renderer import CHART_WORKERS, ChartRenderer
+from modules.utils.charts import (
+    PROGRESS_CHART_COLUMNS, SUBJECT_CHART_COLUMNS, daily_positions, daily_totals, period_label,
+    render_comparison_chart, render_progress_chart, render_subject_comparison
+)
+
 app = Flask(__name__)
 app.secret_key = 'student_analysis_app_secret_key'  # Change this in production
 
@@ -39,6 +56,33 @@ app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HT
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
+# Keep shared dataset handles no longer than a session can stay idle
+dataset_cache.configure(ttl=app.config['PERMANENT_SESSION_LIFETIME'])
+
+# Rendered student charts are reused until static/charts outgrows this size
+app.config['CHART_CACHE_MAX_BYTES'] = 256 * 1024 * 1024
+
+# Chart images are 'png' (at CHART_DPI, reduced to CHART_PNG_COLORS colors;
+# 0 keeps full color) or 'svg'; over more than CHART_MAX_POINTS days, the
+# images and the Chart.js data downsample the daily success line (LTTB) and
+# sum the tasks per day into weekly bars (None keeps all)
+app.config['CHART_FORMAT'] = 'png'
+app.config['CHART_DPI'] = 100
+app.config['CHART_PNG_COLORS'] = 256
+app.config['CHART_MAX_POINTS'] = 250
+chart_cache = ChartCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'charts'),
+                         max_bytes=app.config['CHART_CACHE_MAX_BYTES'],
+                         format=app.config['CHART_FORMAT'],
+                         dpi=app.config['CHART_DPI'],
+                         png_colors=app.config['CHART_PNG_COLORS'])
+
+# Charts missing from the cache are drawn by these worker processes (0 draws
+# them in the request); the most active students' charts are drawn right
+# after an analysis
+app.config['CHART_WORKERS'] = CHART_WORKERS
+app.config['CHART_PRECOMPUTE_TOP_N'] = 10
+chart_renderer = ChartRenderer(chart_cache, max_workers=app.config['CHART_WORKERS'])
+
 # Create upload folder if it doesn't exist
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
@@ -47,47 +91,6 @@ if not os.path.exists(UPLOAD_FOLDER):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Helper function to parse success rate values
-def parse_rate(rate_value):
-    """Helper method to parse success rate values in various formats"""
-    if pd.isna(rate_value) or rate_value == "Not Started":
-        return 0
-    
-    if isinstance(rate_value, (int, float)):
-        return float(rate_value)
-        
-    # Handle string values
-    if isinstance(rate_value, str):
-        # Remove % sign if present
-        rate_str = rate_value.replace("%", "").strip()
-        try:
-            return float(rate_str)
-        except ValueError:
-            return 0
-    
-    return 0
-
-# Helper function to calculate max streak
-def calculate_max_streak(dates):
-    """Calculate the maximum number of consecutive days in the list of dates"""
-    if len(dates) <= 1:
-        return len(dates)
-        
-    streak_count = 1
-    max_streak = 1
-    
-    for i in range(1, len(dates)):
-        # Calculate difference with previous date
-        date_diff = (dates[i] - dates[i-1]).days
-        
-        if date_diff == 1:  # Consecutive day
-            streak_count += 1
-            max_streak = max(max_streak, streak_count)
-        else:
-            streak_count = 1  # Reset streak counter
-    
-    return max_streak
-
 # Helper function to sanitize names for filenames
 def sanitize_filename(name):
     """Convert any string to a safe filename"""
@@ -107,23 +110,6 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NumpyEncoder, self).default(obj)
 
-# Enhanced function to handle all non-serializable types including timestamps
-def convert_to_serializable(obj):
-    """Convert non-serializable objects to serializable format."""
-    if isinstance(obj, (np.integer, np.int64)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float64)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, pd.Timestamp):
-        return obj.strftime('%Y-%m-%d %H:%M:%S')
-    elif isinstance(obj, datetime):
-        return obj.strftime('%Y-%m-%d %H:%M:%S')
-    else:
-        # Just return the object as is
-        return obj
-
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -157,131 +143,179 @@ def upload_file():
         file_path = os.path.join(user_dir, filename)
         file.save(file_path)
         
-        # Process the file
-        try:
-            # Check file type
-            if filename.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path, engine='openpyxl')
-            
-            # Process the multi-subject format (similar to original code)
-            transformed_data = []
-            
-            # Identify diagnostic columns
-            diagnostic_cols = [col for col in df.columns if 'Diagnostic' in str(col) and 'Accuracy' in str(col)]
-            
-            # Define main task column groups - match exactly provided format
-            task_columns = {
-                "Math": {
-                    "Practice Task": "Practice Task",
-                    "Completion Date": "Completion Date",
-                    "Practice Status": "Practice Status",
-                    "Success/Progress Rate": "Success/Progress Rate"
-                },
-                "English": {
-                    "Practice Task": "Practice Task (English)",
-                    "Completion Date": "Completion Date (English)",
-                    "Practice Status": "Practice Status (English)",
-                    "Success/Progress Rate": "Success/Progress Rate (English)"
-                }
-            }
-            
-            # Process each row in the DataFrame
-            for idx, row in df.iterrows():
-                student_data = {
-                    "Name": row.get("Name", ""),
-                    "Surname": row.get("Surname", ""),
-                    "Phone": row.get("Phone Number", ""),
-                    "Grade": row.get("Grade", ""),
-                    "Parent_Number": row.get("Parent Number", ""),
-                    "School": row.get("School", ""),
-                    "Registration_Date": row.get("Registration Date")
-                }
-                
-                # Extract diagnostic values
-                diagnostics = {}
-                for col in diagnostic_cols:
-                    if pd.notna(row.get(col)):
-                        diag_name = str(col).replace(" - Accuracy", "").strip()
-                        diag_value = row.get(col)
-                        if isinstance(diag_value, (int, float)) or (isinstance(diag_value, str) and diag_value.strip()):
-                            diagnostics[diag_name] = diag_value
-                
-                # Process each subject
-                for subject, columns in task_columns.items():
-                    task_col = columns["Practice Task"]
-                    date_col = columns["Completion Date"]
-                    status_col = columns["Practice Status"]
-                    rate_col = columns["Success/Progress Rate"]
-                    
-                    # Check if the subject columns exist in the dataframe
-                    if not all(col in df.columns for col in columns.values()):
-                        continue
-                    
-                    # Skip if no task or "Not Started"
-                    if pd.isna(row.get(task_col)) or row.get(task_col) == "Not Started":
-                        continue
-                    
-                    # Create a record for this task
-                    task_record = {
-                        **student_data,  # Include all student data
-                        "Subject": subject,
-                        "Task": row.get(task_col, ""),
-                        "Completion_Date": row.get(date_col),
-                        "Status": row.get(status_col, ""),
-                        "Success_Rate": parse_rate(row.get(rate_col)),
-                        "Diagnostics": diagnostics
-                    }
-                    
-                    transformed_data.append(task_record)
-            
-            # Convert the transformed data to a DataFrame
-            if transformed_data:
-                df = pd.DataFrame(transformed_data)
-                
-                # Convert Success_Rate to numeric, handling all possible formats
-                if "Success_Rate" in df.columns and df["Success_Rate"].dtype == object:
-                    df["Success_Rate"] = df["Success_Rate"].astype(str).replace('Not Started', '0')
-                    df["Success_Rate"] = df["Success_Rate"].astype(str).replace('', '0')
-                    df["Success_Rate"] = df["Success_Rate"].astype(str).str.rstrip("%")
-                    df["Success_Rate"] = pd.to_numeric(df["Success_Rate"], errors='coerce')
-                
-                # Fill any NaN values with 0
-                if "Success_Rate" in df.columns:
-                    df["Success_Rate"].fillna(0, inplace=True)
-                
-                # Convert dates to datetime with explicit format
-                if "Completion_Date" in df.columns:
-                    df["Completion_Date"] = pd.to_datetime(df["Completion_Date"], errors='coerce')
-                
-                # Create full name column
-                df["Full_Name"] = df["Name"] + " " + df["Surname"]
-                
-                # Save processed data to user session file
-                processed_file = os.path.join(user_dir, 'processed_data.pkl')
-                df.to_pickle(processed_file)
-                
-                # Get available subjects for filter
-                subjects = df["Subject"].unique().tolist()
-                
-                # Store subjects in session
-                session['subjects'] = subjects
-                
-                flash('File uploaded and processed successfully!', 'success')
-                return redirect(url_for('analyze'))
-            else:
-                flash('No task data found in the file. Check the format.', 'error')
-                return redirect(url_for('index'))
-                
-        except Exception as e:
-            flash(f'Error processing file: {str(e)}', 'error')
-            traceback.print_exc()
-            return redirect(url_for('index'))
+        # Process the file in the background; analyze() waits on the job
+        append = request.form.get('mode') == 'append'
+        job_id = job_queue.submit(user_id, process_upload, user_id, user_dir, file_path, filename, append=append)
+        session['upload_job'] = job_id
+        session.pop('subjects', None)
+        
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202
+        return redirect(url_for('job_status', job_id=job_id))
     else:
         flash('Invalid file type. Please upload an Excel (.xlsx, .xls) or CSV file.', 'error')
         return redirect(url_for('index'))
 
+def grid_aggregates(handle, filters):
+    """Aggregate the students for ``filters`` from the dataset's activity grids.
+    
+    Returns None when the dataset has no grids or the filters need a scan
+    of the task table (see ``window_aggregates``).
+    """
+    activity = handle.activity()
+    if activity is None:
+        return None
+    start_date, end_date, min_success_rate, selected_subject = (
+        pd.to_datetime(filters[0]), pd.to_datetime(filters[1]), filters[2], filters[5])
+    return window_aggregates(activity, handle.students(), start_date, end_date, min_success_rate, selected_subject)
+
+def compute_analysis(handle, filters, aggregates=None):
+    """Run the analysis page's computation for one set of filters.
+    
+    ``filters`` holds the start and end date (YYYY-MM-DD), minimum success
+    rate, minimum days, minimum tasks, subject and zero-tasks-only flag.
+    ``aggregates`` are reused when given (see ``refresh_analyses``);
+    otherwise they come from the activity grids, or a scan of the task
+    table when the grids cannot answer the filters.
+    """
+    start_date, end_date, min_success_rate, min_days, min_tasks, selected_subject, zero_tasks_only = filters
+    start_date, end_date = pd.to_datetime(start_date), pd.to_datetime(end_date)
+    if aggregates is None:
+        aggregates = grid_aggregates(handle, filters)
+    if aggregates is None:
+        df = handle.tasks()
+        aggregates = student_aggregates(df, filter_mask(df, start_date, end_date, min_success_rate, selected_subject))
+    
+    # With aggregates and the student table given, the task table is not read
+    student_summaries, student_rows = analyze_student_data(
+        None, start_date, end_date, min_success_rate, min_days,
+        selected_subject, min_tasks, zero_tasks_only, students=handle.students(), aggregates=aggregates
+    )
+    clean_summaries = records_to_serializable(student_summaries)
+    return {
+        'students': student_summaries,
+        'clean_summaries': clean_summaries,
+        'table': ResultsIndex(clean_summaries),
+        'student_rows': student_rows,
+        'summary_data': generate_summary_data(student_summaries),
+        'aggregates': aggregates
+    }
+
+def refresh_analyses(previous, handle, names):
+    """Carry analyses memoized before an append over to the grown dataset.
+    
+    Filters the activity grids can answer are re-aggregated from them;
+    for the others only the students in ``names`` (those with appended
+    rows) are re-aggregated.
+    """
+    df = None
+    for key, result in previous:
+        filters = key[1:]
+        aggregates = grid_aggregates(handle, filters)
+        if aggregates is None:
+            if df is None:
+                df = handle.tasks()
+            start_date, end_date, min_success_rate, selected_subject = (
+                pd.to_datetime(filters[0]), pd.to_datetime(filters[1]), filters[2], filters[5])
+            mask = filter_mask(df, start_date, end_date, min_success_rate, selected_subject)
+            aggregates = update_student_aggregates(result['aggregates'], df, mask, names)
+        handle.cached_result((handle.fingerprint,) + filters,
+                             lambda filters=filters, aggregates=aggregates: compute_analysis(handle, filters, aggregates))
+
+def process_upload(user_id, user_dir, file_path, filename, report, append=False):
+    """Process an uploaded file into ``user_dir``; runs on the job queue.
+    
+    With ``append``, tasks not stored yet are merged into the user's
+    existing data instead of replacing it. Returns the subjects found, or
+    an empty list if the file has no task data.
+    """
+    # Stream the wide export, one row per subject task, into the user's columnar store
+    def report_progress(rows_read, rows_per_second):
+        report(rows_read=rows_read, rows_per_second=round(rows_per_second))
+        app.logger.info(f"Ingested {rows_read} rows from {filename} ({rows_per_second:.0f} rows/sec)")
+    
+    upload_folder = app.config['UPLOAD_FOLDER']
+    if append and has_processed_data(user_dir):
+        return append_upload(user_id, user_dir, file_path, filename, report_progress, report)
+    
+    dataset_cache.evict(user_id)
+    
+    # Identical uploads reuse the processed artifacts of the first one
+    digest = upload_digest(file_path, filename)
+    subjects = link_cached(upload_folder, digest, user_id, user_dir)
+    if subjects is None:
+        subjects = ingest_upload(file_path, filename, user_dir, progress=report_progress)
+        if subjects:
+            write_activity(user_dir)
+            store_dataset(upload_folder, digest, user_id, user_dir, subjects)
+    else:
+        app.logger.info(f"Reusing processed data for {filename} ({digest[:12]})")
+    
+    # Drop any handle opened on the previous data while this job ran
+    dataset_cache.evict(user_id)
+    return subjects or []
+
+def append_upload(user_id, user_dir, file_path, filename, report_progress, report):
+    """Merge an upload into the user's existing data; returns the merged subjects."""
+    # Analyses of the current data are updated rather than recomputed
+    old_handle = dataset_cache.peek(user_id)
+    previous = old_handle.cached_results() if old_handle is not None and old_handle.is_current() else []
+    
+    # Grids of the current data; the appended rows are added to them
+    activity = load_activity(user_dir, file_version(processed_data_path(user_dir)))
+    
+    staging_dir = os.path.join(user_dir, f"append-{uuid.uuid4().hex}")
+    os.makedirs(staging_dir)
+    try:
+        if not ingest_upload(file_path, filename, staging_dir, progress=report_progress):
+            return []
+        added = merge_tasks(user_dir, staging_dir)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    report(rows_added=len(added))
+    app.logger.info(f"Appended {len(added)} new tasks from {filename}")
+    
+    if len(added):
+        # The merged data no longer matches any cached upload
+        release(app.config['UPLOAD_FOLDER'], user_id, user_dir)
+        update_activity(user_dir, activity, added)
+        dataset_cache.evict(user_id)
+        handle = dataset_cache.get(user_id, user_dir)
+        refresh_analyses(previous, handle, added['Full_Name'].dropna().unique())
+    else:
+        handle = dataset_cache.get(user_id, user_dir)
+    
+    # Subjects of the merged data, in order of appearance
+    return handle.tasks(['Subject'])['Subject'].dropna().unique().tolist()
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the progress of a background job as JSON, or as a page that polls it"""
+    job = job_queue.get(job_id)
+    if job is None or job['key'] != session.get('user_id'):
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'error': 'Unknown job'}), 404
+        flash('Upload job not found. Please upload your file again.', 'warning')
+        return redirect(url_for('index'))
+    
+    status = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'error': job['error'],
+        'created': job['created'],
+        'finished': job['finished']
+    }
+    if job['status'] in (DONE, FAILED):
+        # analyze() turns the outcome into a flash message
+        status['redirect_url'] = url_for('analyze')
+    
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(status)
+    if job['status'] in (DONE, FAILED):
+        return redirect(status['redirect_url'])
+    return render_template('processing.html', job=status)
+
 # Bug fix: Make sure the custom NumpyEncoder is actually used
 def session_required(f):
     @wraps(f)
@@ -312,17 +346,35 @@ def analyze():
     
     user_id = session['user_id']
     user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_id)
-    processed_file = os.path.join(user_dir, 'processed_data.pkl')
     
-    if not os.path.exists(processed_file):
+    # Wait for a pending upload to finish processing
+    if 'upload_job' in session:
+        job = job_queue.get(session['upload_job'])
+        if job is not None and job['status'] not in (DONE, FAILED):
+            return redirect(url_for('job_status', job_id=job['id']))
+        session.pop('upload_job')
+        if job is not None:
+            if job['status'] == FAILED:
+                flash(f"Error processing file: {job['error']}", 'error')
+                return redirect(url_for('index'))
+            if not job['result']:
+                flash('No task data found in the file. Check the format.', 'error')
+                return redirect(url_for('index'))
+            session['subjects'] = job['result']
+            if 'rows_added' in job['progress']:
+                flash(f"File merged into your data: {job['progress']['rows_added']} new tasks added.", 'success')
+            else:
+                flash('File uploaded and processed successfully!', 'success')
+    
+    if not has_processed_data(user_dir):
         flash('No processed data found. Please upload a file first.', 'warning')
         return redirect(url_for('index'))
     
-    # Load the processed data
-    df = pd.read_pickle(processed_file)
+    # Shared, memory-mapped view of the processed data (read-only)
+    handle = dataset_cache.get(user_id, user_dir)
     
     # Get total unique students before filtering
-    total_students = df['Full_Name'].nunique()
+    total_students = len(handle.students())
     
     # Default filter values or get from form/session
     if request.method == 'POST':
@@ -411,233 +463,43 @@ def analyze():
                 'zero_tasks_only': zero_tasks_only
             }
     
-    # Apply subject filter if needed
-    filtered_df = df.copy()
-    if selected_subject != "All":
-        filtered_df = filtered_df[filtered_df["Subject"] == selected_subject]
-    
-    # Filter by date range, success rate, and status
-    tasks_df = filtered_df[
-        (filtered_df["Completion_Date"] >= start_date) &
-        (filtered_df["Completion_Date"] <= end_date) &
-        (filtered_df["Success_Rate"] >= min_success_rate) &
-        (filtered_df["Status"] == "Done")
-    ]
-    
-    # Store student summary data
-    student_summaries = []
-    student_full_data = {}
-    
-    # Get all unique student names and their basic info from original dataframe first
-    all_students = set()
-    all_student_info = {}
-    
-    # Extract all student names and their basic info
-    for _, row in df.iterrows():
-        student_name = row["Full_Name"]
-        all_students.add(student_name)
-        
-        # Store basic student info if we haven't seen this student before
-        if student_name not in all_student_info:
-            diagnostics = row.get("Diagnostics", {})
-            
-            all_student_info[student_name] = {
-                "Name": row.get("Name", ""),
-                "Surname": row.get("Surname", ""),
-                "Full_Name": student_name,
-                "Phone": row.get("Phone", ""),
-                "Grade": row.get("Grade", ""),
-                "School": row.get("School", ""),
-                "Registration_Date": row.get("Registration_Date", ""),
-                "Parent_Number": row.get("Parent_Number", ""),
-                "Diagnostics": diagnostics
-            }
-    
-    # Process students with tasks in the filtered data
-    active_students = set()
-    students_with_min_tasks = set()  # Create a new set to track students meeting min_tasks
-    
-    for student_name, group in tasks_df.groupby("Full_Name"):
-        active_students.add(student_name)
-        
-        # Get the unique dates where the student completed at least one task
-        completion_dates = sorted(group["Completion_Date"].dt.date.unique())
-        days_worked = len(completion_dates)
-        
-        # Count total tasks completed
-        total_tasks = len(group)
-        
-        # Track students who meet the min_tasks requirement
-        if total_tasks >= min_tasks:
-            students_with_min_tasks.add(student_name)
-        
-        # Only include students who meet BOTH conditions
-        if days_worked >= min_days and total_tasks >= min_tasks:
-            # Calculate average success rate
-            avg_success = group["Success_Rate"].mean()
-            
-            # Calculate max streak (consecutive days)
-            max_streak = calculate_max_streak(completion_dates)
-            
-            # Get first record for student info
-            first_record = group.iloc[0]
-            
-            # Count diagnostic tests completed
-            diagnostics_count = 0
-            if 'Diagnostics' in group.columns and len(group) > 0:
-                if isinstance(first_record['Diagnostics'], dict):
-                    diagnostics_count = len(first_record['Diagnostics'])
-            
-            # Get unique subjects for this student
-            subjects = sorted(group["Subject"].unique())
-            subjects_str = ", ".join(subjects)
-            
-            student_summaries.append({
-                "Full_Name": student_name,
-                "Phone": first_record.get("Phone", ""),
-                "Grade": first_record.get("Grade", ""),
-                "Days_Worked": days_worked,
-                "Total_Tasks": total_tasks,
-                "Diagnostics_Count": diagnostics_count,
-                "Max_Streak": max_streak,
-                "Avg_Success": round(avg_success, 2),
-                "Subjects": subjects_str
-            })
-            
-            # Store full student data
-            student_full_data[student_name] = group
-    
-    # Find students with zero tasks (those in all_students but not in active_students)
-    zero_task_students = all_students - active_students
-    
-    # Process zero tasks students ONLY IF explicitly requested OR min_tasks is 0
-    # This is the key change - we will NOT include zero-task students if min_tasks > 0
-    should_include_zero_task_students = zero_tasks_only or (min_tasks == 0 and min_days == 0)
-    
-    app.logger.info(f"Should include zero task students: {should_include_zero_task_students}, zero_tasks_only={zero_tasks_only}, min_tasks={min_tasks}, min_days={min_days}")
+    # Reuse earlier results for the same dataset revision and filters
+    filters = (
+        start_date.strftime('%Y-%m-%d'),
+        end_date.strftime('%Y-%m-%d'),
+        min_success_rate,
+        min_days,
+        min_tasks,
+        selected_subject,
+        zero_tasks_only
+    )
+    cache_key = (handle.fingerprint,) + filters
+    results = handle.cached_result(cache_key, lambda: compute_analysis(handle, filters))
     
-    # If we want only zero task students, clear the current list
-    if zero_tasks_only:
-        student_summaries = []
+    # The results table pages through these results with /analyze/students
+    session['analysis_filters'] = filters
     
-    # Add zero-task students if appropriate
-    if should_include_zero_task_students:
-        for student_name in zero_task_students:
-            if student_name in all_student_info:
-                student_info = all_student_info[student_name]
-                
-                # Count diagnostic tests
-                diagnostics_count = 0
-                if isinstance(student_info.get('Diagnostics'), dict):
-                    diagnostics_count = len(student_info.get('Diagnostics', {}))
-                
-                # Add student with zero tasks to summaries
-                student_summaries.append({
-                    "Full_Name": student_name,
-                    "Phone": student_info.get("Phone", ""),
-                    "Grade": student_info.get("Grade", ""),
-                    "Days_Worked": 0,  # Exactly 0 days
-                    "Total_Tasks": 0,  # Exactly 0 tasks
-                    "Diagnostics_Count": diagnostics_count,
-                    "Max_Streak": 0,
-                    "Avg_Success": 0,
-                    "Subjects": "",
-                    "Zero_Tasks": True  # Mark as a zero-task student
-                })
-                
-                # For student detail view, create empty dataframe with student info
-                empty_df = pd.DataFrame([all_student_info[student_name]])
-                
-                # Make sure it has the minimal required columns for the detail view
-                if "Completion_Date" not in empty_df.columns:
-                    empty_df["Completion_Date"] = pd.NaT
-                if "Success_Rate" not in empty_df.columns:
-                    empty_df["Success_Rate"] = 0
-                if "Subject" not in empty_df.columns:
-                    empty_df["Subject"] = ""
-                if "Task" not in empty_df.columns:
-                    empty_df["Task"] = ""
-                if "Status" not in empty_df.columns:
-                    empty_df["Status"] = ""
-                
-                student_full_data[student_name] = empty_df
+    # Save student data for later use, unless these results are already on disk
+    summary_file = os.path.join(user_dir, 'student_summaries.json')
     
-    # Check if min_tasks is set and if there are students with zero tasks incorrectly included
-    if min_tasks > 0:
-        # Log for debugging
-        app.logger.info(f"Before filtering for min_tasks={min_tasks}: {len(student_summaries)} students")
+    if (handle.persisted_key != cache_key or
+            not os.path.exists(summary_file) or not has_student_index(user_dir)):
+        # Summaries were converted column-wise; stream them to disk
+        write_json_records(results['clean_summaries'], summary_file)
         
-        # Filter out any students that might have slipped through with zero tasks
-        filtered_summaries = []
-        for student in student_summaries:
-            if student.get("Total_Tasks", 0) >= min_tasks:
-                filtered_summaries.append(student)
+        # Index each student's task rows for the detail page
+        write_student_index(user_dir, results['student_rows'], handle.fingerprint)
         
-        # Replace with filtered list
-        student_summaries = filtered_summaries
-        app.logger.info(f"After filtering: {len(student_summaries)} students")
-    
-    # Convert DataFrame in student_full_data to dict for serialization
-    serializable_full_data = {name: df.to_dict('records') for name, df in student_full_data.items()}
-    
-    # Save student data for later use
-    summary_file = os.path.join(user_dir, 'student_summaries.json')
-    full_data_file = os.path.join(user_dir, 'student_full_data.json')
-    
-    # Convert NumPy types to native Python types before serialization
-    clean_summaries = []
-    for student in student_summaries:
-        clean_student = {}
-        for key, value in student.items():
-            clean_student[key] = convert_to_serializable(value)
-        clean_summaries.append(clean_student)
-    
-    # Process the full data similarly
-    clean_full_data = {}
-    for name, df_dict_list in serializable_full_data.items():
-        clean_records = []
-        for record in df_dict_list:
-            clean_record = {}
-            for key, value in record.items():
-                try:
-                    clean_record[key] = convert_to_serializable(value)
-                except Exception as e:
-                    # If there's any error, just use the original value
-                    # and convert it to a string if it's not a basic type
-                    if isinstance(value, (str, int, float, bool, type(None))):
-                        clean_record[key] = value
-                    else:
-                        clean_record[key] = str(value)
-            clean_records.append(clean_record)
-        clean_full_data[name] = clean_records
-    
-    # Save as JSON files with standard JSON encoder (no custom encoder needed now)
-    with open(summary_file, 'w') as f:
-        json.dump(clean_summaries, f)
-    
-    with open(full_data_file, 'w') as f:
-        json.dump(clean_full_data, f)
-    
-    # Generate summary data for interactive charts
-    summary_data = None
-    if student_summaries:
-        # Sort by days worked
-        results_sorted = sorted(student_summaries, key=lambda x: x["Days_Worked"], reverse=True)
-        
-        # Limit to top 10 students for readability
-        top_students = results_sorted[:10]
+        handle.persisted_key = cache_key
         
-        # Prepare data for interactive charts
-        summary_data = {
-            'names': [student["Full_Name"] for student in top_students],
-            'days_worked': [student["Days_Worked"] for student in top_students],
-            'tasks_completed': [student["Total_Tasks"] for student in top_students],
-            'max_streaks': [student["Max_Streak"] for student in top_students]
-        }
+        # Draw the likeliest next profile charts in the background
+        job_queue.submit(f"charts:{user_id}", precompute_charts, handle, results,
+                         app.config['CHART_PRECOMPUTE_TOP_N'])
     
     return render_template('analyze.html', 
-                           students=student_summaries, 
-                           summary_data=summary_data, 
+                           table=results['table'],
+                           page=results['table'].page(),
+                           summary_data=results['summary_data'], 
                            subjects=session.get('subjects', []),
                            total_students=total_students,
                            zero_tasks_only=zero_tasks_only,
@@ -645,6 +507,49 @@ def analyze():
                            min_days=min_days,
                            min_success_rate=min_success_rate)
 
+def results_row(summary):
+    """Fields of one results table row, with the link to the student's profile."""
+    row = {field: summary.get(field) for field in ROW_FIELDS}
+    row['Zero_Tasks'] = bool(row['Zero_Tasks'])
+    row['url'] = url_for('student_detail', name=summary['Full_Name'])
+    return row
+
+@app.route('/analyze/students')
+@session_required
+def analyze_students():
+    """Return one page of the /analyze results table as JSON.
+    
+    Query parameters: ``page`` (1-based), ``per_page``, ``sort`` (a column's
+    data-sort name), ``order`` (``asc`` or ``desc``) and ``q``, matched
+    against name, grade and subjects.
+    """
+    user_id = session['user_id']
+    user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_id)
+    filters = session.get('analysis_filters')
+    if filters is None or not has_processed_data(user_dir):
+        return jsonify({'error': 'No analysis results. Please analyze data first.'}), 404
+    
+    # Same memoized results the /analyze page was rendered from
+    handle = dataset_cache.get(user_id, user_dir)
+    filters = tuple(filters)
+    results = handle.cached_result((handle.fingerprint,) + filters, lambda: compute_analysis(handle, filters))
+    
+    page = results['table'].page(
+        request.args.get('page', 1, type=int),
+        request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int),
+        request.args.get('sort'),
+        request.args.get('order') == 'desc',
+        request.args.get('q', '')
+    )
+    return jsonify({
+        'students': [results_row(summary) for summary in page.rows],
+        'total': page.total,
+        'matched': page.matched,
+        'page': page.page,
+        'per_page': page.per_page,
+        'pages': page.pages
+    })
+
 @app.route('/student/<name>')
 @session_required
 def student_detail(name):
@@ -660,18 +565,14 @@ def student_detail(name):
     
     # Load student summaries
     summary_file = os.path.join(user_dir, 'student_summaries.json')
-    full_data_file = os.path.join(user_dir, 'student_full_data.json')
     
-    if not os.path.exists(summary_file) or not os.path.exists(full_data_file):
+    if not os.path.exists(summary_file) or not has_student_index(user_dir):
         flash('Student data not found. Please analyze data first.', 'warning')
         return redirect(url_for('analyze'))
     
-    # Load student data
-    with open(summary_file, 'r') as f:
-        student_summaries = json.load(f)
-    
-    with open(full_data_file, 'r') as f:
-        student_full_data_json = json.load(f)
+    # Load student summaries (parsed once per file revision)
+    handle = dataset_cache.get(user_id, user_dir)
+    student_summaries = handle.read_json('student_summaries.json')
     
     # Find student in summaries
     student_summary = next((s for s in student_summaries if s["Full_Name"] == decoded_name), None)
@@ -688,16 +589,15 @@ def student_detail(name):
     # Get the student name as stored in the data
     actual_name = student_summary["Full_Name"]
     
-    # Convert JSON data back to DataFrame
-    if actual_name in student_full_data_json:
-        student_data = pd.DataFrame(student_full_data_json[actual_name])
-        
-        # Convert dates back to datetime
-        if "Completion_Date" in student_data.columns:
-            student_data["Completion_Date"] = pd.to_datetime(student_data["Completion_Date"])
-    else:
+    # Read only this student's rows through the student index
+    rows = read_student_rows(user_dir, actual_name, handle.fingerprint)
+    if rows is None:
         flash(f'Detailed data for student {decoded_name} not found', 'error')
         return redirect(url_for('analyze'))
+    elif len(rows) > 0:
+        student_data = handle.task_rows(rows)
+    else:
+        student_data = zero_task_frame(handle.students().loc[actual_name].to_dict())
     
     # Generate charts
     profile_info = get_student_profile_info(student_data)
@@ -709,9 +609,12 @@ def student_detail(name):
     subject_data = get_subject_comparison_data(student_data)
     diagnostics_data = get_diagnostics_data(student_data)
     
-    # Also keep the old chart generation functions for backward compatibility
-    progress_charts = generate_progress_charts(student_data, user_id, name)
-    subject_comparison = generate_subject_comparison(student_data, user_id, name)
+    # Static chart images (used without Chart.js data, and for printing) are
+    # drawn only when the browser asks for them
+    progress_charts = student_chart_url(user_id, actual_name, 'progress')
+    subject_comparison = None
+    if student_data["Subject"].nunique() > 1:
+        subject_comparison = student_chart_url(user_id, actual_name, 'subjects')
     
     return render_template('student_detail.html',
                           student=student_summary,
@@ -729,7 +632,6 @@ def get_student_profile_info(student_data):
     student_info = student_data.iloc[0].to_dict()
     
     # Calculate performance metrics
-    completion_dates = []
     total_tasks = 0
     avg_success = None  # Default to None for students with no completed tasks
     
@@ -737,12 +639,17 @@ def get_student_profile_info(student_data):
     completed_tasks = student_data[student_data["Status"] == "Done"]
     
     if len(completed_tasks) > 0:
-        completion_dates = sorted(completed_tasks["Completion_Date"].dt.date.unique())
         total_tasks = len(completed_tasks)
         avg_success = completed_tasks["Success_Rate"].mean()
     
-    days_worked = len(completion_dates)
-    max_streak = calculate_max_streak(completion_dates)
+    # Streak details for this one student
+    streaks = student_streak_stats(to_day_ordinals(completed_tasks["Completion_Date"].dropna()))
+    days_worked = streaks.active_days
+    max_streak = streaks.max_streak
+    current_streak = streaks.current_streak
+    longest_streak_dates = ""
+    if max_streak > 0:
+        longest_streak_dates = f"{streaks.longest_start} to {streaks.longest_end}"
     
     # Get in-progress tasks
     in_progress_tasks = student_data[student_data["Status"] == "In Progress"]
@@ -811,6 +718,8 @@ def get_student_profile_info(student_data):
             "total_tasks": total_tasks,
             "diagnostics_count": diagnostics_count,
             "max_streak": max_streak,
+            "current_streak": current_streak,
+            "longest_streak_dates": longest_streak_dates,
             "avg_success": avg_success_str
         },
         "recent_activity": recent_activities,
@@ -927,7 +836,9 @@ def get_progress_chart_data(student_data):
         return {
             'dates': [],
             'success_rates': [],
+            'task_dates': [],
             'tasks_count': [],
+            'tasks_period': period_label(1),
             'subjects': [],
             'subject_success': [],
             'subject_tasks': []
@@ -941,7 +852,9 @@ def get_progress_chart_data(student_data):
         return {
             'dates': [],
             'success_rates': [],
+            'task_dates': [],
             'tasks_count': [],
+            'tasks_period': period_label(1),
             'subjects': [],
             'subject_success': [],
             'subject_tasks': []
@@ -959,6 +872,13 @@ def get_progress_chart_data(student_data):
     task_counts = valid_dates_df.groupby(valid_dates_df["Completion_Date"].dt.date).size().reset_index()
     task_counts.columns = ["Completion_Date", "Task_Count"]
     
+    # Long ranges: the success line keeps the days LTTB picks, while task
+    # counts are summed per week so no completed task drops out of the bars
+    max_points = app.config['CHART_MAX_POINTS']
+    daily_data = daily_data.iloc[daily_positions(daily_data["Completion_Date"], daily_data["Success_Rate"], max_points)]
+    task_dates, task_totals, bar_days = daily_totals(task_counts["Completion_Date"], task_counts["Task_Count"],
+                                                     max_points)
+    
     # Calculate subject performance
     subject_data = student_data.groupby("Subject").agg({
         "Success_Rate": "mean",
@@ -972,7 +892,9 @@ def get_progress_chart_data(student_data):
     return {
         'dates': [date.strftime("%Y-%m-%d") for date in daily_data["Completion_Date"]],
         'success_rates': [round(rate, 2) for rate in daily_data["Success_Rate"].tolist()],
-        'tasks_count': task_counts["Task_Count"].tolist(),
+        'task_dates': [date.strftime("%Y-%m-%d") for date in task_dates],
+        'tasks_count': task_totals.tolist(),
+        'tasks_period': period_label(bar_days),
         'subjects': subject_data["Subject"].tolist(),
         'subject_success': [round(rate, 2) for rate in subject_data["Success_Rate"].tolist()],
         'subject_tasks': subject_data["Task"].tolist()
@@ -1055,179 +977,117 @@ def get_diagnostics_data(student_data):
         "tests": tests_data
     }
 
-def generate_progress_charts(student_data, user_id, student_name):
-    """Generate progress charts for student profile"""
-    # Use sanitize_filename to create a safe filename
-    safe_name = sanitize_filename(student_name)
+def progress_chart(student_data):
+    """Chart kind, cache parts and render call of a student's progress charts."""
+    chart_data = student_data[PROGRESS_CHART_COLUMNS]
+    max_points = app.config['CHART_MAX_POINTS']
+    return 'progress', [chart_data, max_points], render_progress_chart, chart_data, max_points
 
-    # Create the figure with multiple subplots
-    fig = Figure(figsize=(10, 12))
-    
-    # Check if there are any valid dates for the student
-    valid_dates_df = student_data.dropna(subset=["Completion_Date"])
+def subject_comparison_chart(student_data):
+    """Like ``progress_chart`` for the subject comparison; None with fewer than two subjects."""
+    if student_data["Subject"].nunique() <= 1:
+        return None
+    chart_data = student_data[SUBJECT_CHART_COLUMNS]
+    return 'subjects', [chart_data], render_subject_comparison, chart_data
+
+# Static student charts served by /charts/<user_id>/<student>/<kind>.<format>
+STUDENT_CHARTS = {
+    'progress': progress_chart,
+    'subjects': subject_comparison_chart
+}
+
+def student_chart_url(user_id, student_name, kind, format=None):
+    return url_for('student_chart', user_id=user_id, student=student_name, kind=kind,
+                   format=format or app.config['CHART_FORMAT'])
+
+def chart_image(chart_filename, ready):
+    """Url, status url and readiness of a queued chart, for the page templates.
     
-    if len(valid_dates_df) == 0:
-        # Create a simple plot with "No data available" message
-        ax = fig.add_subplot(111)
-        ax.text(0.5, 0.5, "No task data available for this student",
-                horizontalalignment='center', verticalalignment='center',
-                transform=ax.transAxes, fontsize=14)
-        ax.set_axis_off()
+    Pages show the image when it is ready and otherwise poll the status url
+    (see ``loadChartImages`` in charts.js) until it is.
+    """
+    return {
+        'url': url_for('static', filename=f'charts/{chart_filename}'),
+        'status_url': url_for('chart_status', filename=chart_filename),
+        'ready': ready
+    }
+
+@app.route('/charts/<user_id>/<student>/<kind>.<format>')
+@session_required
+def student_chart(user_id, student, kind, format):
+    """Serve a student's static chart, drawing it only when it is requested.
+    
+    The ETag is the chart's cache key, so a browser holding the current
+    image is answered with 304 without the chart being drawn or read;
+    Last-Modified is the time the student's dataset was last written.
+    """
+    if user_id != session['user_id'] or kind not in STUDENT_CHARTS or format not in CHART_FORMATS:
+        abort(404)
+    user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_id)
+    if not has_processed_data(user_dir):
+        abort(404)
+    
+    handle = dataset_cache.get(user_id, user_dir)
+    rows = read_student_rows(user_dir, student, handle.fingerprint)
+    if rows is None:
+        abort(404)
+    elif len(rows) > 0:
+        student_data = handle.task_rows(rows)
     else:
-        # Daily success rate chart
-        daily_data = valid_dates_df.groupby(valid_dates_df["Completion_Date"].dt.date).agg({
-            "Success_Rate": "mean"
-        }).reset_index()
-        
-        # Sort by date
-        daily_data = daily_data.sort_values("Completion_Date")
-        
-        # Create the daily success rate chart (first subplot)
-        ax1 = fig.add_subplot(311)
-        ax1.plot(daily_data["Completion_Date"], daily_data["Success_Rate"], 
-                marker='o', linestyle='-', color='blue')
-        ax1.set_title('Daily Average Success Rate')
-        ax1.set_ylabel('Success Rate (%)')
-        ax1.set_xlabel('Date')
-        ax1.grid(True, linestyle='--', alpha=0.7)
-        
-        # Format dates on x-axis
-        ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        fig.autofmt_xdate()
-        
-        # Task completion chart - count tasks per day
-        task_counts = valid_dates_df.groupby(valid_dates_df["Completion_Date"].dt.date).size().reset_index()
-        task_counts.columns = ["Completion_Date", "Task_Count"]
-        
-        # Create the second subplot (tasks completed per day)
-        ax2 = fig.add_subplot(312)
-        ax2.bar(task_counts["Completion_Date"], task_counts["Task_Count"], color='green', alpha=0.7)
-        ax2.set_title('Tasks Completed Per Day')
-        ax2.set_ylabel('Number of Tasks')
-        ax2.set_xlabel('Date')
-        ax2.grid(True, linestyle='--', alpha=0.7, axis='y')
-        
-        # Format dates on x-axis
-        ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        
-        # Subject performance chart
-        ax3 = fig.add_subplot(313)
-        
-        # Group by subject
-        subject_data = student_data.groupby("Subject").agg({
-            "Success_Rate": "mean",
-            "Task": "count"
-        }).reset_index()
-        
-        # Sort by number of tasks
-        subject_data = subject_data.sort_values("Task", ascending=False)
-        
-        # Bar chart for subjects
-        bars = ax3.bar(subject_data["Subject"], subject_data["Success_Rate"], color='purple', alpha=0.7)
-        
-        # Add task count as text above bars
-        for bar, count in zip(bars, subject_data["Task"]):
-            height = bar.get_height()
-            ax3.text(bar.get_x() + bar.get_width()/2., height + 2,
-                    f'{count} tasks', ha='center', va='bottom', rotation=0)
-        
-        ax3.set_title('Average Success Rate by Subject')
-        ax3.set_ylabel('Success Rate (%)')
-        ax3.set_ylim(0, 105)  # Set y limit to accommodate annotations
-        ax3.grid(True, linestyle='--', alpha=0.7, axis='y')
-        
-        # Rotate x-axis labels for better readability
-        plt.setp(ax3.get_xticklabels(), rotation=45, ha='right')
-    
-    # Adjust layout
-    fig.tight_layout()
-    
-    # Save chart with safe filename
-    chart_filename = f'progress_chart_{user_id}_{safe_name}.png'
-    
-    # Use absolute path to ensure the directory exists
-    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'charts')
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir, exist_ok=True)
+        student_data = zero_task_frame(handle.students().loc[student].to_dict())
     
-    chart_path = os.path.join(static_dir, chart_filename)
+    chart = STUDENT_CHARTS[kind](student_data)
+    if chart is None:
+        abort(404)
+    chart_filename = chart_cache.filename(*chart[:2], format)
+    etag = os.path.splitext(chart_filename)[0]
+    last_modified = datetime.fromtimestamp(handle.version[0] / 1e9)
     
-    # Save figure
-    fig.savefig(chart_path)
-    
-    return url_for('static', filename=f'charts/{chart_filename}')
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        chart_renderer.draw(*chart, format=format)
+        response = send_file(chart_cache.path(chart_filename), mimetype=CHART_FORMATS[format], conditional=True,
+                             etag=etag, last_modified=last_modified, max_age=0)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Per-user data: cacheable by the browser, revalidated on each use
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
-def generate_subject_comparison(student_data, user_id, student_name):
-    """Generate subject comparison chart for student profile"""
-    # Use sanitize_filename to create a safe filename
-    safe_name = sanitize_filename(student_name)
-    
-    subjects = sorted(student_data["Subject"].unique())
-    
-    if len(subjects) <= 1:
-        return None
-    
-    # Create figure for subject comparison
-    fig = Figure(figsize=(10, 6))
-    ax = fig.add_subplot(111)
-    
-    # Calculate subject metrics
-    subject_metrics = []
-    
-    for subject in subjects:
-        subject_data = student_data[student_data["Subject"] == subject]
-        
-        # Calculate metrics
-        task_count = len(subject_data)
-        avg_success = subject_data["Success_Rate"].mean()
-        days_worked = len(subject_data["Completion_Date"].dt.date.unique())
-        
-        subject_metrics.append({
-            "Subject": subject,
-            "Tasks": task_count,
-            "Success": avg_success,
-            "Days": days_worked
-        })
-    
-    # Create bar chart comparing subjects
-    x = np.arange(len(subjects))
-    width = 0.25
-    
-    # Extract metrics for plotting
-    tasks = [metric["Tasks"] for metric in subject_metrics]
-    success = [metric["Success"] for metric in subject_metrics]
-    days = [metric["Days"] for metric in subject_metrics]
-    
-    # Plot bars
-    ax.bar(x - width, tasks, width, label='Tasks Completed')
-    ax.bar(x, success, width, label='Avg Success Rate (%)')
-    ax.bar(x + width, days, width, label='Days Worked')
-    
-    # Add labels and legend
-    ax.set_xlabel('Subject')
-    ax.set_ylabel('Value')
-    ax.set_title('Subject Comparison')
-    ax.set_xticks(x)
-    ax.set_xticklabels(subjects)
-    ax.legend()
-    
-    # Adjust layout
-    fig.tight_layout()
-    
-    # Save chart with safe filename
-    chart_filename = f'subject_chart_{user_id}_{safe_name}.png'
-    
-    # Use absolute path to ensure the directory exists
-    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'charts')
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir, exist_ok=True)
-    
-    chart_path = os.path.join(static_dir, chart_filename)
-    
-    # Save figure
-    fig.savefig(chart_path)
-    
-    return url_for('static', filename=f'charts/{chart_filename}')
+@app.route('/charts/status/<filename>')
+@session_required
+def chart_status(filename):
+    """Report whether a queued chart image has been drawn yet."""
+    if not CHART_FILENAME.match(filename):
+        return jsonify({'error': 'Unknown chart'}), 404
+    return jsonify({
+        'status': chart_renderer.status(filename),
+        'url': url_for('static', filename=f'charts/{filename}')
+    })
+
+def precompute_charts(handle, results, top_n, report=None):
+    """Queue the charts of the ``top_n`` most active students of an analysis.
+    
+    Their profile charts are the likeliest to be requested next; the rows
+    are the ones the student index points at, so the cache keys match.
+    """
+    summaries = sorted(results['clean_summaries'], key=lambda s: s.get('Days_Worked') or 0, reverse=True)
+    queued = 0
+    for summary in summaries[:top_n]:
+        rows = results['student_rows'].get(summary['Full_Name'])
+        if rows is None or len(rows) == 0:
+            continue
+        student_data = handle.task_rows(rows)
+        for make_chart in STUDENT_CHARTS.values():
+            chart = make_chart(student_data)
+            if chart is not None:
+                chart_renderer.submit(*chart)
+        queued += 1
+        if report is not None:
+            report(students=queued)
+    return queued
 
 @app.route('/compare', methods=['GET', 'POST'])
 @session_required
@@ -1245,8 +1105,7 @@ def compare_students():
         return redirect(url_for('analyze'))
     
     # Load student summaries
-    with open(summary_file, 'r') as f:
-        student_summaries = json.load(f)
+    student_summaries = dataset_cache.get(user_id, user_dir).read_json('student_summaries.json')
     
     if request.method == 'POST':
         # Get selected students and comparison type
@@ -1332,25 +1191,21 @@ def compare_students():
             comparison_data_obj['values'] = [0] * len(selected_data)
             flash(f"Warning: Some data could not be processed properly. Error: {str(e)}", "warning")
         
-        # Generate comparison chart
-        chart_url = generate_comparison_chart(selected_data, comparison_type, user_id)
+        # Queue the comparison chart image
+        comparison_chart = generate_comparison_chart(selected_data, comparison_type, user_id)
         
         return render_template('compare.html', 
                                students=student_summaries,
                                selected_students=selected_students,
                                comparison_type=comparison_type,
-                               chart_url=chart_url,
+                               comparison_chart=comparison_chart,
                                comparison_data=selected_data,
                                comparison_data_obj=comparison_data_obj)
     
     return render_template('compare.html', students=student_summaries)
 
 def generate_comparison_chart(students_data, comparison_type, user_id):
-    """Generate comparison chart between students"""
-    # Create figure for comparison
-    fig = Figure(figsize=(10, 6))
-    ax = fig.add_subplot(111)
-    
+    """Generate comparison chart between students (cached and drawn like the student charts)"""
     # Extract data for comparison
     names = [s["Full_Name"] for s in students_data]
     
@@ -1383,40 +1238,9 @@ def generate_comparison_chart(students_data, comparison_type, user_id):
         values = [float(s.get("Diagnostics_Count", 0)) for s in students_data]
         label = "Diagnostic Tests Completed"
     
-    # Create horizontal bar chart
-    y_pos = np.arange(len(names))
-    ax.barh(y_pos, values, align='center')
-    ax.set_yticks(y_pos)
-    ax.set_yticklabels(names)
-    ax.invert_yaxis()  # Labels read top-to-bottom
-    ax.set_xlabel(label)
-    ax.set_title(f'{comparison_type} Comparison')
-    
-    # Add value labels to the right of each bar
-    for i, v in enumerate(values):
-        if comparison_type == "Success Rate":
-            ax.text(v + 1, i, f"{v:.1f}%", va='center')
-        else:
-            ax.text(v + 0.1, i, f"{int(v)}", va='center')
-    
-    # Adjust layout
-    fig.tight_layout()
-    
-    # Generate a unique filename
-    timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-    chart_filename = f'comparison_chart_{user_id}_{timestamp}.png'
-    
-    # Use absolute path to ensure the directory exists
-    static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'charts')
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir, exist_ok=True)
-    
-    chart_path = os.path.join(static_dir, chart_filename)
-    
-    # Save figure
-    fig.savefig(chart_path)
-    
-    return url_for('static', filename=f'charts/{chart_filename}')
+    parts = [names, values, comparison_type]
+    return chart_image(*chart_renderer.submit('comparison', parts, render_comparison_chart,
+                                              names, values, comparison_type, label))
 
 # Add a route to clear filters (for reset button)
 @app.route('/reset_filters', methods=['POST'])
@@ -1449,8 +1273,7 @@ def export_data():
         return redirect(url_for('analyze'))
     
     # Load student summaries
-    with open(summary_file, 'r') as f:
-        student_summaries = json.load(f)
+    student_summaries = dataset_cache.get(user_id, user_dir).read_json('student_summaries.json')
     
     # Check if xlsxwriter is available
     try:
@@ -1583,9 +1406,9 @@ def cleanup_old_data():
         cleanup_threshold = datetime.now() - timedelta(days=7)
         upload_folder = app.config['UPLOAD_FOLDER']
         
-        # List all user folders
+        # List all user folders (the shared dataset cache is not one)
         user_folders = [f for f in os.listdir(upload_folder)
-                        if os.path.isdir(os.path.join(upload_folder, f))]
+                        if f != DATASETS_DIR and os.path.isdir(os.path.join(upload_folder, f))]
         
         cleaned_count = 0
         for user_id in user_folders:
@@ -1597,10 +1420,16 @@ def cleanup_old_data():
             # If folder is older than threshold, delete it
             if mod_time < cleanup_threshold:
                 logger.info(f"Removing old data for user_id: {user_id}, last modified: {mod_time}")
+                dataset_cache.evict(user_id)
+                release(upload_folder, user_id, user_dir)
                 shutil.rmtree(user_dir, ignore_errors=True)
                 cleaned_count += 1
         
-        logger.info(f"Data cleanup complete. Removed {cleaned_count} old user folders")
+        # Drop cached datasets that no remaining user folder references
+        swept_count = sweep(upload_folder)
+        
+        logger.info(f"Data cleanup complete. Removed {cleaned_count} old user folders "
+                    f"and {swept_count} unreferenced datasets")
     except Exception as e:
         logger.error(f"Error during data cleanup: {str(e)}")
 
@@ -1614,13 +1443,12 @@ def debug_students():
     
     user_id = session['user_id']
     user_dir = os.path.join(app.config['UPLOAD_FOLDER'], user_id)
-    processed_file = os.path.join(user_dir, 'processed_data.pkl')
     
-    if not os.path.exists(processed_file):
+    if not has_processed_data(user_dir):
         return jsonify({"error": "No processed data found"})
     
-    # Load processed data
-    df = pd.read_pickle(processed_file)
+    # Load only the columns needed here
+    df = dataset_cache.get(user_id, user_dir).tasks(columns=['Full_Name', 'Status'])
     
     # Get a list of all students
     all_students = df['Full_Name'].unique().tolist()
@@ -1681,8 +1509,11 @@ if __name__ == '__main__':
     # Start the scheduler
     scheduler.start()
     
-    # Shut down the scheduler when exiting the app
+    # Shut down the scheduler, the upload jobs and the sheet workers when exiting the app
     atexit.register(lambda: scheduler.shutdown())
+    atexit.register(job_queue.shutdown)
+    atexit.register(shutdown_sheet_pool)
+    atexit.register(chart_renderer.shutdown)
     
     # Log that the app is starting with scheduler
     logger.info("Application started with data cleanup scheduler")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Benchmark for date-window queries on /analyze.
+Compares scanning the task table (filter_mask() + student_aggregates())
+with reading the precomputed activity grids (window_aggregates()) for a
+series of random windows, after a one-off build_activity(). Both must
+produce the same aggregates; averages that land on a rounding tie may
+differ by 0.01, as the two sum in a different order.
+
+    python benchmarks/bench_activity.py --students 1000 10000 50000 --windows 20
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_analysis import make_tasks_frame
+from modules.data_processing.activity import build_activity, window_aggregates
+from modules.data_processing.analysis import filter_mask, student_aggregates
+from modules.data_processing.storage import build_student_table
+
+def random_windows(n_windows, n_days, seed=2):
+    """``n_windows`` random (start, end) pairs inside the generated date range."""
+    rng = np.random.default_rng(seed)
+    first = pd.Timestamp('2025-02-01')
+    starts = rng.integers(0, n_days, n_windows)
+    lengths = rng.integers(0, n_days, n_windows)
+    return [(first + pd.Timedelta(days=int(s)), first + pd.Timedelta(days=int(s + n)))
+            for s, n in zip(starts, lengths)]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark date-window aggregation.')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Class sizes to benchmark (default: 1000 10000 50000)')
+    parser.add_argument('--days', type=int, default=30,
+                        help='Days spanned by the generated tasks (default: 30)')
+    parser.add_argument('--windows', type=int, default=20,
+                        help='Random windows queried per size (default: 20)')
+    args = parser.parse_args()
+
+    print(f"{'students':>9} {'build (s)':>10} {'scan (ms)':>10} {'grid (ms)':>10} {'speed-up':>9}")
+    for n_students in args.students:
+        df = make_tasks_frame(n_students, n_days=args.days)
+        students = build_student_table(df)
+        windows = random_windows(args.windows, args.days)
+
+        start = time.perf_counter()
+        activity = build_activity(df, students.index)
+        build_time = time.perf_counter() - start
+
+        scan_time = grid_time = 0.0
+        for start_date, end_date in windows:
+            start = time.perf_counter()
+            expected = student_aggregates(df, filter_mask(df, start_date, end_date))
+            scan_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = window_aggregates(activity, students, start_date, end_date)
+            grid_time += time.perf_counter() - start
+
+            pd.testing.assert_frame_equal(actual.stats.drop(columns='Avg_Success'),
+                                          expected.stats.drop(columns='Avg_Success'), check_dtype=False)
+            assert np.allclose(actual.stats['Avg_Success'], expected.stats['Avg_Success'], rtol=0, atol=0.0101)
+            assert actual.rows.keys() == expected.rows.keys()
+
+        scan_ms = scan_time / len(windows) * 1000
+        grid_ms = grid_time / len(windows) * 1000
+        print(f"{n_students:>9} {build_time:>10.2f} {scan_ms:>10.1f} {grid_ms:>10.1f} {scan_ms / grid_ms:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
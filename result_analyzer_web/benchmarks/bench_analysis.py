@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Benchmark for the per-student aggregation behind /analyze.
+Compares the legacy groupby loop with the grouped aggregation in
+summarize_students() and checks that both produce the same summaries.
+
+    python benchmarks/bench_analysis.py --students 1000 10000 100000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_processing.analysis import SUMMARY_COLUMNS, summarize_students
+
+def make_tasks_frame(n_students, tasks_per_student=10, n_days=30, seed=0):
+    """Generate a filtered task table (Status == Done) for ``n_students``."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_students * tasks_per_student
+    student = rng.integers(0, n_students, n_rows)
+    diagnostics = [{"Diagnostic Math": 70.0} if i % 3 else {} for i in range(n_students)]
+    return pd.DataFrame({
+        "Full_Name": pd.Categorical([f"Student {i:06d}" for i in student]),
+        "Phone": [f"+994{i:07d}" for i in student],
+        "Grade": student % 11 + 1,
+        "Subject": pd.Categorical(np.where(rng.random(n_rows) < 0.6, "Math", "English")),
+        "Completion_Date": pd.Timestamp('2025-02-01') + pd.to_timedelta(rng.integers(0, n_days, n_rows), unit='D'),
+        "Status": "Done",
+        "Success_Rate": rng.uniform(0, 100, n_rows).round(1),
+        "Diagnostics": [diagnostics[i] for i in student],
+    })
+
+def legacy_max_streak(dates):
+    """The original day-by-day streak loop, kept for comparison."""
+    if len(dates) <= 1:
+        return len(dates)
+    streak_count = 1
+    max_streak = 1
+    for i in range(1, len(dates)):
+        if (dates[i] - dates[i-1]).days == 1:
+            streak_count += 1
+            max_streak = max(max_streak, streak_count)
+        else:
+            streak_count = 1
+    return max_streak
+
+def legacy_summaries(tasks_df):
+    """The original per-student loop from analyze(), kept for comparison."""
+    student_summaries = []
+    for student_name, group in tasks_df.groupby("Full_Name", observed=True):
+        completion_dates = sorted(group["Completion_Date"].dt.date.unique())
+        first_record = group.iloc[0]
+        diagnostics_count = 0
+        if isinstance(first_record['Diagnostics'], dict):
+            diagnostics_count = len(first_record['Diagnostics'])
+        student_summaries.append({
+            "Full_Name": student_name,
+            "Phone": first_record.get("Phone", ""),
+            "Grade": first_record.get("Grade", ""),
+            "Days_Worked": len(completion_dates),
+            "Total_Tasks": len(group),
+            "Diagnostics_Count": diagnostics_count,
+            "Max_Streak": legacy_max_streak(completion_dates),
+            "Avg_Success": round(group["Success_Rate"].mean(), 2),
+            "Subjects": ", ".join(sorted(group["Subject"].unique()))
+        })
+    return pd.DataFrame(student_summaries, columns=SUMMARY_COLUMNS)
+
+def vectorized_summaries(tasks_df):
+    return summarize_students(tasks_df).reset_index()[SUMMARY_COLUMNS]
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-student aggregation.')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Class sizes to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--legacy-max', type=int, default=100000,
+                        help='Skip the legacy loop above this many students (default: 100000)')
+    args = parser.parse_args()
+
+    print(f"{'students':>9} {'rows':>9} {'legacy (s)':>11} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_students in args.students:
+        tasks_df = make_tasks_frame(n_students)
+        new_time, actual = time_call(vectorized_summaries, tasks_df)
+        if n_students <= args.legacy_max:
+            legacy_time, expected = time_call(legacy_summaries, tasks_df)
+            # Grouped means can differ in the last ulp, flipping a rounding tie
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_exact=False, atol=0.011)
+            legacy_str, speedup = f"{legacy_time:.3f}", f"{legacy_time / new_time:.1f}x"
+        else:
+            legacy_str, speedup = "-", "-"
+        print(f"{n_students:>9} {len(tasks_df):>9} {legacy_str:>11} {new_time:>15.3f} {speedup:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Benchmark for merging a weekly upload into an existing analysis.
+Appends one week of tasks for a share of the class and compares
+re-aggregating every student (student_aggregates()) with refreshing only
+the students that got new rows (update_student_aggregates()), and
+rebuilding the activity grids (build_activity()) with adding the new rows
+to them (append_activity()). Both must produce the same aggregates and
+grids.
+
+    python benchmarks/bench_append.py --students 1000 10000 100000 --active 0.1
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_analysis import make_tasks_frame
+from modules.data_processing.activity import append_activity, build_activity
+from modules.data_processing.analysis import student_aggregates, update_student_aggregates
+from modules.data_processing.storage import build_student_table
+
+def weekly_rows(base, active_share, seed=1):
+    """Rows for a new week, from a random ``active_share`` of the students in ``base``."""
+    rng = np.random.default_rng(seed)
+    names = base["Full_Name"].cat.categories
+    active = rng.choice(names, max(1, int(len(names) * active_share)), replace=False)
+    week = base[base["Full_Name"].isin(active)].drop_duplicates("Full_Name").copy()
+    week["Completion_Date"] = base["Completion_Date"].max() + pd.Timedelta(days=1)
+    return week
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark incremental aggregate updates.')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Class sizes to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--active', type=float, default=0.1,
+                        help='Share of students with new tasks (default: 0.1)')
+    args = parser.parse_args()
+
+    print(f"{'students':>9} {'new rows':>9} {'full (s)':>9} {'update (s)':>11} {'speed-up':>9} "
+          f"{'grids (s)':>10} {'append (s)':>11} {'speed-up':>9}")
+    for n_students in args.students:
+        base = make_tasks_frame(n_students)
+        week = weekly_rows(base, args.active)
+        merged = pd.concat([base, week], ignore_index=True)
+        merged["Full_Name"] = merged["Full_Name"].astype("category")
+        before = student_aggregates(base, np.ones(len(base), dtype=bool))
+        mask = np.ones(len(merged), dtype=bool)
+
+        start = time.perf_counter()
+        expected = student_aggregates(merged, mask)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = update_student_aggregates(before, merged, mask, week["Full_Name"].unique())
+        update_time = time.perf_counter() - start
+
+        pd.testing.assert_frame_equal(actual.stats, expected.stats)
+        assert actual.rows.keys() == expected.rows.keys()
+        assert all(np.array_equal(actual.rows[name], expected.rows[name]) for name in expected.rows)
+
+        students = build_student_table(merged)
+        grids = build_activity(base, build_student_table(base).index)
+        start = time.perf_counter()
+        expected = build_activity(merged, students.index)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = append_activity(grids, week, students.index, len(base))
+        append_time = time.perf_counter() - start
+
+        assert np.array_equal(actual.cell_keys, expected.cell_keys)
+        assert np.array_equal(actual.cell_tasks, expected.cell_tasks)
+        assert np.array_equal(actual.day_bits, expected.day_bits)
+        assert np.array_equal(actual.order, expected.order)
+        print(f"{n_students:>9} {len(week):>9} {full_time:>9.3f} {update_time:>11.3f} {full_time / update_time:>8.1f}x "
+              f"{build_time:>10.3f} {append_time:>11.3f} {build_time / append_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
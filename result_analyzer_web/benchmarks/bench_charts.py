@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Benchmark for drawing the static chart images.
+Compares ms per chart for building a new Figure for every chart and
+fitting its layout (reuse=False, the way the charts were drawn before
+templates) with redrawing the per-worker chart templates (reuse=True),
+for the progress, subject comparison and student comparison charts.
+Times are for drawing the Figure and for drawing plus saving it as the
+chart cache does.
+
+    python benchmarks/bench_charts.py --students 50 --format png
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_analysis import make_tasks_frame
+from modules.utils.chart_cache import save_figure
+from modules.utils.charts import (
+    PROGRESS_CHART_COLUMNS, SUBJECT_CHART_COLUMNS,
+    render_comparison_chart, render_progress_chart, render_subject_comparison
+)
+
+def chart_inputs(n_students, tasks_per_student, n_days):
+    """``(kind, render, args)`` of every chart drawn for ``n_students`` students."""
+    df = make_tasks_frame(n_students, tasks_per_student=tasks_per_student, n_days=n_days)
+    df["Subject"] = df["Subject"].astype(str)
+    df["Task"] = "Task " + (df.index % 20).astype(str)
+    charts = []
+    names = []
+    for name, student_data in df.groupby("Full_Name", sort=False, observed=True):
+        student_data = student_data.reset_index(drop=True)
+        charts.append(('progress', render_progress_chart, (student_data[PROGRESS_CHART_COLUMNS],)))
+        if student_data["Subject"].nunique() > 1:
+            charts.append(('subjects', render_subject_comparison, (student_data[SUBJECT_CHART_COLUMNS],)))
+        names.append(name)
+        if len(names) == 5:
+            values = [float(len(name)) for name in names]
+            charts.append(('comparison', render_comparison_chart, (names, values, 'Days Worked', 'Days Worked')))
+            names = []
+    return charts
+
+def time_charts(charts, reuse, save_options, directory):
+    """Total seconds drawing (and drawing plus saving) each chart kind."""
+    draw, total = {}, {}
+    path = os.path.join(directory, 'chart')
+    for kind, render, args in charts:
+        start = time.perf_counter()
+        fig = render(*args, reuse=reuse)
+        drawn = time.perf_counter()
+        save_figure(fig, path, **save_options)
+        saved = time.perf_counter()
+        draw[kind] = draw.get(kind, 0.0) + drawn - start
+        total[kind] = total.get(kind, 0.0) + saved - start
+    return draw, total
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chart drawing.')
+    parser.add_argument('--students', type=int, default=50,
+                        help='Students to draw charts for (default: 50)')
+    parser.add_argument('--tasks', type=int, default=30,
+                        help='Tasks per student (default: 30)')
+    parser.add_argument('--days', type=int, default=30,
+                        help='Days spanned by the generated tasks (default: 30)')
+    parser.add_argument('--format', choices=['png', 'svg'], default='png',
+                        help='Image format saved (default: png)')
+    args = parser.parse_args()
+
+    charts = chart_inputs(args.students, args.tasks, args.days)
+    save_options = {'format': args.format} if args.format == 'svg' else {'format': 'png', 'dpi': 100, 'png_colors': 256}
+    counts = {}
+    for kind, _, _ in charts:
+        counts[kind] = counts.get(kind, 0) + 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Warm up imports, fonts and the templates of the common layouts
+        time_charts(charts[:10], False, save_options, directory)
+        time_charts(charts[:10], True, save_options, directory)
+        fresh_draw, fresh_total = time_charts(charts, False, save_options, directory)
+        reuse_draw, reuse_total = time_charts(charts, True, save_options, directory)
+
+    print(f"{'chart':>10} {'count':>6} {'new draw':>9} {'tmpl draw':>10} {'new+save':>9} {'tmpl+save':>10} {'speed-up':>9}  (ms per chart)")
+    for kind, count in counts.items():
+        new_draw = fresh_draw[kind] / count * 1000
+        tmpl_draw = reuse_draw[kind] / count * 1000
+        new_total = fresh_total[kind] / count * 1000
+        tmpl_total = reuse_total[kind] / count * 1000
+        print(f"{kind:>10} {count:>6} {new_draw:>9.1f} {tmpl_draw:>10.1f} {new_total:>9.1f} {tmpl_total:>10.1f} "
+              f"{new_total / tmpl_total:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Report for the compaction of the processed task table.
+Transforms a synthetic export, stores it with TaskTableWriter and prints
+memory_usage(deep=True) per column for the transformed frame (before) and
+for the stored, compacted table read back with pandas (after), where
+Diagnostics is replaced by the integer Diagnostics_Key.
+
+    python benchmarks/bench_compaction.py --rows 100000
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ingest import make_wide_frame
+from modules.data_processing.file_processor import transform_wide_to_long
+from modules.data_processing.storage import TASKS_FILE, TaskTableWriter, open_table
+
+def main():
+    parser = argparse.ArgumentParser(description='Report task table memory before and after compaction.')
+    parser.add_argument('--rows', type=int, default=100000, help='Spreadsheet rows (default: 100000)')
+    args = parser.parse_args()
+
+    before = transform_wide_to_long(make_wide_frame(args.rows))
+    user_dir = tempfile.mkdtemp()
+    writer = TaskTableWriter(user_dir)
+    writer.append(before)
+    writer.close()
+    after = open_table(os.path.join(user_dir, TASKS_FILE)).to_pandas()
+
+    usage = pd.DataFrame({
+        'before MiB': before.memory_usage(deep=True, index=False) / 2**20,
+        'before dtype': before.dtypes.astype(str),
+        'after MiB': after.memory_usage(deep=True, index=False) / 2**20,
+        'after dtype': after.dtypes.astype(str),
+    }).reindex(before.columns.union(after.columns, sort=False))
+    print(f"{len(before)} task rows")
+    print(usage.to_string(float_format=lambda v: f"{v:.2f}", na_rep='-'))
+    total_before = usage['before MiB'].sum()
+    total_after = usage['after MiB'].sum()
+    print(f"total: {total_before:.1f} MiB before, {total_after:.1f} MiB after ({total_before / total_after:.1f}x smaller)")
+
+if __name__ == "__main__":
+    main()
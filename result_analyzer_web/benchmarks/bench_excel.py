@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Benchmark for reading .xlsx uploads.
+Compares pd.read_excel followed by the transform with the streaming
+read-only ingestion in process_excel_file(). It reports time and peak
+Python memory (tracemalloc) and checks that both produce the same table.
+
+    python benchmarks/bench_excel.py --rows 1000 10000 30000
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ingest import make_wide_frame
+from modules.data_processing.file_processor import READ_BATCH_SIZE, process_excel_file, transform_wide_to_long
+from modules.data_processing.schema import build_column_plan, text_columns
+
+def whole_read(path):
+    # Text columns stay text, as the streaming reader keeps them
+    columns = pd.read_excel(path, engine='openpyxl', nrows=0).columns
+    dtype = {column: str for column in text_columns(build_column_plan(columns))}
+    return transform_wide_to_long(pd.read_excel(path, engine='openpyxl', dtype=dtype))
+
+def streaming_read(path, batch_size):
+    return process_excel_file(path, os.path.basename(path), batch_size=batch_size)[0]
+
+def measure(func, *args):
+    """Return (seconds, peak MiB, result) for one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark .xlsx ingestion.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 30000],
+                        help='Spreadsheet sizes to benchmark (default: 1000 10000 30000)')
+    parser.add_argument('--batch-size', type=int, default=READ_BATCH_SIZE,
+                        help=f'Streaming batch size (default: {READ_BATCH_SIZE})')
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'file MiB':>9} {'whole (s)':>10} {'whole MiB':>10} {'stream (s)':>11} {'stream MiB':>11}")
+    for n_rows in args.rows:
+        path = os.path.join(tempfile.mkdtemp(), 'upload.xlsx')
+        make_wide_frame(n_rows).to_excel(path, index=False)
+        size = os.path.getsize(path) / 2**20
+
+        whole_time, whole_peak, expected = measure(whole_read, path)
+        stream_time, stream_peak, actual = measure(streaming_read, path, args.batch_size)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        print(f"{n_rows:>7} {size:>9.1f} {whole_time:>10.2f} {whole_peak:>10.1f} {stream_time:>11.2f} {stream_peak:>11.1f}")
+
+if __name__ == "__main__":
+    main()
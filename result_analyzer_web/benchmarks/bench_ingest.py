@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+"""
+Before/after timing harness for upload ingestion.
+Compares the legacy row-by-row transform with the column-oriented engine
+and checks that both produce the same processed table.
+
+    python benchmarks/bench_ingest.py --rows 1000 10000 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_processing.file_processor import transform_wide_to_long
+
+def make_wide_frame(n_rows, seed=0):
+    """Generate a synthetic export in the multi-subject wide format."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2025-02-01') + pd.to_timedelta(rng.integers(0, 60, n_rows), unit='D')
+    statuses = np.array(["Done", "In Progress", "Done", "Done"])
+    tasks = np.array([f"Task {i}" for i in range(40)] + ["Not Started"], dtype=object)
+
+    def rates():
+        values = rng.uniform(0, 100, n_rows).round(1).astype(object)
+        values[::7] = [f"{v}%" for v in values[::7]]
+        values[::11] = "Not Started"
+        return values
+
+    math_tasks = tasks[rng.integers(0, len(tasks), n_rows)]
+    math_tasks[::13] = np.nan
+    return pd.DataFrame({
+        "Name": [f"Name{i % (n_rows // 5 + 1)}" for i in range(n_rows)],
+        "Surname": [f"Surname{i % 97}" for i in range(n_rows)],
+        "Phone Number": [f"+994{i:07d}" for i in range(n_rows)],
+        "Grade": rng.integers(1, 12, n_rows),
+        "Parent Number": [f"+994{i + 1:07d}" for i in range(n_rows)],
+        "School": [f"School {i % 9}" for i in range(n_rows)],
+        "Registration Date": dates - pd.Timedelta(days=30),
+        "Diagnostic Math - Accuracy": np.where(rng.random(n_rows) < 0.5, rng.uniform(0, 100, n_rows), np.nan),
+        "Diagnostic English - Accuracy": np.where(rng.random(n_rows) < 0.3, rng.uniform(0, 100, n_rows), np.nan),
+        "Practice Task": math_tasks,
+        "Completion Date": dates,
+        "Practice Status": statuses[rng.integers(0, len(statuses), n_rows)],
+        "Success/Progress Rate": rates(),
+        "Practice Task (English)": tasks[rng.integers(0, len(tasks), n_rows)],
+        "Completion Date (English)": dates + pd.Timedelta(days=1),
+        "Practice Status (English)": statuses[rng.integers(0, len(statuses), n_rows)],
+        "Success/Progress Rate (English)": rates(),
+    })
+
+def legacy_parse_rate(rate_value):
+    """Row-wise rate parser used by the original upload_file loop."""
+    if pd.isna(rate_value) or rate_value == "Not Started":
+        return 0
+    if isinstance(rate_value, (int, float)):
+        return float(rate_value)
+    if isinstance(rate_value, str):
+        rate_str = rate_value.replace("%", "").strip()
+        try:
+            return float(rate_str)
+        except ValueError:
+            return 0
+    return 0
+
+def legacy_transform(df):
+    """The original iterrows() transform from upload_file, kept for comparison."""
+    transformed_data = []
+    diagnostic_cols = [col for col in df.columns if 'Diagnostic' in str(col) and 'Accuracy' in str(col)]
+    task_columns = {
+        "Math": ["Practice Task", "Completion Date", "Practice Status", "Success/Progress Rate"],
+        "English": ["Practice Task (English)", "Completion Date (English)",
+                    "Practice Status (English)", "Success/Progress Rate (English)"],
+    }
+    for idx, row in df.iterrows():
+        student_data = {
+            "Name": row.get("Name", ""),
+            "Surname": row.get("Surname", ""),
+            "Phone": row.get("Phone Number", ""),
+            "Grade": row.get("Grade", ""),
+            "Parent_Number": row.get("Parent Number", ""),
+            "School": row.get("School", ""),
+            "Registration_Date": row.get("Registration Date")
+        }
+        diagnostics = {}
+        for col in diagnostic_cols:
+            if pd.notna(row.get(col)):
+                diag_value = row.get(col)
+                if isinstance(diag_value, (int, float)) or (isinstance(diag_value, str) and diag_value.strip()):
+                    diagnostics[str(col).replace(" - Accuracy", "").strip()] = diag_value
+        for subject, (task_col, date_col, status_col, rate_col) in task_columns.items():
+            if not all(col in df.columns for col in task_columns[subject]):
+                continue
+            if pd.isna(row.get(task_col)) or row.get(task_col) == "Not Started":
+                continue
+            transformed_data.append({
+                **student_data,
+                "Subject": subject,
+                "Task": row.get(task_col, ""),
+                "Completion_Date": row.get(date_col),
+                "Status": row.get(status_col, ""),
+                "Success_Rate": legacy_parse_rate(row.get(rate_col)),
+                "Diagnostics": diagnostics
+            })
+    out = pd.DataFrame(transformed_data)
+    out["Success_Rate"] = out["Success_Rate"].astype(float)
+    out["Completion_Date"] = pd.to_datetime(out["Completion_Date"], errors='coerce')
+    out["Full_Name"] = out["Name"] + " " + out["Surname"]
+    return out
+
+def time_call(func, *args, repeat=3):
+    """Return the best wall-clock time in seconds and the last result."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark upload ingestion.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='Spreadsheet sizes to benchmark (default: 1000 10000 50000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timing repetitions per size, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_rows in args.rows:
+        wide = make_wide_frame(n_rows)
+        legacy_time, expected = time_call(legacy_transform, wide, repeat=1)
+        new_time, actual = time_call(transform_wide_to_long, wide, repeat=args.repeat)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        print(f"{n_rows:>8} {legacy_time:>12.3f} {new_time:>15.3f} {legacy_time / new_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Benchmark for persisting the /analyze summaries.
+Compares the legacy per-value convert_to_serializable loop plus json.dump
+with the column-wise conversion and chunked writer, and checks that both
+write the same file.
+
+    python benchmarks/bench_serialization.py --students 1000 10000 100000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_analysis import make_tasks_frame
+from modules.data_processing.analysis import SUMMARY_COLUMNS, STREAK_COLUMNS, summarize_students
+from modules.utils.serialization import convert_to_serializable, records_to_serializable, write_json_records
+
+def legacy_persist(student_summaries, path):
+    """The original per-value cleaning loop and json.dump, kept for comparison."""
+    clean_summaries = []
+    for student in student_summaries:
+        clean_student = {}
+        for key, value in student.items():
+            clean_student[key] = convert_to_serializable(value)
+        clean_summaries.append(clean_student)
+    with open(path, 'w') as f:
+        json.dump(clean_summaries, f)
+
+def columnar_persist(student_summaries, path):
+    write_json_records(records_to_serializable(student_summaries), path)
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark summary persistence.')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Class sizes to benchmark (default: 1000 10000 100000)')
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp()
+    legacy_path = os.path.join(out_dir, 'legacy.json')
+    new_path = os.path.join(out_dir, 'columnar.json')
+
+    print(f"{'students':>9} {'legacy (s)':>11} {'columnar (s)':>13} {'speedup':>9}")
+    for n_students in args.students:
+        stats = summarize_students(make_tasks_frame(n_students))
+        summaries = stats.reset_index()[SUMMARY_COLUMNS + STREAK_COLUMNS].to_dict('records')
+        legacy_time = time_call(legacy_persist, summaries, legacy_path)
+        new_time = time_call(columnar_persist, summaries, new_path)
+        with open(legacy_path) as f_legacy, open(new_path) as f_new:
+            assert json.load(f_legacy) == json.load(f_new)
+        print(f"{n_students:>9} {legacy_time:>11.3f} {new_time:>13.3f} {legacy_time / new_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark for multi-sheet .xlsx uploads.
+Writes workbooks with one sheet per grade at increasing sizes and times
+iter_upload_tasks() parsing the sheets one after another in-process and
+on process pools of each size. The speed-up columns are in-process time
+over pool time; the pool pays off once they pass 1x, which happens from
+the size where the work moved off the request thread outweighs handing
+every sheet to a worker (reopening the workbook there and shipping its
+rows back). The app only uses the pool from SHEET_POOL_MIN_ROWS rows.
+Workers are started before timing, as the app's shared pool is.
+
+    python benchmarks/bench_sheets.py --sheets 4 --rows 300 3000 10000 --workers 2 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_ingest import make_wide_frame
+from modules.data_processing.file_processor import SHEET_POOL_MIN_ROWS, iter_upload_tasks
+
+def write_workbook(path, n_sheets, rows_per_sheet):
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for grade in range(n_sheets):
+            sheet = make_wide_frame(rows_per_sheet)
+            sheet['Name'] = sheet['Name'] + f'_{grade}'
+            sheet.to_excel(writer, sheet_name=f'Grade {grade + 1}', index=False)
+
+def warm_up(pool, workers):
+    # Start every worker (and its imports) before timing
+    list(pool.map(time.sleep, [0.2] * workers))
+
+def time_upload(path, **options):
+    """Seconds to read every task row of ``path``, and how many there were."""
+    start = time.perf_counter()
+    n_tasks = sum(len(part) for part in iter_upload_tasks(path, 'upload.xlsx', **options))
+    return time.perf_counter() - start, n_tasks
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel multi-sheet ingestion.')
+    parser.add_argument('--sheets', type=int, default=4, help='Worksheets in the workbook (default: 4)')
+    parser.add_argument('--rows', type=int, nargs='+', default=[300, 3000, 10000],
+                        help='Rows per worksheet to benchmark (default: 300 3000 10000)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4],
+                        help='Process pool sizes to benchmark (default: 2 4)')
+    args = parser.parse_args()
+
+    print(f"{args.sheets} sheets, {os.cpu_count()} CPUs, pool used from {SHEET_POOL_MIN_ROWS} rows")
+    context = multiprocessing.get_context('spawn')
+    pools = {workers: ProcessPoolExecutor(max_workers=workers, mp_context=context) for workers in args.workers}
+    try:
+        for pool, workers in zip(pools.values(), pools):
+            warm_up(pool, workers)
+
+        header = ''.join(f" {f'{workers} workers':>11} {'speed-up':>9}" for workers in pools)
+        print(f"{'rows':>8} {'in-process':>11}{header}  (s)")
+        for rows_per_sheet in args.rows:
+            path = os.path.join(tempfile.mkdtemp(), 'upload.xlsx')
+            write_workbook(path, args.sheets, rows_per_sheet)
+            serial, n_tasks = time_upload(path, pool_min_rows=float('inf'))
+            line = f"{args.sheets * rows_per_sheet:>8} {serial:>11.2f}"
+            for pool in pools.values():
+                elapsed, pool_tasks = time_upload(path, pool=pool, pool_min_rows=0)
+                assert pool_tasks == n_tasks
+                line += f" {elapsed:>11.2f} {serial / elapsed:>8.2f}x"
+            print(line)
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+
+if __name__ == "__main__":
+    main()
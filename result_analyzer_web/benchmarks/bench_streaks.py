@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Benchmark for Days_Worked and streaks over a date window.
+Compares the run-length kernel on (student, day) pairs (streak_stats())
+with the word-at-a-time scan of day bitsets (bitset_streaks()) that the
+activity grids store. Both must produce the same StreakStats.
+
+    python benchmarks/bench_streaks.py --students 1000 10000 100000 --days 365
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_processing.streaks import bitset_streaks, day_bitsets, streak_stats, window_words
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streak computation.')
+    parser.add_argument('--students', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Class sizes to benchmark (default: 1000 10000 100000)')
+    parser.add_argument('--days', type=int, default=365,
+                        help='Days in the dataset (default: 365)')
+    parser.add_argument('--active', type=float, default=0.4,
+                        help='Chance that a student works on a given day (default: 0.4)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lo, hi = args.days // 4, args.days
+    print(f"{'students':>9} {'active days':>12} {'pairs (ms)':>11} {'bitset (ms)':>12} {'speed-up':>9}")
+    for n_students in args.students:
+        codes, days = np.nonzero(rng.random((n_students, args.days)) < args.active)
+        words = day_bitsets(codes, days, n_students, args.days)
+
+        start = time.perf_counter()
+        window = (days >= lo) & (days < hi)
+        expected = streak_stats(codes[window], days[window], n_students)
+        pairs_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = bitset_streaks(*window_words(words, lo, hi))
+        bitset_time = time.perf_counter() - start
+
+        for field in expected._fields:
+            assert np.array_equal(getattr(actual, field).astype(str), getattr(expected, field).astype(str)), field
+        print(f"{n_students:>9} {window.sum():>12} {pairs_time * 1000:>11.1f} {bitset_time * 1000:>12.1f} "
+              f"{pairs_time / bitset_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
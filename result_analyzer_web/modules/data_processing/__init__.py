@@ -0,0 +1 @@
+"""Data processing modules."""
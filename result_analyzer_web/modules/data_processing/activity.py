@@ -0,0 +1,387 @@
+"""Precomputed per-student daily activity for date-range queries.
+
+Completed (``Done``) tasks are binned once by student and day over the
+dataset's date span: in one grid for all subjects, then one per subject.
+Only the (grid, student, day) cells that hold tasks are stored, sorted by
+grid, student and day, with running sums of the task count and the
+success-rate sum; the totals of any [start, end] window are then two
+binary searches per student, and the grids take memory in proportion to
+the active days rather than to students x days. A day bitset per student
+and grid (one bit per day with a Done task) gives Days_Worked and the
+streaks of any window a 64-day word at a time (see
+``streaks.bitset_streaks``). Student codes are positions in the student
+table.
+
+The Done rows are also kept grouped by student with their day and subject,
+so the detail-page index of a window is one mask over them rather than a
+scan of the task table.
+
+The grids are written beside the task table at upload time, stamped with
+the task table's file version so they are never used with another
+revision. Rows merged in by an appended upload are added to the stored
+grids rather than rebuilding them from the whole table. Datasets whose day bitsets would exceed ``MAX_CELLS`` bits, or
+whose completion dates carry a time of day, get none and are analyzed by
+scanning the task table.
+"""
+
+import os
+import uuid
+import logging
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from modules.data_processing.analysis import SUMMARY_COLUMNS, STREAK_COLUMNS, StudentAggregates, _format_days
+from modules.data_processing.storage import (
+    build_student_table, file_version, load_students, load_tasks, processed_data_path
+)
+from modules.data_processing.streaks import WORD_BITS, bitset_streaks, to_day_ordinals, window_words
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_FILE = 'activity.npz'
+
+# Task table columns the grids are built from
+ACTIVITY_COLUMNS = ['Full_Name', 'Subject', 'Status', 'Completion_Date', 'Success_Rate']
+
+# Largest day bitsets (grids x students x days bits, 125 MiB) kept in memory
+MAX_CELLS = 1_000_000_000
+
+# subjects: names of grids 1..n (grid 0 covers all subjects)
+# first_day: day ordinal of day column 0; n_days: days spanned
+# cell_keys: (grid * students + student) * n_days + day of each active cell, ascending
+# cell_tasks, cell_rates: running sums of the task count and success-rate sum
+#   over the cells, with a leading 0 (cells [a, b) total cell_tasks[b] - cell_tasks[a])
+# day_bits: day bitsets, shape (grids, students, words)
+# min_rate: lowest success rate in the grids (filters at or below it drop nothing)
+# by_name: student codes in Full_Name order
+# order: positions of the Done rows sorted by student, then position
+# row_students, row_days, row_subjects: student code, day column (0-based)
+#   and grid index (1..n) of each entry of ``order``
+DailyActivity = namedtuple("DailyActivity", [
+    "subjects", "first_day", "n_days", "cell_keys", "cell_tasks", "cell_rates", "day_bits", "min_rate",
+    "by_name", "order", "row_students", "row_days", "row_subjects"
+])
+
+def _student_codes(names, student_index):
+    """Map a Full_Name column to positions in ``student_index`` (-1 if absent)."""
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        lookup = np.append(student_index.get_indexer(names.cat.categories), -1)
+        return lookup[names.cat.codes.to_numpy()]
+    return student_index.get_indexer(names.to_numpy())
+
+def _cell_words(cell_keys, n_days):
+    """Flat day-bitset word index and bit of each cell key."""
+    student_rows, day_offsets = np.divmod(cell_keys, n_days)
+    word_keys = student_rows * -(-n_days // WORD_BITS) + day_offsets // WORD_BITS
+    return word_keys, np.left_shift(np.uint64(1), (day_offsets % WORD_BITS).astype(np.uint64))
+
+def _cell_bits(cell_keys, n_grids, n_students, n_days):
+    """Day bitsets, shape (grids, students, words), with one bit per active cell."""
+    n_words = -(-n_days // WORD_BITS)
+    day_bits = np.zeros(n_grids * n_students * n_words, dtype=np.uint64)
+    if len(cell_keys):
+        # Keys ascend, so each word's bits are adjacent
+        word_keys, bits = _cell_words(cell_keys, n_days)
+        starts = np.flatnonzero(np.r_[True, word_keys[1:] != word_keys[:-1]])
+        day_bits[word_keys[starts]] = np.bitwise_or.reduceat(bits, starts)
+    return day_bits.reshape(n_grids, n_students, n_words)
+
+def _fits(n_grids, n_students, n_days, max_cells):
+    """Whether day bitsets of this shape stay within ``max_cells`` bits; warns if not."""
+    if n_grids * n_students * -(-n_days // WORD_BITS) * WORD_BITS <= max_cells:
+        return True
+    logger.warning(f"Activity grids skipped: {n_grids} grids x {n_students} students x {n_days} days "
+                   f"exceed {max_cells} cells; date windows will scan the task table")
+    return False
+
+def build_activity(df, student_index, max_cells=MAX_CELLS):
+    """Build the ``DailyActivity`` of a task table, or None when no grid fits.
+
+    ``student_index`` is the student table's index; its positions become
+    the student codes.
+    """
+    dates = pd.to_datetime(df["Completion_Date"])
+    rates = df["Success_Rate"].to_numpy(dtype=np.float64)
+    codes = _student_codes(df["Full_Name"], student_index)
+    done = ((df["Status"] == "Done").to_numpy() & dates.notna().to_numpy()
+            & ~np.isnan(rates) & (codes >= 0))
+
+    # Day windows could not reproduce time-of-day cut-offs
+    if (dates[done] != dates[done].dt.normalize()).any():
+        logger.info("Activity grids skipped: completion dates carry a time of day")
+        return None
+
+    positions = np.flatnonzero(done)
+    codes = codes[positions]
+    rates = rates[positions]
+    days = to_day_ordinals(dates.to_numpy()[positions])
+    subject_codes, subjects = pd.factorize(df["Subject"].astype(str).to_numpy()[positions], sort=True)
+
+    n_students = len(student_index)
+    first_day = int(days.min()) if len(days) else 0
+    n_days = int(days.max()) - first_day + 1 if len(days) else 1
+    n_grids = len(subjects) + 1
+    if not _fits(n_grids, n_students, n_days, max_cells):
+        return None
+
+    # Every row counts once in the all-subjects grid and once in its subject's grid
+    rows = (codes * n_days + (days - first_day)).astype(np.int64)
+    keys = np.concatenate([rows, (subject_codes + 1).astype(np.int64) * n_students * n_days + rows])
+    cell_keys, cells = np.unique(keys, return_inverse=True)
+    counts = np.bincount(cells, minlength=len(cell_keys))
+    sums = np.bincount(cells, weights=np.concatenate([rates, rates]), minlength=len(cell_keys))
+
+    order = np.lexsort((positions, codes))
+    return DailyActivity(
+        subjects=np.asarray(subjects, dtype=str),
+        first_day=first_day,
+        n_days=n_days,
+        cell_keys=cell_keys,
+        cell_tasks=np.r_[0, np.cumsum(counts)].astype(np.int64),
+        cell_rates=np.r_[0.0, np.cumsum(sums)],
+        day_bits=_cell_bits(cell_keys, n_grids, n_students, n_days),
+        min_rate=float(rates.min()) if len(rates) else 0.0,
+        by_name=np.argsort(student_index.to_numpy(dtype=object), kind='stable'),
+        order=positions[order],
+        row_students=codes[order].astype(np.int32),
+        row_days=(days - first_day)[order].astype(np.int32),
+        row_subjects=(subject_codes + 1)[order].astype(np.int16)
+    )
+
+def write_activity(user_dir, students=None):
+    """Build and store the activity grids of the processed data in ``user_dir``.
+
+    Returns the ``DailyActivity``; when no grid fits, any stale file is
+    removed and None is returned.
+    """
+    path = os.path.join(user_dir, ACTIVITY_FILE)
+    tasks_path = processed_data_path(user_dir)
+    version = file_version(tasks_path)
+    df = load_tasks(user_dir, ACTIVITY_COLUMNS)
+    if students is None:
+        students = load_students(user_dir)
+    if students is None:
+        students = build_student_table(df)
+
+    activity = build_activity(df, students.index)
+    if activity is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    _store_activity(user_dir, activity, version)
+    return activity
+
+def _store_activity(user_dir, activity, version):
+    path = os.path.join(user_dir, ACTIVITY_FILE)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, version=np.asarray(version, dtype=np.int64), **activity._asdict())
+    os.replace(tmp_path, path)
+
+def append_activity(activity, added, student_index, first_position, max_cells=MAX_CELLS):
+    """Add rows appended to the task table to the grids of the table before.
+
+    ``added`` holds the new rows, stored from position ``first_position``
+    on; ``student_index`` is the grown student table's index, where the
+    existing students keep their positions. Cells hold sums and bits, so
+    only the new rows are binned and added in; earlier rows are not read
+    again. Returns None when the new rows cannot go in the grids (see
+    ``build_activity``).
+    """
+    delta = build_activity(added, student_index, max_cells=np.inf)
+    if delta is None:
+        return None
+    n_students = len(student_index)
+    parts = [part for part in (activity, delta) if len(part.order)]
+    subjects = np.union1d(activity.subjects, delta.subjects).astype(str)
+    first_day = min((part.first_day for part in parts), default=activity.first_day)
+    n_days = max((part.first_day + part.n_days for part in parts), default=first_day + activity.n_days) - first_day
+    n_grids = len(subjects) + 1
+    if not _fits(n_grids, n_students, n_days, max_cells):
+        return None
+
+    def grids(part):
+        # Grid of each of the part's grids in the grown layout
+        return np.r_[0, np.searchsorted(subjects, part.subjects) + 1].astype(np.int64)
+
+    def cell_keys(part):
+        grid_students, days = np.divmod(part.cell_keys, part.n_days)
+        grid, students = np.divmod(grid_students, len(part.by_name))
+        return (grids(part)[grid] * n_students + students) * n_days + days + (part.first_day - first_day)
+
+    new_keys = cell_keys(delta)
+    keys, cells = np.unique(np.concatenate([cell_keys(activity), new_keys]), return_inverse=True)
+    counts = np.bincount(cells, weights=np.concatenate([np.diff(activity.cell_tasks), np.diff(delta.cell_tasks)]),
+                         minlength=len(keys))
+    sums = np.bincount(cells, weights=np.concatenate([np.diff(activity.cell_rates), np.diff(delta.cell_rates)]),
+                       minlength=len(keys))
+
+    if first_day == activity.first_day:
+        # Existing bitsets keep their words; the new rows' bits are set on top
+        day_bits = np.zeros((n_grids, n_students, -(-n_days // WORD_BITS)), dtype=np.uint64)
+        old_grids, old_students, old_words = activity.day_bits.shape
+        day_bits[grids(activity), :old_students, :old_words] = activity.day_bits
+        word_keys, bits = _cell_words(new_keys, n_days)
+        np.bitwise_or.at(day_bits.reshape(-1), word_keys, bits)
+    else:
+        # Earlier dates move every bit
+        day_bits = _cell_bits(keys, n_grids, n_students, n_days)
+
+    # New rows come after the existing ones, so a stable sort by student keeps positions ascending
+    row_students = np.concatenate([activity.row_students, delta.row_students])
+    order = np.argsort(row_students, kind='stable')
+    return DailyActivity(
+        subjects=subjects,
+        first_day=first_day,
+        n_days=n_days,
+        cell_keys=keys,
+        cell_tasks=np.r_[0, np.cumsum(np.rint(counts))].astype(np.int64),
+        cell_rates=np.r_[0.0, np.cumsum(sums)],
+        day_bits=day_bits,
+        min_rate=min((part.min_rate for part in parts), default=activity.min_rate),
+        by_name=delta.by_name,
+        order=np.concatenate([activity.order, delta.order + first_position])[order],
+        row_students=row_students[order].astype(np.int32),
+        row_days=np.concatenate([activity.row_days + (activity.first_day - first_day),
+                                 delta.row_days + (delta.first_day - first_day)])[order].astype(np.int32),
+        row_subjects=np.concatenate([grids(activity)[activity.row_subjects],
+                                     grids(delta)[delta.row_subjects]])[order].astype(np.int16)
+    )
+
+def update_activity(user_dir, activity, added):
+    """Bring the stored grids up to date after ``added`` rows were merged into ``user_dir``.
+
+    ``activity`` are the grids of the task table before the merge (None if
+    it had none). The new rows are added to them with ``append_activity``;
+    only when that cannot be done are the grids rebuilt from the whole
+    table. Returns the ``DailyActivity``, or None when no grid fits.
+    """
+    students = load_students(user_dir)
+    if activity is not None and students is not None:
+        n_rows = len(load_tasks(user_dir, ['Status']))
+        grown = append_activity(activity, added, students.index, n_rows - len(added))
+        if grown is not None:
+            _store_activity(user_dir, grown, file_version(processed_data_path(user_dir)))
+            return grown
+    return write_activity(user_dir, students)
+
+def load_activity(user_dir, version):
+    """Load the stored activity grids if they were built for task table ``version``."""
+    path = os.path.join(user_dir, ACTIVITY_FILE)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if tuple(data['version'].tolist()) != tuple(version):
+            return None
+        # Files written before the current layout are rebuilt
+        if any(name not in data.files for name in DailyActivity._fields):
+            return None
+        fields = {name: data[name] for name in DailyActivity._fields}
+    fields['first_day'] = int(fields['first_day'])
+    fields['n_days'] = int(fields['n_days'])
+    fields['min_rate'] = float(fields['min_rate'])
+    return DailyActivity(**fields)
+
+def _day_window(activity, start_date, end_date):
+    """Day columns ``[lo, hi)`` covering [start_date, end_date] within the grid."""
+    start, end = to_day_ordinals([start_date, end_date]) - activity.first_day
+    lo = int(np.clip(start, 0, activity.n_days))
+    hi = int(np.clip(end + 1, lo, activity.n_days))
+    return lo, hi
+
+def _window_cells(activity, grid, codes, lo, hi):
+    """Cell ranges ``(a, b)`` of students ``codes`` in ``grid`` for day columns [lo, hi)."""
+    base = (grid * len(activity.by_name) + codes.astype(np.int64)) * activity.n_days
+    return (np.searchsorted(activity.cell_keys, base + lo),
+            np.searchsorted(activity.cell_keys, base + hi))
+
+def window_aggregates(activity, students, start_date, end_date, min_success_rate=0, selected_subject='All'):
+    """Aggregate every student's Done tasks in [start_date, end_date] from the grids.
+
+    Gives the same ``StudentAggregates`` as scanning the task table with
+    ``filter_mask``, except that Phone, Grade and Diagnostics_Count come from
+    the student table (the student's first row) rather than the first row in
+    the window, and that an average on a rounding tie may round the other
+    way (the sums are taken in a different order).
+
+    Returns None when the filters need a scan: a success-rate threshold
+    that would drop tasks, or dates with a time of day.
+    """
+    if min_success_rate > activity.min_rate:
+        return None
+    if pd.Timestamp(start_date) != pd.Timestamp(start_date).normalize() or \
+            pd.Timestamp(end_date) != pd.Timestamp(end_date).normalize():
+        return None
+
+    if selected_subject == 'All':
+        grid, subject_grids = 0, range(1, len(activity.subjects) + 1)
+    else:
+        matches = np.flatnonzero(activity.subjects == str(selected_subject))
+        if len(matches) == 0:
+            return StudentAggregates(_empty_stats(), {})
+        grid = int(matches[0]) + 1
+        subject_grids = [grid]
+
+    lo, hi = _day_window(activity, start_date, end_date)
+    # Students with tasks in the window, in name order as summarize_students returns
+    first, last = _window_cells(activity, grid, np.arange(len(activity.by_name)), lo, hi)
+    codes = activity.by_name[last[activity.by_name] > first[activity.by_name]]
+    if len(codes) == 0:
+        return StudentAggregates(_empty_stats(), {})
+    first, last = first[codes], last[codes]
+    names = students.index.to_numpy(dtype=object)[codes]
+    student_info = students.iloc[codes]
+
+    total_tasks = activity.cell_tasks[last] - activity.cell_tasks[first]
+    rate_sums = activity.cell_rates[last] - activity.cell_rates[first]
+    stats = pd.DataFrame({
+        "Total_Tasks": total_tasks,
+        "Avg_Success": np.round(rate_sums / total_tasks, 2)
+    }, index=pd.Index(names, name="Full_Name"))
+    stats["Phone"] = student_info["Phone"].to_numpy() if "Phone" in student_info else ""
+    stats["Grade"] = student_info["Grade"].to_numpy() if "Grade" in student_info else ""
+    if "Diagnostics" in student_info:
+        stats["Diagnostics_Count"] = [len(d) if isinstance(d, dict) else 0 for d in student_info["Diagnostics"]]
+    else:
+        stats["Diagnostics_Count"] = 0
+
+    # Days_Worked and the streaks come from the window's bits of each day bitset
+    words, offset = window_words(activity.day_bits[grid, codes], lo, hi)
+    streaks = bitset_streaks(words, activity.first_day + offset)
+    stats["Days_Worked"] = streaks.active_days
+    stats["Max_Streak"] = streaks.max_streak
+    stats["Current_Streak"] = streaks.current_streak
+    stats["Streak_Start"] = _format_days(streaks.longest_start)
+    stats["Streak_End"] = _format_days(streaks.longest_end)
+
+    # Sorted, comma-separated subjects with tasks in the window
+    masks = np.zeros(len(codes), dtype=np.int64)
+    for bit, subject_grid in enumerate(subject_grids):
+        first, last = _window_cells(activity, subject_grid, codes, lo, hi)
+        masks |= (last > first).astype(np.int64) << bit
+    subject_names = [activity.subjects[g - 1] for g in subject_grids]
+    labels = {
+        mask: ", ".join(name for i, name in enumerate(subject_names) if mask >> i & 1)
+        for mask in np.unique(masks)
+    }
+    stats["Subjects"] = [labels[mask] for mask in masks]
+
+    # The Done rows in the window stay grouped by student and sorted by position
+    selected = (activity.row_days >= lo) & (activity.row_days < hi)
+    if grid:
+        selected &= activity.row_subjects == grid
+    positions = activity.order[selected]
+    row_students = activity.row_students[selected]
+    bounds = np.flatnonzero(np.r_[True, row_students[1:] != row_students[:-1], True])
+    group = np.searchsorted(row_students[bounds[:-1]], codes)
+    student_rows = {
+        name: positions[start:end]
+        for name, start, end in zip(names, bounds[group].tolist(), bounds[group + 1].tolist())
+    }
+
+    return StudentAggregates(stats[SUMMARY_COLUMNS[1:] + STREAK_COLUMNS], student_rows)
+
+def _empty_stats():
+    return pd.DataFrame(columns=SUMMARY_COLUMNS[1:] + STREAK_COLUMNS, index=pd.Index([], name="Full_Name"))
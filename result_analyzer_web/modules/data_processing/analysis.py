@@ -0,0 +1,247 @@
+"""Per-student analysis of the processed task table."""
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from modules.data_processing.storage import build_student_table
+from modules.data_processing.streaks import streak_stats, to_day_ordinals
+
+logger = logging.getLogger(__name__)
+
+# Summary fields in the order the results table and exports expect
+SUMMARY_COLUMNS = [
+    "Full_Name", "Phone", "Grade", "Days_Worked", "Total_Tasks",
+    "Diagnostics_Count", "Max_Streak", "Avg_Success", "Subjects"
+]
+
+# Extra streak details carried in the summaries (dates as YYYY-MM-DD, "" if none)
+STREAK_COLUMNS = ["Current_Streak", "Streak_Start", "Streak_End"]
+
+# Per-student aggregates over the task rows selected by a filter mask:
+# stats: summarize_students() of those rows, indexed by Full_Name (sorted)
+# rows: {Full_Name: positions of the student's selected rows in the task table}
+StudentAggregates = namedtuple("StudentAggregates", ["stats", "rows"])
+
+def _format_days(days):
+    """Format datetime64[D] values as YYYY-MM-DD strings, NaT as ""."""
+    return np.where(np.isnat(days), "", np.datetime_as_string(days, unit='D'))
+
+def summarize_students(tasks_df):
+    """Compute per-student summary fields for every student in ``tasks_df``.
+
+    Returns a DataFrame indexed by Full_Name (sorted) with Phone and Grade
+    from each student's first task row plus Days_Worked, Total_Tasks,
+    Diagnostics_Count, Max_Streak, Avg_Success (rounded), Subjects and the
+    STREAK_COLUMNS details.
+    """
+    # Integer student codes in sorted name order; NaN names are dropped as groupby would
+    codes, student_names = pd.factorize(tasks_df["Full_Name"], sort=True)
+    tasks_df = tasks_df[codes >= 0]
+    codes = codes[codes >= 0]
+    if len(codes) == 0:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS[1:] + STREAK_COLUMNS, index=pd.Index([], name="Full_Name"))
+
+    # Rates are stored as float32; average them in double precision
+    grouped = tasks_df["Success_Rate"].astype(np.float64).groupby(codes, sort=True)
+    stats = pd.DataFrame({
+        "Total_Tasks": grouped.size(),
+        "Avg_Success": grouped.mean().round(2)
+    })
+
+    # First task row per student (group.iloc[0] keeps NaN, unlike first())
+    first_codes, first_positions = np.unique(codes, return_index=True)
+    first_rows = tasks_df.iloc[first_positions].set_axis(first_codes)
+    stats["Phone"] = first_rows["Phone"] if "Phone" in first_rows else ""
+    stats["Grade"] = first_rows["Grade"] if "Grade" in first_rows else ""
+    if "Diagnostics" in first_rows:
+        stats["Diagnostics_Count"] = first_rows["Diagnostics"].map(lambda d: len(d) if isinstance(d, dict) else 0)
+    else:
+        stats["Diagnostics_Count"] = 0
+
+    # Days_Worked and the streak fields come from the shared run-length kernel
+    streaks = streak_stats(codes, to_day_ordinals(tasks_df["Completion_Date"]), len(student_names))
+    stats["Days_Worked"] = streaks.active_days[stats.index]
+    stats["Max_Streak"] = streaks.max_streak[stats.index]
+    stats["Current_Streak"] = streaks.current_streak[stats.index]
+    stats["Streak_Start"] = _format_days(streaks.longest_start[stats.index])
+    stats["Streak_End"] = _format_days(streaks.longest_end[stats.index])
+
+    # Sorted, comma-separated subjects: each student's subject set becomes a
+    # bitmask over the sorted subject names, and each distinct set is joined once
+    subject_codes, subject_names = pd.factorize(tasks_df["Subject"].astype(str), sort=True)
+    subject_bits = pd.DataFrame({"Student": codes, "Bit": np.left_shift(1, subject_codes.astype(np.int64))})
+    masks = subject_bits.drop_duplicates().groupby("Student")["Bit"].sum()
+    labels = {
+        mask: ", ".join(name for i, name in enumerate(subject_names) if mask >> i & 1)
+        for mask in masks.unique()
+    }
+    stats["Subjects"] = masks.map(labels)
+
+    stats.index = pd.Index(np.asarray(student_names, dtype=object)[stats.index], name="Full_Name")
+    return stats[SUMMARY_COLUMNS[1:] + STREAK_COLUMNS]
+
+def filter_mask(df, start_date, end_date, min_success_rate=0, selected_subject='All'):
+    """Select the completed task rows in the date range, success rate and subject filters."""
+    mask = (
+        (df["Completion_Date"] >= start_date) &
+        (df["Completion_Date"] <= end_date) &
+        (df["Success_Rate"] >= min_success_rate) &
+        (df["Status"] == "Done")
+    )
+    if selected_subject != "All":
+        mask &= df["Subject"] == selected_subject
+    return mask.to_numpy()
+
+def student_aggregates(df, mask, names=None):
+    """Aggregate the rows of ``df`` selected by ``mask``, optionally only for ``names``."""
+    if names is not None:
+        mask = mask & df["Full_Name"].isin(names).to_numpy()
+    tasks_df = df[mask]
+    positions = np.flatnonzero(mask)
+
+    stats = summarize_students(tasks_df)
+    groups = tasks_df.groupby("Full_Name", observed=True, sort=False).indices
+    rows = {name: positions[groups[name]] for name in stats.index}
+    return StudentAggregates(stats, rows)
+
+def update_student_aggregates(aggregates, df, mask, names):
+    """Refresh ``aggregates`` after rows for ``names`` were appended to ``df``.
+
+    Appending leaves the positions of existing rows unchanged, so only the
+    listed students are re-aggregated; ``mask`` is the same filter applied
+    to the grown table.
+    """
+    names = set(names)
+    fresh = student_aggregates(df, mask, names)
+    kept = aggregates.stats[~aggregates.stats.index.isin(names)]
+    # Empty frames would turn every column to object in concat
+    parts = [frame for frame in (kept, fresh.stats) if len(frame)]
+    stats = pd.concat(parts).sort_index() if len(parts) > 1 else (parts[0] if parts else fresh.stats)
+    rows = {name: positions for name, positions in aggregates.rows.items() if name not in names}
+    rows.update(fresh.rows)
+    return StudentAggregates(stats, rows)
+
+def analyze_student_data(df, start_date, end_date, min_success_rate=0, min_days=0,
+                         selected_subject='All', min_tasks=0, zero_tasks_only=False, students=None,
+                         aggregates=None):
+    """Filter the task table and summarize every qualifying student.
+
+    ``students`` is the student-dimension table from ``build_student_table``
+    (built from ``df`` when not given); it supplies the zero-task students.
+    ``aggregates`` are the ``StudentAggregates`` of the same date, success
+    rate and subject filters, computed here when not given.
+
+    Returns ``(student_summaries, student_rows)`` where the second item maps
+    each listed student to the positions in ``df`` of the task rows shown on
+    their detail page (empty for zero-task students).
+    """
+    # Filter by date range, success rate, and status (and subject if needed)
+    if aggregates is None:
+        aggregates = student_aggregates(df, filter_mask(df, start_date, end_date, min_success_rate, selected_subject))
+    stats = aggregates.stats
+
+    # Store student summary data
+    student_summaries = []
+    student_rows = {}
+
+    if students is None:
+        students = build_student_table(df)
+
+    # Only include students who meet BOTH conditions
+    qualifying = stats[(stats["Days_Worked"] >= min_days) & (stats["Total_Tasks"] >= min_tasks)]
+    student_summaries = qualifying.reset_index()[SUMMARY_COLUMNS + STREAK_COLUMNS].to_dict('records')
+
+    # Store the positions of each student's rows for the detail page
+    student_rows = {name: aggregates.rows[name] for name in qualifying.index}
+
+    # Find students with zero tasks (those in the student table but not in active_students)
+    zero_task_students = students.index.difference(stats.index, sort=False)
+
+    # Process zero tasks students ONLY IF explicitly requested OR min_tasks is 0
+    # This is the key change - we will NOT include zero-task students if min_tasks > 0
+    should_include_zero_task_students = zero_tasks_only or (min_tasks == 0 and min_days == 0)
+
+    logger.info(f"Should include zero task students: {should_include_zero_task_students}, zero_tasks_only={zero_tasks_only}, min_tasks={min_tasks}, min_days={min_days}")
+
+    # If we want only zero task students, clear the current list
+    if zero_tasks_only:
+        student_summaries = []
+
+    # Add zero-task students if appropriate
+    if should_include_zero_task_students:
+        for student_info in students.loc[zero_task_students].to_dict('records'):
+            student_name = student_info["Full_Name"]
+
+            # Count diagnostic tests
+            diagnostics_count = 0
+            if isinstance(student_info.get('Diagnostics'), dict):
+                diagnostics_count = len(student_info['Diagnostics'])
+
+            # Add student with zero tasks to summaries
+            student_summaries.append({
+                "Full_Name": student_name,
+                "Phone": student_info["Phone"],
+                "Grade": student_info["Grade"],
+                "Days_Worked": 0,  # Exactly 0 days
+                "Total_Tasks": 0,  # Exactly 0 tasks
+                "Diagnostics_Count": diagnostics_count,
+                "Max_Streak": 0,
+                "Avg_Success": 0,
+                "Subjects": "",
+                "Zero_Tasks": True  # Mark as a zero-task student
+            })
+
+            # The detail view builds this student's page from the student table
+            student_rows[student_name] = np.empty(0, dtype=np.intp)
+
+    # Check if min_tasks is set and if there are students with zero tasks incorrectly included
+    if min_tasks > 0:
+        # Log for debugging
+        logger.info(f"Before filtering for min_tasks={min_tasks}: {len(student_summaries)} students")
+
+        # Filter out any students that might have slipped through with zero tasks
+        filtered_summaries = []
+        for student in student_summaries:
+            if student.get("Total_Tasks", 0) >= min_tasks:
+                filtered_summaries.append(student)
+
+        # Replace with filtered list
+        student_summaries = filtered_summaries
+        logger.info(f"After filtering: {len(student_summaries)} students")
+
+    return student_summaries, student_rows
+
+def zero_task_frame(student_info):
+    """Build the one-row frame the detail view shows for a student without tasks."""
+    empty_df = pd.DataFrame([student_info])
+
+    # Make sure it has the minimal required columns for the detail view
+    empty_df["Completion_Date"] = pd.NaT
+    empty_df["Success_Rate"] = 0
+    empty_df["Subject"] = ""
+    empty_df["Task"] = ""
+    empty_df["Status"] = ""
+    return empty_df
+
+def generate_summary_data(student_summaries):
+    """Prepare top-10 chart data for the analysis page."""
+    summary_data = None
+    if student_summaries:
+        # Sort by days worked
+        results_sorted = sorted(student_summaries, key=lambda x: x["Days_Worked"], reverse=True)
+
+        # Limit to top 10 students for readability
+        top_students = results_sorted[:10]
+
+        # Prepare data for interactive charts
+        summary_data = {
+            'names': [student["Full_Name"] for student in top_students],
+            'days_worked': [student["Days_Worked"] for student in top_students],
+            'tasks_completed': [student["Total_Tasks"] for student in top_students],
+            'max_streaks': [student["Max_Streak"] for student in top_students]
+        }
+
+    return summary_data
@@ -0,0 +1,224 @@
+"""Process-level cache of per-upload dataset handles.
+
+Routes used to re-read ``uploads/<user_id>/`` on every request. A
+``DatasetHandle`` memory-maps the user's task table once and hands out the
+same pandas frames to every request until the files change on disk. Handles
+are evicted least-recently-used first, and after ``ttl`` without access.
+
+Frames and parsed JSON returned by a handle are shared between requests,
+so callers must treat them as read-only.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from modules.data_processing.activity import ACTIVITY_COLUMNS, build_activity, load_activity
+from modules.data_processing.storage import (
+    LEGACY_FILE, build_student_table, file_version, load_diagnostics, load_students, open_table,
+    processed_data_path, table_to_frame, widen_floats
+)
+
+class DatasetHandle:
+    """Shared, lazily loaded view of one user's processed data."""
+
+    # Filter results memoized per handle, least recently used dropped first
+    max_results = 16
+
+    def __init__(self, user_dir):
+        self.user_dir = user_dir
+        self.path = processed_data_path(user_dir)
+        if self.path is None:
+            raise FileNotFoundError(f"No processed data in {user_dir}")
+        self.version = file_version(self.path)
+        self.last_access = datetime.now()
+        self._lock = threading.Lock()
+        self._table = None
+        self._diagnostics = None
+        self._frames = {}
+        self._students = None
+        self._activity = None
+        self._activity_loaded = False
+        self._json = {}
+        self._results = OrderedDict()
+        # Key of the results last written to the user's JSON files
+        self.persisted_key = None
+
+    def is_current(self):
+        """Check that the task table on disk is still the one mapped here."""
+        path = processed_data_path(self.user_dir)
+        return path == self.path and file_version(path) == self.version
+
+    @property
+    def fingerprint(self):
+        """Stable identifier of the dataset revision this handle serves."""
+        return f"{os.path.basename(self.path)}:{self.version[0]}:{self.version[1]}"
+
+    def tasks(self, columns=None):
+        """Return the task table (or a projection of it), built once per handle."""
+        key = tuple(columns) if columns is not None else None
+        with self._lock:
+            if key not in self._frames:
+                if self.path.endswith(LEGACY_FILE):
+                    df = pd.read_pickle(self.path)
+                    self._frames[key] = df[list(columns)] if columns is not None else df
+                else:
+                    if self._table is None:
+                        self._table = open_table(self.path)
+                    if self._diagnostics is None and (columns is None or 'Diagnostics' in columns):
+                        self._diagnostics = load_diagnostics(self.user_dir)
+                    self._frames[key] = table_to_frame(self._table, columns, self._diagnostics)
+            return self._frames[key]
+
+    def task_rows(self, rows):
+        """Return the task rows at positions ``rows`` as a small standalone frame.
+
+        Only those rows are converted; the rest of the mapped table is not
+        touched. Compacted columns come back in their original dtypes
+        (categoricals as objects, float32 as float64).
+        """
+        if self.path.endswith(LEGACY_FILE):
+            df = self.tasks().iloc[rows].reset_index(drop=True)
+        else:
+            with self._lock:
+                if self._table is None:
+                    self._table = open_table(self.path)
+                if self._diagnostics is None:
+                    self._diagnostics = load_diagnostics(self.user_dir)
+                table, diagnostics = self._table, self._diagnostics
+            df = table_to_frame(table.take(rows), diagnostics=diagnostics)
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
+        return widen_floats(df)
+
+    def students(self):
+        """Return the student-dimension table indexed by Full_Name.
+
+        Uploads processed before the table existed get it built from the
+        task table once per handle.
+        """
+        with self._lock:
+            students = self._students
+            diagnostics = self._diagnostics
+        if students is None:
+            students = load_students(self.user_dir, diagnostics)
+            if students is None:
+                students = build_student_table(self.tasks())
+            with self._lock:
+                self._students = students
+        return students
+
+    def activity(self):
+        """Return the ``DailyActivity`` grids of this dataset, or None if it has none.
+
+        Grids written at upload time are used when they match the mapped
+        task table; otherwise they are built from it once per handle.
+        """
+        with self._lock:
+            if self._activity_loaded:
+                return self._activity
+        activity = load_activity(self.user_dir, self.version)
+        if activity is None:
+            activity = build_activity(self.tasks(ACTIVITY_COLUMNS), self.students().index)
+        with self._lock:
+            self._activity = activity
+            self._activity_loaded = True
+        return activity
+
+    def cached_result(self, key, compute):
+        """Return the memoized result for ``key``, calling ``compute()`` on a miss.
+
+        Results live as long as the handle, so a new upload (which replaces
+        the handle) invalidates them.
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        # Compute outside the lock; compute() may read frames from this handle
+        result = compute()
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+        return result
+
+    def cached_results(self):
+        """Return the memoized ``(key, result)`` pairs, least recently used first."""
+        with self._lock:
+            return list(self._results.items())
+
+    def read_json(self, filename):
+        """Return the parsed contents of a JSON file in the user directory.
+
+        The parsed value is reused until the file's mtime or size changes.
+        """
+        path = os.path.join(self.user_dir, filename)
+        version = file_version(path)
+        with self._lock:
+            cached = self._json.get(filename)
+            if cached is None or cached[0] != version:
+                with open(path, 'r') as f:
+                    cached = (version, json.load(f))
+                self._json[filename] = cached
+            return cached[1]
+
+class DatasetCache:
+    """LRU/TTL registry of ``DatasetHandle`` objects keyed by user_id."""
+
+    def __init__(self, max_handles=32, ttl=timedelta(hours=2)):
+        self.max_handles = max_handles
+        self.ttl = ttl
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_handles=None, ttl=None):
+        """Update the eviction policy, e.g. from the Flask app config."""
+        if max_handles is not None:
+            self.max_handles = max_handles
+        if ttl is not None:
+            self.ttl = ttl
+
+    def get(self, user_id, user_dir):
+        """Return the current handle for ``user_id``, opening it if needed."""
+        now = datetime.now()
+        with self._lock:
+            self._evict_expired(now)
+            handle = self._handles.get(user_id)
+            if handle is not None and not handle.is_current():
+                del self._handles[user_id]
+                handle = None
+            if handle is None:
+                handle = DatasetHandle(user_dir)
+                self._handles[user_id] = handle
+            self._handles.move_to_end(user_id)
+            handle.last_access = now
+            while len(self._handles) > self.max_handles:
+                self._handles.popitem(last=False)
+            return handle
+
+    def peek(self, user_id):
+        """Return the open handle for ``user_id``, if any, without opening one."""
+        with self._lock:
+            return self._handles.get(user_id)
+
+    def evict(self, user_id):
+        """Drop the handle for ``user_id`` (e.g. before its files are replaced)."""
+        with self._lock:
+            self._handles.pop(user_id, None)
+
+    def _evict_expired(self, now):
+        expired = [user_id for user_id, handle in self._handles.items()
+                   if now - handle.last_access > self.ttl]
+        for user_id in expired:
+            del self._handles[user_id]
+
+# Shared by every request in this process
+dataset_cache = DatasetCache()
@@ -0,0 +1,175 @@
+"""Content-addressed cache of processed uploads.
+
+Teachers often upload the same export several times. Processed artifacts
+are therefore kept once per upload content under
+``UPLOAD_FOLDER/_datasets/<digest>/``, where the digest is a SHA-256 of
+the uploaded bytes. An identical upload is hard-linked (or copied where
+links are unsupported) into the user's directory instead of being parsed
+again.
+
+Every user directory that uses an entry holds a reference: an empty file
+``refs/<user_id>`` inside the entry, plus a ``dataset_ref`` file in the
+user directory naming the digest. Creating or removing a file is atomic,
+so reference counting needs no lock. ``sweep`` removes entries that no
+user references any more.
+
+Artifacts are only ever replaced with ``os.replace`` (never rewritten in
+place), so a hard-linked file can never change under another user.
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+
+from modules.data_processing.activity import ACTIVITY_FILE
+from modules.data_processing.storage import (
+    DIAGNOSTICS_FILE, LEGACY_FILE, LEGACY_STUDENTS_FILE, STUDENTS_FILE, TASKS_FILE
+)
+
+DATASETS_DIR = '_datasets'
+REFS_DIR = 'refs'
+SUBJECTS_FILE = 'subjects.json'
+# Written in a user directory; names the entry it references
+DATASET_REF_FILE = 'dataset_ref'
+
+# Processed files shared between users
+ARTIFACT_FILES = (TASKS_FILE, DIAGNOSTICS_FILE, STUDENTS_FILE, ACTIVITY_FILE, LEGACY_FILE, LEGACY_STUDENTS_FILE)
+
+# Bump when the processing pipeline changes, so old entries are not reused
+PROCESSING_VERSION = 3
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def upload_digest(file_path, filename):
+    """Return the cache key of an upload: SHA-256 of its bytes, type and processing version."""
+    digest = hashlib.sha256(f"v{PROCESSING_VERSION}:{os.path.splitext(filename)[1].lower()}:".encode())
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def datasets_root(upload_folder):
+    return os.path.join(upload_folder, DATASETS_DIR)
+
+def _entry_dir(upload_folder, digest):
+    return os.path.join(datasets_root(upload_folder), digest)
+
+def _link_or_copy(src, dest):
+    """Place ``src`` at ``dest`` as a hard link, or a copy if linking fails; atomic."""
+    # Renaming a link over another link to the same file is a no-op that leaves tmp behind
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        return
+    tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+    try:
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _set_reference(upload_folder, digest, user_id, user_dir):
+    """Point ``user_dir`` at entry ``digest``, releasing the entry it used before.
+
+    Returns False (and changes nothing) if the entry no longer exists.
+    """
+    refs_dir = os.path.join(_entry_dir(upload_folder, digest), REFS_DIR)
+    try:
+        open(os.path.join(refs_dir, user_id), 'w').close()
+    except FileNotFoundError:
+        return False
+
+    ref_path = os.path.join(user_dir, DATASET_REF_FILE)
+    if os.path.exists(ref_path):
+        with open(ref_path) as f:
+            previous = f.read().strip()
+        if previous != digest:
+            _remove_reference(upload_folder, previous, user_id)
+    with open(ref_path, 'w') as f:
+        f.write(digest)
+    return True
+
+def _remove_reference(upload_folder, digest, user_id):
+    user_ref = os.path.join(_entry_dir(upload_folder, digest), REFS_DIR, user_id)
+    if os.path.exists(user_ref):
+        os.remove(user_ref)
+
+def link_cached(upload_folder, digest, user_id, user_dir):
+    """Link the cached artifacts for ``digest`` into ``user_dir``.
+
+    Returns the dataset's subjects, or None if nothing is cached for it.
+    """
+    entry = _entry_dir(upload_folder, digest)
+    subjects_path = os.path.join(entry, SUBJECTS_FILE)
+    if not os.path.exists(subjects_path):
+        return None
+    with open(subjects_path) as f:
+        subjects = json.load(f)
+
+    # Reference first, so a concurrent sweep cannot remove the entry mid-link
+    if not _set_reference(upload_folder, digest, user_id, user_dir):
+        return None
+    for name in ARTIFACT_FILES:
+        src = os.path.join(entry, name)
+        dest = os.path.join(user_dir, name)
+        if os.path.exists(src):
+            _link_or_copy(src, dest)
+        elif os.path.exists(dest):
+            os.remove(dest)
+    return subjects
+
+def store(upload_folder, digest, user_id, user_dir, subjects):
+    """Add the artifacts just processed into ``user_dir`` to the cache as ``digest``."""
+    entry = _entry_dir(upload_folder, digest)
+    if os.path.exists(os.path.join(entry, SUBJECTS_FILE)) and _set_reference(upload_folder, digest, user_id, user_dir):
+        return
+
+    # Build the entry (already referenced) under a temporary name and rename it into place
+    tmp_entry = f"{entry}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(os.path.join(tmp_entry, REFS_DIR))
+    open(os.path.join(tmp_entry, REFS_DIR, user_id), 'w').close()
+    for name in ARTIFACT_FILES:
+        src = os.path.join(user_dir, name)
+        if os.path.exists(src):
+            _link_or_copy(src, os.path.join(tmp_entry, name))
+    with open(os.path.join(tmp_entry, SUBJECTS_FILE), 'w') as f:
+        json.dump(subjects, f)
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Another request cached the same upload first
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+    _set_reference(upload_folder, digest, user_id, user_dir)
+
+def release(upload_folder, user_id, user_dir):
+    """Drop the reference ``user_dir`` holds on a cache entry, if any."""
+    ref_path = os.path.join(user_dir, DATASET_REF_FILE)
+    if not os.path.exists(ref_path):
+        return
+    with open(ref_path) as f:
+        digest = f.read().strip()
+    os.remove(ref_path)
+    _remove_reference(upload_folder, digest, user_id)
+
+def reference_count(upload_folder, digest):
+    """Number of user directories referencing entry ``digest``."""
+    refs_dir = os.path.join(_entry_dir(upload_folder, digest), REFS_DIR)
+    return len(os.listdir(refs_dir)) if os.path.isdir(refs_dir) else 0
+
+def sweep(upload_folder):
+    """Remove cache entries no user references; returns how many were removed."""
+    root = datasets_root(upload_folder)
+    if not os.path.isdir(root):
+        return 0
+    removed = 0
+    for digest in os.listdir(root):
+        if digest.endswith('.tmp'):
+            continue
+        if reference_count(upload_folder, digest) == 0:
+            shutil.rmtree(os.path.join(root, digest), ignore_errors=True)
+            removed += 1
+    return removed
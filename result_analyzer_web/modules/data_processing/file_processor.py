@@ -0,0 +1,393 @@
+"""Column-oriented ingestion of uploaded student spreadsheets.
+
+``.xlsx`` and ``.csv`` uploads are streamed: openpyxl's read-only mode or
+chunked ``pd.read_csv`` yields the sheet in fixed-size batches that go
+straight through the wide-to-long transform, so the workbook object model
+(or the whole wide frame) is never held in memory. Other formats are read
+whole.
+
+Workbooks with several worksheets (e.g. one per grade) are read in full.
+Every sheet gets its own column plan, and task rows are tagged with the
+sheet they came from in a ``Sheet`` column. Large ones are parsed one sheet
+per worker process; below ``SHEET_POOL_MIN_ROWS`` rows in all, handing the
+sheets to workers costs more than it saves, so they are parsed in turn.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from modules.data_processing.schema import STUDENT_COLUMNS, build_column_plan, csv_read_hints, text_columns
+from modules.data_processing.storage import TaskTableWriter
+
+# Spreadsheet rows per batch when streaming an upload
+READ_BATCH_SIZE = 5000
+
+# Worker processes parsing the sheets of a multi-sheet workbook
+SHEET_WORKERS = os.cpu_count() or 1
+
+# Spreadsheet rows (all sheets) from which sheets are parsed on the workers;
+# see benchmarks/bench_sheets.py
+SHEET_POOL_MIN_ROWS = 5000
+
+_sheet_pool = None
+
+def read_upload(file_path, filename):
+    """Read an uploaded CSV or Excel file into a wide DataFrame."""
+    if filename.lower().endswith('.csv'):
+        return pd.read_csv(file_path)
+    return pd.read_excel(file_path, engine='openpyxl')
+
+def _convert_cell(value):
+    """Normalize an openpyxl cell value the way ``pd.read_excel`` does."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _parse_batch(header, rows, dtype=None):
+    """Type a batch of raw rows with the same parser ``pd.read_excel`` uses."""
+    return TextParser([header] + rows, header=0, dtype=dtype).read()
+
+def workbook_sheets(file_path):
+    """Return ``(name, rows)`` of each worksheet of an .xlsx file, in workbook order.
+
+    ``rows`` is the sheet's recorded dimension (header included), or None
+    when the file does not record one.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return [(worksheet.title, worksheet.max_row) for worksheet in workbook.worksheets]
+    finally:
+        workbook.close()
+
+def iter_excel_batches(file_path, batch_size=READ_BATCH_SIZE, sheet=None):
+    """Yield a worksheet of an .xlsx file as wide DataFrames of ``batch_size`` rows.
+
+    ``sheet`` names the worksheet; the first one is read when not given.
+    Cells are typed per batch exactly as ``pd.read_excel`` types the whole
+    sheet (numeric-looking text becomes numbers, blanks become NaN, etc.),
+    except that the schema's text columns stay text, as in CSV uploads.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0] if sheet is None else workbook[sheet]
+        rows = worksheet.iter_rows(values_only=True)
+        header = [_convert_cell(cell) for cell in next(rows, None) or []]
+        # Read-only sheets report their full dimension; drop blank trailing cells
+        while header and header[-1] == "":
+            header.pop()
+        if not header:
+            return
+
+        width = len(header)
+        padding = [""] * width
+        dtype = {column: str for column in text_columns(build_column_plan(header))}
+        batch = []
+        for row in rows:
+            cells = [_convert_cell(cell) for cell in row[:width]]
+            batch.append(cells + padding[len(cells):])
+            if len(batch) == batch_size:
+                yield _parse_batch(header, batch, dtype)
+                batch = []
+        if batch:
+            yield _parse_batch(header, batch, dtype)
+    finally:
+        workbook.close()
+
+def iter_csv_batches(file_path, batch_size=READ_BATCH_SIZE):
+    """Yield a CSV export as wide DataFrames of ``batch_size`` rows.
+
+    The header is read first to build the column plan, whose dtype and
+    date hints replace per-chunk type inference for the schema columns.
+    """
+    columns = pd.read_csv(file_path, nrows=0).columns
+    dtype, parse_dates = csv_read_hints(build_column_plan(columns))
+    yield from pd.read_csv(file_path, chunksize=batch_size, dtype=dtype, parse_dates=parse_dates)
+
+def iter_upload_batches(file_path, filename, batch_size=READ_BATCH_SIZE):
+    """Yield an upload as wide DataFrames, streamed when the format allows it."""
+    if filename.lower().endswith('.csv'):
+        yield from iter_csv_batches(file_path, batch_size)
+    elif filename.lower().endswith('.xlsx'):
+        yield from iter_excel_batches(file_path, batch_size)
+    else:
+        yield read_upload(file_path, filename)
+
+def parse_rates(values):
+    """Vectorized success rate parsing ("85%", 85, "Not Started", NaN -> float)."""
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.astype(float).fillna(0.0)
+
+    # Numbers pass straight through; strings lose their % sign before parsing
+    rates = pd.to_numeric(values, errors='coerce')
+    text = values.astype(str).str.replace("%", "", regex=False).str.strip()
+    rates = rates.fillna(pd.to_numeric(text, errors='coerce'))
+    return rates.fillna(0.0).astype(float)
+
+def _phone_value(value):
+    if isinstance(value, str):
+        return value
+    if value is None or pd.isna(value):
+        return ""
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+def phone_text(values):
+    """Phone numbers as strings whatever the file format typed them as
+    (501234567 and 501234567.0 -> "501234567", NaN -> "")."""
+    values = pd.Series(values)
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype(str)
+    return values.map(_phone_value).astype(object)
+
+def extract_diagnostics(df, diagnostic_cols):
+    """Build the per-row diagnostics dict from "Diagnostic ... - Accuracy" columns."""
+    if not diagnostic_cols:
+        return [{} for _ in range(len(df))]
+
+    names = [str(col).replace(" - Accuracy", "").strip() for col in diagnostic_cols]
+    values = df[diagnostic_cols].to_numpy(dtype=object)
+
+    # Keep numbers and non-blank strings only, decided once per column dtype
+    masks = []
+    for col in diagnostic_cols:
+        column = df[col]
+        if pd.api.types.is_numeric_dtype(column):
+            masks.append(column.notna().to_numpy())
+        else:
+            masks.append(column.map(
+                lambda v: (isinstance(v, (int, float, np.number)) and not pd.isna(v))
+                or (isinstance(v, str) and bool(v.strip()))
+            ).to_numpy(dtype=bool))
+    keep = np.column_stack(masks)
+
+    return [
+        {name: value for name, value, ok in zip(names, row, mask) if ok}
+        for row, mask in zip(values, keep)
+    ]
+
+def transform_wide_to_long(df, plan=None):
+    """Reshape the wide per-student export into one row per subject task.
+
+    Every subject column group in ``plan`` (detected from ``df`` when not
+    given) is sliced out in one pass and stacked with ``pd.concat``; rows
+    keep the original order (student row, then subject).
+    """
+    if plan is None:
+        plan = build_column_plan(df.columns)
+
+    n_rows = len(df)
+    student_frame = pd.DataFrame(index=df.index)
+    for target in STUDENT_COLUMNS:
+        if target == "Phone" and target in plan.student_cols:
+            # Phone cells Excel stored as numbers, or read whole with inference, become text too
+            student_frame[target] = phone_text(df[plan.student_cols[target]])
+        elif target in plan.student_cols:
+            student_frame[target] = df[plan.student_cols[target]]
+        else:
+            student_frame[target] = None if target == "Registration_Date" else ""
+
+    diagnostics = pd.Series(extract_diagnostics(df, plan.diagnostic_cols), index=df.index, dtype=object)
+
+    subject_frames = []
+    for subject, columns in plan.subjects.items():
+        tasks = df[columns["Practice Task"]]
+        # Skip if no task or "Not Started"
+        has_task = (tasks.notna() & (tasks != "Not Started")).to_numpy()
+        if not has_task.any():
+            continue
+
+        subject_frame = student_frame.loc[has_task].copy()
+        subject_frame["Subject"] = subject
+        subject_frame["Task"] = tasks.loc[has_task]
+        subject_frame["Completion_Date"] = df.loc[has_task, columns["Completion Date"]]
+        subject_frame["Status"] = df.loc[has_task, columns["Practice Status"]]
+        subject_frame["Success_Rate"] = parse_rates(df.loc[has_task, columns["Success/Progress Rate"]]).to_numpy()
+        subject_frame["Diagnostics"] = diagnostics.loc[has_task]
+        subject_frame["_row"] = np.arange(n_rows)[has_task]
+        subject_frames.append(subject_frame)
+
+    if not subject_frames:
+        return pd.DataFrame()
+
+    # Stable sort by source row keeps subject order within each student row
+    long_df = pd.concat(subject_frames, ignore_index=True)
+    long_df = long_df.sort_values("_row", kind="mergesort").drop(columns="_row").reset_index(drop=True)
+
+    long_df["Completion_Date"] = pd.to_datetime(long_df["Completion_Date"], errors='coerce')
+    long_df["Full_Name"] = long_df["Name"] + " " + long_df["Surname"]
+    return long_df
+
+def iter_task_batches(batches, plan=None, progress=None):
+    """Run ``transform_wide_to_long`` over an iterator of wide DataFrames.
+
+    Yields the non-empty long batches in order. The column plan is compiled
+    from the first batch and reused. ``progress`` is called after every
+    batch as ``progress(rows_read, rows_per_second)``.
+    """
+    start = time.perf_counter()
+    rows_read = 0
+    for batch in batches:
+        if plan is None:
+            plan = build_column_plan(batch.columns)
+        long_batch = transform_wide_to_long(batch, plan)
+        if not long_batch.empty:
+            yield long_batch
+
+        rows_read += len(batch)
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress(rows_read, rows_read / elapsed if elapsed > 0 else 0.0)
+
+def transform_batches(batches, plan=None, progress=None):
+    """Transform wide batches (see ``iter_task_batches``) into one task table."""
+    parts = list(iter_task_batches(batches, plan, progress))
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True)
+
+def sheet_pool():
+    """Return the process pool shared by multi-sheet uploads, starting it on first use.
+
+    Workers are started with forkserver (spawn where unavailable) rather
+    than forked from the threaded web server.
+    """
+    global _sheet_pool
+    if _sheet_pool is None:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        _sheet_pool = ProcessPoolExecutor(max_workers=SHEET_WORKERS, mp_context=context)
+    return _sheet_pool
+
+def shutdown_sheet_pool():
+    """Stop the shared sheet workers, if they were started."""
+    global _sheet_pool
+    if _sheet_pool is not None:
+        _sheet_pool.shutdown(wait=False, cancel_futures=True)
+        _sheet_pool = None
+
+def _tag_sheet(long_batch, sheet):
+    long_batch["Sheet"] = sheet
+    return long_batch
+
+def _transform_sheet(file_path, sheet, batch_size):
+    """Read and transform one worksheet; runs in a sheet worker.
+
+    Returns ``(task rows or None, spreadsheet rows read)``.
+    """
+    rows_read = 0
+    def count_rows(rows, rows_per_second):
+        nonlocal rows_read
+        rows_read = rows
+
+    parts = [_tag_sheet(long_batch, sheet) for long_batch in
+             iter_task_batches(iter_excel_batches(file_path, batch_size, sheet), progress=count_rows)]
+    return (pd.concat(parts, ignore_index=True) if parts else None), rows_read
+
+def _iter_sheets(file_path, sheets, progress, batch_size):
+    """Read and transform worksheets one after another in this process."""
+    start = time.perf_counter()
+    rows_before = 0
+    for sheet in sheets:
+        sheet_rows = 0
+        def count_rows(rows, rows_per_second):
+            nonlocal sheet_rows
+            sheet_rows = rows
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                progress(rows_before + rows, (rows_before + rows) / elapsed if elapsed > 0 else 0.0)
+
+        for long_batch in iter_task_batches(iter_excel_batches(file_path, batch_size, sheet), progress=count_rows):
+            yield _tag_sheet(long_batch, sheet)
+        rows_before += sheet_rows
+
+def iter_upload_tasks(file_path, filename, progress=None, batch_size=READ_BATCH_SIZE, pool=None,
+                      pool_min_rows=SHEET_POOL_MIN_ROWS):
+    """Yield the processed task rows of an upload, in workbook order.
+
+    Single sheets and other formats are streamed in batches as
+    ``iter_task_batches`` does. Rows of workbooks with more than one
+    worksheet carry their Sheet. Those with at least ``pool_min_rows``
+    rows (or no recorded size) are parsed in parallel on ``pool`` (the
+    shared ``sheet_pool()`` by default), one sheet per task, and
+    ``progress`` is called as each sheet finishes; smaller ones are parsed
+    sheet by sheet in this process.
+    """
+    sheets = workbook_sheets(file_path) if filename.lower().endswith('.xlsx') else []
+    if len(sheets) <= 1:
+        batches = iter_upload_batches(file_path, filename, batch_size)
+        yield from iter_task_batches(batches, progress=progress)
+        return
+
+    names = [name for name, _ in sheets]
+    sizes = [rows for _, rows in sheets]
+    if None not in sizes and sum(sizes) < pool_min_rows:
+        yield from _iter_sheets(file_path, names, progress, batch_size)
+        return
+
+    start = time.perf_counter()
+    futures = [(pool or sheet_pool()).submit(_transform_sheet, file_path, sheet, batch_size) for sheet in names]
+    rows_read = 0
+    try:
+        for future in futures:
+            try:
+                long_df, sheet_rows = future.result()
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for the next upload
+                if pool is None:
+                    shutdown_sheet_pool()
+                raise
+            rows_read += sheet_rows
+            if progress is not None:
+                elapsed = time.perf_counter() - start
+                progress(rows_read, rows_read / elapsed if elapsed > 0 else 0.0)
+            if long_df is not None:
+                yield long_df
+    finally:
+        for future in futures:
+            future.cancel()
+
+def process_excel_file(file_path, filename, progress=None, batch_size=READ_BATCH_SIZE):
+    """Read an upload and return the processed task table and its subjects.
+
+    Every worksheet of a workbook is read (see ``iter_upload_tasks``),
+    reporting through ``progress``. Returns ``(None, [])`` when the file
+    contains no task data.
+    """
+    parts = list(iter_upload_tasks(file_path, filename, progress, batch_size))
+    if not parts:
+        return None, []
+    df = pd.concat(parts, ignore_index=True)
+    return df, df["Subject"].unique().tolist()
+
+def ingest_upload(file_path, filename, user_dir, progress=None, batch_size=READ_BATCH_SIZE):
+    """Stream an upload into the columnar store in ``user_dir``.
+
+    Each transformed batch (or sheet) is appended to a ``TaskTableWriter``,
+    so the processed table is never assembled as one pandas frame. Returns
+    the subjects in order of appearance; when the file has no task data
+    nothing is written and the list is empty.
+    """
+    writer = TaskTableWriter(user_dir)
+    subjects = []
+    for long_batch in iter_upload_tasks(file_path, filename, progress, batch_size):
+        subjects.extend(subject for subject in long_batch["Subject"].unique() if subject not in subjects)
+        writer.append(long_batch)
+
+    if writer.rows:
+        writer.close()
+    return subjects
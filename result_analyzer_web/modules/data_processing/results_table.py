@@ -0,0 +1,116 @@
+"""Paging, sorting and search over the /analyze results table.
+
+A ``ResultsIndex`` is built once per analysis result. It keeps the
+summaries' sort columns and a lower-cased search text per student (name,
+grade and subjects). Sort orders and search matches are computed the first
+time they are asked for and reused, so each page request only slices
+positions and serializes the rows shown.
+"""
+
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Table columns that can be sorted on, by their ``data-sort`` name
+SORT_COLUMNS = {
+    'name': 'Full_Name',
+    'grade': 'Grade',
+    'days': 'Days_Worked',
+    'tasks': 'Total_Tasks',
+    'diag': 'Diagnostics_Count',
+    'streak': 'Max_Streak',
+    'success': 'Avg_Success'
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Summary fields sent for each row of a page
+ROW_FIELDS = [
+    'Full_Name', 'Grade', 'Days_Worked', 'Total_Tasks', 'Diagnostics_Count',
+    'Max_Streak', 'Avg_Success', 'Subjects', 'Zero_Tasks'
+]
+
+# rows: summaries of the page; total: students in the result; matched:
+# students matching the search; page is 1-based and clamped to 1..pages
+ResultsPage = namedtuple("ResultsPage", ["rows", "total", "matched", "page", "per_page", "pages"])
+
+def _sort_key(series):
+    """Series to sort by: numbers as numbers, text case-insensitively."""
+    numeric = pd.to_numeric(series, errors='coerce')
+    if numeric.notna().sum() == series.notna().sum():
+        return numeric
+    return series.fillna('').astype(str).str.casefold()
+
+class ResultsIndex:
+    """Sort orders and search text over the student summaries of one analysis."""
+
+    # Search matches kept per index, least recently used dropped first
+    max_queries = 32
+
+    def __init__(self, summaries):
+        self.summaries = summaries
+        frame = pd.DataFrame.from_records(summaries, columns=ROW_FIELDS)
+        zero_tasks = frame['Zero_Tasks'].eq(True).to_numpy()
+        self._keys = {sort: _sort_key(frame[column]) for sort, column in SORT_COLUMNS.items()}
+        # Zero-task students show N/A for success and sort after everyone else
+        self._keys['success'] = self._keys['success'].mask(zero_tasks)
+        self._text = (frame['Full_Name'].fillna('').astype(str) + '\n' +
+                      frame['Grade'].fillna('').astype(str) + '\n' +
+                      frame['Subjects'].fillna('').astype(str)).str.casefold()
+        self.zero_task_count = int(zero_tasks.sum())
+        self.diagnostics_count = int((pd.to_numeric(frame['Diagnostics_Count'], errors='coerce') > 0).sum())
+        self._orders = {}
+        self._matches = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def order(self, sort=None, descending=False):
+        """Row positions sorted by the ``sort`` column (analysis order if None).
+
+        Ties keep the analysis order in both directions; empty values go last.
+        """
+        if sort not in SORT_COLUMNS:
+            return np.arange(len(self.summaries))
+        key = (sort, descending)
+        with self._lock:
+            order = self._orders.get(key)
+        if order is None:
+            order = self._keys[sort].sort_values(
+                ascending=not descending, kind='stable', na_position='last').index.to_numpy()
+            with self._lock:
+                self._orders[key] = order
+        return order
+
+    def matches(self, query):
+        """Boolean mask of the rows whose name, grade or subjects contain ``query``."""
+        query = query.casefold()
+        with self._lock:
+            if query in self._matches:
+                self._matches.move_to_end(query)
+                return self._matches[query]
+        mask = self._text.str.contains(query, regex=False).to_numpy()
+        with self._lock:
+            self._matches[query] = mask
+            while len(self._matches) > self.max_queries:
+                self._matches.popitem(last=False)
+        return mask
+
+    def page(self, page=1, per_page=DEFAULT_PAGE_SIZE, sort=None, descending=False, query=''):
+        """Return one ``ResultsPage`` of the sorted, searched rows."""
+        per_page = min(max(int(per_page), 1), MAX_PAGE_SIZE)
+        order = self.order(sort, descending)
+        query = (query or '').strip()
+        if query:
+            order = order[self.matches(query)[order]]
+
+        pages = max(1, math.ceil(len(order) / per_page))
+        page = min(max(int(page), 1), pages)
+        start = (page - 1) * per_page
+        rows = [self.summaries[i] for i in order[start:start + per_page]]
+        return ResultsPage(rows, len(self.summaries), len(order), page, per_page, pages)
@@ -0,0 +1,100 @@
+"""Subject schema registry for multi-subject exports.
+
+Subject task columns come in families of four that share a suffix, e.g.
+``Practice Task (English)``, ``Completion Date (English)``,
+``Practice Status (English)`` and ``Success/Progress Rate (English)``.
+The unsuffixed family belongs to ``DEFAULT_SUBJECT``. Families are detected
+once per file and compiled into a ``ColumnPlan`` that ingestion reuses.
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+# Field key -> column prefix shared by every subject family
+TASK_FIELDS = {
+    "Practice Task": "Practice Task",
+    "Completion Date": "Completion Date",
+    "Practice Status": "Practice Status",
+    "Success/Progress Rate": "Success/Progress Rate"
+}
+
+# Subject used for the family without a "(Subject)" suffix
+DEFAULT_SUBJECT = "Math"
+
+# Processed column -> source spreadsheet column for per-student fields
+STUDENT_COLUMNS = {
+    "Name": "Name",
+    "Surname": "Surname",
+    "Phone": "Phone Number",
+    "Grade": "Grade",
+    "Parent_Number": "Parent Number",
+    "School": "School",
+    "Registration_Date": "Registration Date"
+}
+
+_FAMILY_PATTERN = re.compile(
+    r"^(?P<field>" + "|".join(re.escape(prefix) for prefix in TASK_FIELDS.values()) + r")"
+    r"(?:\s*\((?P<subject>[^()]+)\))?$"
+)
+
+# subjects: {subject: {field key: column}} for complete families, in detection order
+# diagnostic_cols: "Diagnostic ... - Accuracy" columns
+# student_cols: STUDENT_COLUMNS entries present in the file
+# incomplete: {subject: [missing field keys]} for families missing a column
+ColumnPlan = namedtuple("ColumnPlan", ["subjects", "diagnostic_cols", "student_cols", "incomplete"])
+
+def build_column_plan(columns):
+    """Detect every subject column family in ``columns`` and compile a plan.
+
+    Plans are cached per column layout and shared, so treat them as read-only.
+    """
+    return _compile_plan(tuple(columns))
+
+@lru_cache(maxsize=64)
+def _compile_plan(columns):
+    prefix_to_field = {prefix: field for field, prefix in TASK_FIELDS.items()}
+    families = {}
+    for col in columns:
+        match = _FAMILY_PATTERN.match(str(col).strip())
+        if not match:
+            continue
+        subject = (match.group("subject") or DEFAULT_SUBJECT).strip()
+        families.setdefault(subject, {})[prefix_to_field[match.group("field")]] = col
+
+    # The default subject keeps its historical first position
+    order = sorted(families, key=lambda subject: subject != DEFAULT_SUBJECT)
+    subjects = {}
+    incomplete = {}
+    for subject in order:
+        family = families[subject]
+        missing = [field for field in TASK_FIELDS if field not in family]
+        if missing:
+            incomplete[subject] = missing
+        else:
+            subjects[subject] = {field: family[field] for field in TASK_FIELDS}
+
+    diagnostic_cols = [col for col in columns if 'Diagnostic' in str(col) and 'Accuracy' in str(col)]
+    student_cols = {target: source for target, source in STUDENT_COLUMNS.items() if source in columns}
+    return ColumnPlan(subjects, diagnostic_cols, student_cols, incomplete)
+
+# Per-student fields read as text from every upload format, so e.g. phone
+# numbers keep their leading "+" or zeros instead of being inferred as numbers
+TEXT_FIELDS = ["Name", "Surname", "Phone"]
+
+def text_columns(plan):
+    """Return the source columns of the ``TEXT_FIELDS`` present in a plan."""
+    return [plan.student_cols[field] for field in TEXT_FIELDS if field in plan.student_cols]
+
+def csv_read_hints(plan):
+    """Return ``(dtype, parse_dates)`` arguments for ``pd.read_csv`` from a plan.
+
+    Name/Surname/Phone are read as strings, every subject's Practice Status
+    as a category and its Completion Date as a date.
+    """
+    dtype = {column: str for column in text_columns(plan)}
+    parse_dates = []
+    for columns in plan.subjects.values():
+        dtype[columns["Practice Status"]] = "category"
+        parse_dates.append(columns["Completion Date"])
+    return dtype, parse_dates
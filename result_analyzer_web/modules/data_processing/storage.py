@@ -0,0 +1,489 @@
+"""Columnar on-disk storage for the processed task table.
+
+The task table is compacted before it is written as Feather (Arrow IPC):
+low-cardinality text columns are dictionary-encoded (pandas categoricals
+on read) and Success_Rate is stored as float32. The per-row Diagnostics
+dicts are split into a separate table and referenced by
+``Diagnostics_Key``. Readers can ask for just the columns they need.
+
+Without pyarrow the whole frame is pickled instead, as it was before,
+with the same dtypes applied in pandas.
+
+A student-dimension table (one row per Full_Name with the profile fields
+from the student's first row) is written beside the tasks so analysis does
+not have to rescan every task row to list students.
+
+A later upload can be merged into an existing store: its tasks not stored
+yet are appended after the existing rows, whose positions stay unchanged.
+"""
+
+import os
+import json
+import uuid
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import feather
+    COLUMNAR_AVAILABLE = True
+except ImportError:
+    COLUMNAR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TASKS_FILE = 'tasks.feather'
+DIAGNOSTICS_FILE = 'diagnostics.feather'
+STUDENTS_FILE = 'students.feather'
+LEGACY_FILE = 'processed_data.pkl'
+LEGACY_STUDENTS_FILE = 'students.pkl'
+
+# Profile fields kept once per student; missing source columns become ""
+STUDENT_INFO_COLUMNS = [
+    'Name', 'Surname', 'Full_Name', 'Phone', 'Grade', 'School',
+    'Registration_Date', 'Parent_Number', 'Sheet', 'Diagnostics'
+]
+
+# Columns with few distinct values, stored dictionary-encoded
+CATEGORICAL_COLUMNS = ['Subject', 'Status', 'Full_Name', 'Sheet', 'Task', 'Grade', 'School']
+# Stored in single precision; rates carry at most a few decimals
+FLOAT32_COLUMNS = ['Success_Rate']
+
+# A task row already stored with the same values here is not appended again
+TASK_KEY_COLUMNS = ['Full_Name', 'Subject', 'Task', 'Completion_Date']
+# Uncompressed so the task table can be memory-mapped without copying
+FEATHER_COMPRESSION = 'uncompressed'
+
+def _to_native(value):
+    """JSON fallback for NumPy scalars and timestamps inside diagnostics."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return str(value)
+
+def _arrow_safe(column):
+    """Return ``column`` unchanged if Arrow can store it, else as strings.
+
+    Spreadsheet columns such as Phone or Grade often mix numbers and text,
+    which Arrow refuses to put in a single typed column.
+    """
+    if column.dtype != object:
+        return column
+    try:
+        pa.array(column, from_pandas=True)
+        return column
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        return column.where(column.isna(), column.astype(str)).astype(object)
+
+def processed_data_path(user_dir):
+    """Return the path of the processed task table in ``user_dir``, or None."""
+    for filename in (TASKS_FILE, LEGACY_FILE):
+        path = os.path.join(user_dir, filename)
+        if os.path.exists(path):
+            return path
+    return None
+
+def file_version(path):
+    """Identify a file revision by mtime and size."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def has_processed_data(user_dir):
+    """Check whether ``user_dir`` holds a processed task table."""
+    return processed_data_path(user_dir) is not None
+
+def _write_feather(data, path):
+    """Write ``data`` beside ``path`` and swap it in, so open memory maps (and
+    hard links to the old file) stay valid."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    feather.write_feather(data, tmp_path, compression=FEATHER_COMPRESSION)
+    os.replace(tmp_path, path)
+
+def _write_pickle(data, path):
+    """Pickle ``data`` beside ``path`` and swap it in (files may be shared by hard link)."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    pd.to_pickle(data, tmp_path)
+    os.replace(tmp_path, path)
+
+def _remove(user_dir, *filenames):
+    for filename in filenames:
+        path = os.path.join(user_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+def build_student_table(df):
+    """Return one row per student from their first task row, indexed by Full_Name.
+
+    Works on the processed task table, or on the stored one where
+    Diagnostics has been replaced by ``Diagnostics_Key``.
+    """
+    columns = list(STUDENT_INFO_COLUMNS)
+    if 'Diagnostics' not in df.columns and 'Diagnostics_Key' in df.columns:
+        columns[columns.index('Diagnostics')] = 'Diagnostics_Key'
+    first_rows = df[df['Full_Name'].notna()].drop_duplicates('Full_Name')
+    students = pd.DataFrame(
+        {col: first_rows[col].to_numpy() if col in first_rows.columns else "" for col in columns},
+        index=pd.Index(first_rows['Full_Name'].astype(object).to_numpy(), name='Full_Name')
+    )
+    if 'Diagnostics' in students.columns:
+        students['Diagnostics'] = students['Diagnostics'].map(lambda d: d if isinstance(d, dict) else {})
+    return students
+
+def _diagnostics_json(value):
+    """Canonical JSON text of a diagnostics dict; identical dicts share one key."""
+    return json.dumps(value if isinstance(value, dict) else {}, sort_keys=True, default=_to_native)
+
+def _unify_types(tables):
+    """Cast columns whose Arrow type differs between chunks to one common type.
+
+    Numbers widen to float64 when any chunk holds floats; any other mix
+    (e.g. numbers in one chunk and text in another) becomes strings.
+    """
+    unified = []
+    for name in tables[0].column_names:
+        types = {table.schema.field(name).type for table in tables}
+        known = [t for t in types if not pa.types.is_null(t)]
+        if len(types) == 1 or not known:
+            continue
+        if all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in known):
+            target = pa.float64() if any(pa.types.is_floating(t) for t in known) else pa.int64()
+        elif len(known) == 1:
+            target = known[0]
+        else:
+            target = pa.string()
+        unified.append((name, target))
+
+    for name, target in unified:
+        for i, table in enumerate(tables):
+            index = table.schema.get_field_index(name)
+            tables[i] = table.set_column(index, name, table.column(index).cast(target))
+    return tables
+
+def _encode_categories(table):
+    """Dictionary-encode CATEGORICAL_COLUMNS with sorted values, as ``astype('category')`` does."""
+    for col in CATEGORICAL_COLUMNS:
+        index = table.schema.get_field_index(col)
+        if index < 0:
+            continue
+        column = table.column(index)
+        if pa.types.is_dictionary(column.type) or pa.types.is_null(column.type):
+            continue
+        values = pc.unique(column).drop_null()
+        values = values.take(pc.array_sort_indices(values))
+        # Narrowest code type, as pandas picks for its categorical codes
+        index_type = next(t for t in (pa.int8(), pa.int16(), pa.int32())
+                          if len(values) < 2 ** (t.bit_width - 1))
+        codes = pc.index_in(column, value_set=values).cast(index_type)
+        encoded = pa.chunked_array([pa.DictionaryArray.from_arrays(chunk, values) for chunk in codes.chunks],
+                                   type=pa.dictionary(index_type, values.type))
+        table = table.set_column(index, col, encoded)
+    return table
+
+def _compact(table):
+    """Apply the stored dtypes: FLOAT32_COLUMNS in single precision, categories encoded."""
+    for col in FLOAT32_COLUMNS:
+        index = table.schema.get_field_index(col)
+        if index >= 0 and pa.types.is_floating(table.schema.field(index).type):
+            table = table.set_column(index, col, table.column(index).cast(pa.float32()))
+    return _encode_categories(table)
+
+def compact_frame(df):
+    """Pandas counterpart of the stored dtypes, for the pickle fallback."""
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns and pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype(np.float32)
+    return df
+
+def widen_floats(df):
+    """Return float32 columns as float64 holding the shortest decimal that
+    round-trips, so a stored 85.3 reads back as 85.3 rather than 85.30000305."""
+    for col in df.columns:
+        if df[col].dtype == np.float32:
+            df[col] = df[col].astype(str).astype(np.float64)
+    return df
+
+def _memory_report(before, after):
+    logger.info(f"Task table memory_usage(deep=True): {before / 2**20:.1f} MiB before compaction, "
+                f"{after / 2**20:.1f} MiB after")
+
+def _table_memory(table):
+    """Deep pandas memory of ``table`` as read back, converting one column at a time."""
+    return sum(int(table.column(i).to_pandas().memory_usage(index=False, deep=True)) for i in range(table.num_columns))
+
+class TaskTableWriter:
+    """Build the processed task store in ``user_dir`` from chunks of the task table.
+
+    Each appended chunk is converted to Arrow right away, so a large upload
+    never exists as one pandas frame. Diagnostics keys are assigned across
+    chunks; column types are unified and compacted on ``close()``, which
+    writes the files. Without pyarrow the chunks are pickled together.
+    """
+
+    def __init__(self, user_dir):
+        self.user_dir = user_dir
+        self.rows = 0
+        # Deep pandas memory of the appended chunks, and of the stored table on close()
+        self.memory_before = 0
+        self.memory_after = 0
+        self._chunks = []
+        self._students = []
+        self._diagnostics = {}
+
+    def append(self, df):
+        """Add a chunk of processed task rows."""
+        self.rows += len(df)
+        self.memory_before += int(df.memory_usage(deep=True).sum())
+        if not COLUMNAR_AVAILABLE:
+            self._chunks.append(df)
+            return
+
+        tasks = df.drop(columns=['Diagnostics'], errors='ignore')
+        tasks = tasks.apply(_arrow_safe)
+        for col in CATEGORICAL_COLUMNS:
+            if col in tasks.columns and isinstance(tasks[col].dtype, pd.CategoricalDtype):
+                tasks[col] = tasks[col].astype(object)
+
+        if 'Diagnostics' in df.columns:
+            diag_json = df['Diagnostics'].map(_diagnostics_json)
+            for text in pd.unique(diag_json):
+                self._diagnostics.setdefault(text, len(self._diagnostics))
+            tasks.insert(df.columns.get_loc('Diagnostics'), 'Diagnostics_Key',
+                         diag_json.map(self._diagnostics).to_numpy(dtype=np.int32))
+
+        self._students.append(build_student_table(tasks))
+        self._chunks.append(pa.Table.from_pandas(tasks, preserve_index=False))
+
+    def close(self):
+        """Write the task, diagnostics and student tables to ``user_dir``."""
+        if not COLUMNAR_AVAILABLE:
+            df = compact_frame(pd.concat(self._chunks, ignore_index=True) if self._chunks else pd.DataFrame())
+            self.memory_after = int(df.memory_usage(deep=True).sum())
+            _memory_report(self.memory_before, self.memory_after)
+            _write_pickle(df, os.path.join(self.user_dir, LEGACY_FILE))
+            _write_pickle(build_student_table(df), os.path.join(self.user_dir, LEGACY_STUDENTS_FILE))
+            _remove(self.user_dir, TASKS_FILE, DIAGNOSTICS_FILE, STUDENTS_FILE)
+            return
+
+        if self._diagnostics:
+            diagnostics = pd.DataFrame({
+                'Diagnostics_Key': np.arange(len(self._diagnostics), dtype=np.int32),
+                'Diagnostics': np.asarray(list(self._diagnostics), dtype=object)
+            })
+            _write_feather(diagnostics, os.path.join(self.user_dir, DIAGNOSTICS_FILE))
+        else:
+            # Left over from an earlier upload of this user
+            _remove(self.user_dir, DIAGNOSTICS_FILE)
+
+        # A student's first chunk holds their first row
+        students = pd.concat(self._students)
+        students = students[~students.index.duplicated()].apply(_arrow_safe)
+        students['Full_Name'] = students['Full_Name'].astype(object)
+        _write_feather(pa.Table.from_pandas(students, preserve_index=False),
+                       os.path.join(self.user_dir, STUDENTS_FILE))
+
+        table = _compact(pa.concat_tables(_unify_types(self._chunks)))
+        self.memory_after = _table_memory(table)
+        _memory_report(self.memory_before, self.memory_after)
+        _write_feather(table, os.path.join(self.user_dir, TASKS_FILE))
+        _remove(self.user_dir, LEGACY_FILE, LEGACY_STUDENTS_FILE)
+
+def save_tasks(df, user_dir):
+    """Persist the processed task table, its diagnostics and the student table to ``user_dir``."""
+    writer = TaskTableWriter(user_dir)
+    writer.append(df)
+    writer.close()
+
+def load_diagnostics(user_dir):
+    """Load the diagnostics table as ``{Diagnostics_Key: dict}``."""
+    path = os.path.join(user_dir, DIAGNOSTICS_FILE)
+    if not os.path.exists(path):
+        return {}
+    table = feather.read_table(path)
+    keys = table.column('Diagnostics_Key').to_pylist()
+    values = table.column('Diagnostics').to_pylist()
+    return {key: json.loads(value) for key, value in zip(keys, values)}
+
+def load_students(user_dir, diagnostics=None):
+    """Load the student table written by ``save_tasks``, or None if there is none.
+
+    ``diagnostics`` is the ``{Diagnostics_Key: dict}`` lookup; it is loaded
+    from ``user_dir`` when not given.
+    """
+    path = os.path.join(user_dir, LEGACY_STUDENTS_FILE)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+
+    path = os.path.join(user_dir, STUDENTS_FILE)
+    if not COLUMNAR_AVAILABLE or not os.path.exists(path):
+        return None
+    students = feather.read_table(path).to_pandas()
+    if 'Diagnostics_Key' in students.columns:
+        lookup = diagnostics if diagnostics is not None else load_diagnostics(user_dir)
+        students.insert(students.columns.get_loc('Diagnostics_Key'), 'Diagnostics',
+                        [lookup.get(key, {}) for key in students['Diagnostics_Key']])
+        students = students.drop(columns=['Diagnostics_Key'])
+    students.index = pd.Index(students['Full_Name'].to_numpy(), name='Full_Name')
+    return students
+
+def open_table(path):
+    """Memory-map a Feather task table; column data stays on disk until touched."""
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+def table_to_frame(table, columns=None, diagnostics=None):
+    """Convert a task ``table`` to pandas, projecting to ``columns``.
+
+    ``diagnostics`` is the ``{Diagnostics_Key: dict}`` lookup used to rejoin
+    the Diagnostics column when it is requested.
+    """
+    want_diagnostics = columns is None or 'Diagnostics' in columns
+    if columns is not None:
+        read_columns = [col for col in columns if col != 'Diagnostics']
+        if want_diagnostics and 'Diagnostics_Key' in table.column_names:
+            read_columns.append('Diagnostics_Key')
+        table = table.select(read_columns)
+
+    # split_blocks lets null-free numeric columns reuse the mapped buffers
+    df = table.to_pandas(split_blocks=True)
+
+    if 'Diagnostics_Key' in df.columns:
+        if want_diagnostics:
+            lookup = diagnostics or {}
+            unique_keys = pd.unique(df['Diagnostics_Key'])
+            dicts = pd.Series([lookup.get(key, {}) for key in unique_keys], index=unique_keys, dtype=object)
+            df.insert(df.columns.get_loc('Diagnostics_Key'), 'Diagnostics', df['Diagnostics_Key'].map(dicts))
+        df = df.drop(columns=['Diagnostics_Key'])
+    if columns is not None:
+        df = df[columns]
+    return df
+
+def load_tasks(user_dir, columns=None):
+    """Load the processed task table from ``user_dir``.
+
+    ``columns`` limits the read to the listed columns; asking for
+    ``Diagnostics`` joins the dicts back from the diagnostics table.
+    """
+    path = processed_data_path(user_dir)
+    if path is None:
+        raise FileNotFoundError(f"No processed data in {user_dir}")
+
+    if path.endswith(LEGACY_FILE):
+        df = pd.read_pickle(path)
+        return df[columns] if columns is not None else df
+
+    diagnostics = None
+    if columns is None or 'Diagnostics' in columns:
+        diagnostics = load_diagnostics(user_dir)
+    return table_to_frame(open_table(path), columns, diagnostics)
+
+def task_keys(df):
+    """Hash each row's TASK_KEY_COLUMNS into one uint64 for deduplication.
+
+    Task text and numbers are compared as strings, since one export may
+    store a task code as a number and the next as text.
+    """
+    keys = pd.DataFrame({
+        'Full_Name': df['Full_Name'].astype(object),
+        'Subject': df['Subject'].astype(object),
+        'Task': df['Task'].astype(str),
+        'Completion_Date': pd.to_datetime(df['Completion_Date'], errors='coerce').astype('datetime64[ns]')
+    })
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+def _decode_categories(table):
+    """Turn dictionary-encoded columns back into plain ones, so tables can be merged."""
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+    return table
+
+def _align_columns(tables):
+    """Give every table the union of their columns, in order; missing ones are null."""
+    names = []
+    for table in tables:
+        names.extend(name for name in table.column_names if name not in names)
+    return [pa.Table.from_arrays([table.column(name) if name in table.column_names else pa.nulls(table.num_rows)
+                                  for name in names], names=names)
+            for table in tables]
+
+def _diagnostics_texts(user_dir):
+    """Return the stored diagnostics as ``{Diagnostics_Key: JSON text}``."""
+    path = os.path.join(user_dir, DIAGNOSTICS_FILE)
+    if not os.path.exists(path):
+        return {}
+    table = feather.read_table(path)
+    return dict(zip(table.column('Diagnostics_Key').to_pylist(), table.column('Diagnostics').to_pylist()))
+
+def merge_tasks(user_dir, new_dir):
+    """Append the tasks stored in ``new_dir`` that ``user_dir`` does not hold yet.
+
+    Rows match on TASK_KEY_COLUMNS. Existing rows keep their positions and
+    their students keep their profile fields; new students are added to the
+    student table. Returns the appended rows as a DataFrame (empty, with
+    nothing written, if every task was already stored); in the columnar
+    store they carry ``Diagnostics_Key`` rather than ``Diagnostics``.
+    """
+    existing_path = processed_data_path(user_dir)
+    columnar = (COLUMNAR_AVAILABLE and not existing_path.endswith(LEGACY_FILE)
+                and os.path.exists(os.path.join(new_dir, TASKS_FILE)))
+    if not columnar:
+        existing = load_tasks(user_dir)
+        new = load_tasks(new_dir)
+        added = new[~np.isin(task_keys(new), task_keys(existing))].reset_index(drop=True)
+        if len(added):
+            save_tasks(pd.concat([existing, added], ignore_index=True), user_dir)
+        return added
+
+    existing = open_table(existing_path)
+    new = open_table(os.path.join(new_dir, TASKS_FILE))
+    keep = ~np.isin(task_keys(table_to_frame(new, TASK_KEY_COLUMNS)),
+                    task_keys(table_to_frame(existing, TASK_KEY_COLUMNS)))
+    added = new.filter(pa.array(keep))
+    if added.num_rows == 0:
+        return _decode_categories(added).to_pandas()
+
+    # Renumber the new rows' diagnostics into the existing diagnostics table
+    diagnostics = {text: key for key, text in _diagnostics_texts(user_dir).items()}
+    if 'Diagnostics_Key' in added.column_names:
+        remap = np.zeros(0, dtype=np.int32)
+        new_texts = _diagnostics_texts(new_dir)
+        if new_texts:
+            remap = np.zeros(max(new_texts) + 1, dtype=np.int32)
+            for key, text in new_texts.items():
+                remap[key] = diagnostics.setdefault(text, len(diagnostics))
+        index = added.schema.get_field_index('Diagnostics_Key')
+        keys = remap[added.column(index).to_numpy()]
+        added = added.set_column(index, 'Diagnostics_Key', pa.array(keys, type=pa.int32()))
+
+    tables = _unify_types(_align_columns([_decode_categories(existing), _decode_categories(added)]))
+    added_frame = tables[1].to_pandas()
+
+    if diagnostics:
+        _write_feather(pd.DataFrame({
+            'Diagnostics_Key': np.fromiter(diagnostics.values(), dtype=np.int32, count=len(diagnostics)),
+            'Diagnostics': np.asarray(list(diagnostics), dtype=object)
+        }), os.path.join(user_dir, DIAGNOSTICS_FILE))
+
+    # Students seen for the first time get their first appended row's profile
+    students_path = os.path.join(user_dir, STUDENTS_FILE)
+    if os.path.exists(students_path):
+        students = feather.read_table(students_path).to_pandas()
+        students.index = pd.Index(students['Full_Name'].to_numpy(), name='Full_Name')
+    else:
+        students = build_student_table(tables[0].to_pandas())
+    new_students = build_student_table(added_frame)
+    students = pd.concat([students, new_students[~new_students.index.isin(students.index)]])
+    students = students.apply(_arrow_safe)
+    students['Full_Name'] = students['Full_Name'].astype(object)
+    _write_feather(pa.Table.from_pandas(students, preserve_index=False), students_path)
+
+    table = _compact(pa.concat_tables(tables))
+    _write_feather(table, existing_path)
+    return added_frame
@@ -0,0 +1,230 @@
+"""Vectorized run-length streak kernels.
+
+Streaks are computed for every student in one call from two parallel
+integer arrays: a student code (0..n_students-1) and a day ordinal (days
+since 1970-01-01) per completed task. Pairs are de-duplicated and sorted,
+student boundaries and ``diff == 1`` day steps mark the runs, and
+per-student reductions pick the longest and the current run.
+
+Days can also be given as day bitsets: one row of uint64 words per
+student, bit ``i`` of word ``w`` set when day ``64 * w + i`` has a task.
+``bitset_streaks`` counts active days with a popcount and finds runs a
+word at a time, carrying the run that reaches the top bit of one word
+into the next, so its cost follows the number of words, not of tasks.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Arrays of length n_students. active_days counts distinct days. Streak dates
+# are datetime64[D], NaT when the student has no active days. current_streak
+# is the run ending on the student's last active day (see streak_stats for
+# the as_of rule).
+StreakStats = namedtuple("StreakStats", ["active_days", "max_streak", "current_streak",
+                                         "longest_start", "longest_end"])
+
+def to_day_ordinals(dates):
+    """Convert dates (datetime64 values, Timestamps or ``date`` objects) to int day ordinals."""
+    values = pd.to_datetime(pd.Series(dates)).to_numpy()
+    return values.astype('datetime64[D]').astype(np.int64)
+
+def streak_stats(student_codes, day_ordinals, n_students=None, as_of=None):
+    """Compute active days, max/current streaks and the longest streak's dates per student.
+
+    ``student_codes`` and ``day_ordinals`` may be unsorted and repeat days.
+    When ``as_of`` (a day ordinal) is given, a current streak only counts if
+    it ends on ``as_of`` or the day before; otherwise it is the student's
+    final run regardless of date. The earliest run wins ties for longest.
+    """
+    student_codes = np.asarray(student_codes, dtype=np.int64)
+    day_ordinals = np.asarray(day_ordinals, dtype=np.int64)
+    if n_students is None:
+        n_students = int(student_codes.max()) + 1 if len(student_codes) else 0
+
+    active_days = np.zeros(n_students, dtype=np.int64)
+    max_streak = np.zeros(n_students, dtype=np.int64)
+    current_streak = np.zeros(n_students, dtype=np.int64)
+    longest_start = np.full(n_students, np.datetime64('NaT'), dtype='datetime64[D]')
+    longest_end = longest_start.copy()
+    if len(student_codes) == 0:
+        return StreakStats(active_days, max_streak, current_streak, longest_start, longest_end)
+
+    # Unique (student, day) pairs sorted by student, then day
+    order = np.lexsort((day_ordinals, student_codes))
+    students = student_codes[order]
+    days = day_ordinals[order]
+    keep = np.ones(len(days), dtype=bool)
+    keep[1:] = (students[1:] != students[:-1]) | (days[1:] != days[:-1])
+    students, days = students[keep], days[keep]
+
+    # A run starts at every student boundary and at every gap other than one day
+    run_starts = np.flatnonzero(np.r_[True, (students[1:] != students[:-1]) | (np.diff(days) != 1)])
+    run_lengths = np.diff(np.r_[run_starts, len(days)])
+    run_students = students[run_starts]
+    run_first_day = days[run_starts]
+    run_last_day = run_first_day + run_lengths - 1
+
+    # Runs are grouped by student; reduce each student's slice of runs
+    student_first_run = np.flatnonzero(np.r_[True, run_students[1:] != run_students[:-1]])
+    active = run_students[student_first_run]
+    active_days[active] = np.add.reduceat(run_lengths, student_first_run)
+    max_streak[active] = np.maximum.reduceat(run_lengths, student_first_run)
+
+    # Earliest run reaching each student's maximum
+    candidates = np.flatnonzero(run_lengths == max_streak[run_students])
+    candidate_students = run_students[candidates]
+    longest = candidates[np.r_[True, candidate_students[1:] != candidate_students[:-1]]]
+    longest_start[run_students[longest]] = run_first_day[longest].astype('datetime64[D]')
+    longest_end[run_students[longest]] = run_last_day[longest].astype('datetime64[D]')
+
+    # The last run of each student is their current streak
+    last_run = np.r_[student_first_run[1:] - 1, len(run_lengths) - 1]
+    current = run_lengths[last_run]
+    if as_of is not None:
+        ends = run_last_day[last_run]
+        current = np.where((ends == as_of) | (ends == as_of - 1), current, 0)
+    current_streak[active] = current
+
+    return StreakStats(active_days, max_streak, current_streak, longest_start, longest_end)
+
+def student_streak_stats(day_ordinals, as_of=None):
+    """``StreakStats`` of one student's day ordinals, as scalars.
+
+    Same rules as ``streak_stats``; dates are NaT when there are no days.
+    """
+    stats = streak_stats(np.zeros(len(day_ordinals), dtype=np.int64), day_ordinals, 1, as_of)
+    return StreakStats(int(stats.active_days[0]), int(stats.max_streak[0]), int(stats.current_streak[0]),
+                       stats.longest_start[0], stats.longest_end[0])
+
+WORD_BITS = 64
+_ALL_BITS = np.uint64(0xFFFFFFFFFFFFFFFF)
+_ONE = np.uint64(1)
+
+# Set bits per byte, for numpy versions without bitwise_count
+_BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+def _popcount(words):
+    """Number of set bits in each uint64 word."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).astype(np.int64)
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return _BYTE_COUNTS[words.view(np.uint8).reshape(words.shape + (8,))].sum(axis=-1)
+
+def _lowest_bit(words):
+    """Index of the lowest set bit of each word, 64 for zero words."""
+    return _popcount((words & (~words + _ONE)) - _ONE)
+
+def _highest_bit(words):
+    """Index of the highest set bit of each word, -1 for zero words."""
+    smeared = words.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        smeared |= smeared >> np.uint64(shift)
+    return _popcount(smeared) - 1
+
+def pack_days(active):
+    """Pack a boolean (..., n_days) array into (..., n_words) uint64 day bitsets."""
+    active = np.asarray(active, dtype=bool)
+    n_words = -(-active.shape[-1] // WORD_BITS)
+    padded = np.zeros(active.shape[:-1] + (n_words * WORD_BITS,), dtype=bool)
+    padded[..., :active.shape[-1]] = active
+    packed = np.packbits(padded, axis=-1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8").astype(np.uint64)
+
+def day_bitsets(student_codes, day_offsets, n_students, n_days):
+    """Build day bitsets from parallel student codes and day offsets (0..n_days-1)."""
+    active = np.zeros((n_students, n_days), dtype=bool)
+    active[np.asarray(student_codes, dtype=np.int64), np.asarray(day_offsets, dtype=np.int64)] = True
+    return pack_days(active)
+
+def window_words(words, lo, hi):
+    """Restrict day bitsets to day offsets [lo, hi).
+
+    Returns the words covering the window, with days outside it cleared,
+    and the day offset of their first bit.
+    """
+    if hi <= lo:
+        return words[..., :0], lo
+    first, last = lo // WORD_BITS, -(-hi // WORD_BITS)
+    window = words[..., first:last].copy()
+    window[..., 0] &= _ALL_BITS << np.uint64(lo - first * WORD_BITS)
+    window[..., -1] &= _ALL_BITS >> np.uint64(last * WORD_BITS - hi)
+    return window, first * WORD_BITS
+
+def bitset_streaks(words, first_day=0):
+    """Compute the ``StreakStats`` of day bitsets shaped (n_students, n_words).
+
+    Bit 0 of the first word is day ordinal ``first_day``. Like
+    ``streak_stats`` without ``as_of``: the earliest run wins ties for
+    longest and the current streak is the student's final run.
+    """
+    words = np.asarray(words, dtype=np.uint64)
+    n_students, n_words = words.shape
+    active_days = _popcount(words).sum(axis=1) if n_words else np.zeros(n_students, dtype=np.int64)
+    max_streak = np.zeros(n_students, dtype=np.int64)
+    best_start = np.zeros(n_students, dtype=np.int64)
+    current_streak = np.zeros(n_students, dtype=np.int64)
+    # Run of ones reaching the top bit of the previous word
+    carry_len = np.zeros(n_students, dtype=np.int64)
+    carry_start = np.zeros(n_students, dtype=np.int64)
+
+    def keep(length, start):
+        # Runs are offered in day order, so only a strictly longer one replaces the best
+        better = length > max_streak
+        max_streak[better] = length[better]
+        best_start[better] = start[better]
+
+    for w in range(n_words):
+        word = words[:, w]
+        base = first_day + w * WORD_BITS
+        low = _lowest_bit(~word)            # ones from bit 0 up (64 if full)
+        high = 63 - _highest_bit(~word)     # ones from bit 63 down (64 if full)
+        full = low == WORD_BITS
+
+        # The current streak is the run ending on the highest set bit
+        top = _highest_bit(word)
+        nonzero = top >= 0
+        shifted = word << np.where(nonzero, 63 - top, 0).astype(np.uint64)
+        ending = 63 - _highest_bit(~shifted)
+        ending = np.where(ending == top + 1, carry_len + ending, ending)
+        current_streak[nonzero] = ending[nonzero]
+
+        # The run through bit 0 continues the carried one
+        run_len = carry_len + low
+        run_start = np.where(carry_len > 0, carry_start, base)
+        partial = ~full
+        keep(np.where(partial, run_len, 0), run_start)
+
+        # Runs touching neither end: x & (x >> 1) shortens every run by one,
+        # and the lowest bit left before the last step starts the earliest longest one
+        inner = (word & (_ALL_BITS << np.where(partial, low, 0).astype(np.uint64))
+                 & (_ALL_BITS >> np.where(partial, high, 0).astype(np.uint64)))
+        inner[full] = 0
+        length = np.zeros(n_students, dtype=np.int64)
+        start = np.zeros(n_students, dtype=np.int64)
+        step = 0
+        while inner.any():
+            step += 1
+            live = inner != 0
+            length[live] = step
+            start[live] = _lowest_bit(inner[live])
+            inner &= inner >> _ONE
+        keep(length, base + start)
+
+        carry_len = np.where(full, run_len, high)
+        carry_start = np.where(full, run_start, base + WORD_BITS - high)
+    keep(carry_len, carry_start)
+
+    longest_start = np.full(n_students, np.datetime64('NaT'), dtype='datetime64[D]')
+    longest_end = longest_start.copy()
+    found = max_streak > 0
+    longest_start[found] = best_start[found].astype('datetime64[D]')
+    longest_end[found] = (best_start[found] + max_streak[found] - 1).astype('datetime64[D]')
+    return StreakStats(active_days, max_streak, current_streak, longest_start, longest_end)
+
+def calculate_max_streak(dates):
+    """Calculate the maximum number of consecutive days in the list of dates"""
+    if len(dates) == 0:
+        return 0
+    return student_streak_stats(to_day_ordinals(dates)).max_streak
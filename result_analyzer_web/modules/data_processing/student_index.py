@@ -0,0 +1,90 @@
+"""Per-student index into the processed task table.
+
+The student detail page used to load one JSON file holding every listed
+student's full task history. Now each analysis writes a small SQLite
+database keyed on Full_Name. Each entry stores the positions, in the task
+table, of the rows listed for that student, so the detail page reads only
+that student's rows. An empty entry marks a student listed without tasks.
+
+The index records the fingerprint of the task table it points into. A
+lookup against a different revision finds nothing, so stale positions are
+never used.
+"""
+
+import os
+import uuid
+import sqlite3
+from itertools import islice
+
+import numpy as np
+
+INDEX_FILE = 'student_index.sqlite'
+
+# Row positions are stored as little-endian int32 blobs
+ROW_DTYPE = np.dtype('<i4')
+
+# Students inserted per executemany() call
+WRITE_BATCH_SIZE = 5000
+
+def index_path(user_dir):
+    """Return the path of the student index in ``user_dir``."""
+    return os.path.join(user_dir, INDEX_FILE)
+
+def write_student_index(user_dir, student_rows, fingerprint, batch_size=WRITE_BATCH_SIZE):
+    """Write ``{Full_Name: row positions}`` as the student index of ``user_dir``.
+
+    The database is built beside the old one in a single transaction and
+    swapped in, so readers never see a partial index.
+    """
+    path = index_path(user_dir)
+    # Concurrent analyses of the same user each build their own database
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            with conn:
+                conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                conn.execute("CREATE TABLE student_rows (full_name TEXT PRIMARY KEY, rows BLOB) WITHOUT ROWID")
+                conn.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+                items = iter(student_rows.items())
+                while True:
+                    batch = [(str(name), np.asarray(rows, dtype=ROW_DTYPE).tobytes())
+                             for name, rows in islice(items, batch_size)]
+                    if not batch:
+                        break
+                    conn.executemany("INSERT INTO student_rows VALUES (?, ?)", batch)
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+    finally:
+        # Left behind only if building the database failed
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def has_student_index(user_dir):
+    """Check whether ``user_dir`` holds a student index."""
+    return os.path.exists(index_path(user_dir))
+
+def read_student_rows(user_dir, name, fingerprint=None):
+    """Return the task-table row positions indexed for ``name``.
+
+    Returns None if the student is not in the index, or if ``fingerprint``
+    is given and the index was built for another task table revision.
+    """
+    path = index_path(user_dir)
+    if not os.path.exists(path):
+        return None
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        if fingerprint is not None:
+            stored = conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if stored is None or stored[0] != fingerprint:
+                return None
+        row = conn.execute("SELECT rows FROM student_rows WHERE full_name = ?", (str(name),)).fetchone()
+    finally:
+        conn.close()
+
+    if row is None:
+        return None
+    return np.frombuffer(row[0], dtype=ROW_DTYPE).astype(np.intp)
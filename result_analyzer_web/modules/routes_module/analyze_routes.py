@@ -3,10 +3,12 @@
 from flask import render_template, request, redirect, url_for, flash, session
 import os
 import pandas as pd
-import json
 
 from modules.data_processing.analysis import analyze_student_data
-from modules.utils.serialization import convert_to_serializable
+from modules.data_processing.storage import has_processed_data
+from modules.data_processing.dataset_cache import dataset_cache
+from modules.data_processing.student_index import write_student_index
+from modules.utils.serialization import records_to_serializable, write_json_records
 
 def analyze():
     """Analyze student data based on filters."""
@@ -17,30 +19,31 @@ def analyze():
     from flask import current_app
     user_id = session['user_id']
     user_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], user_id)
-    processed_file = os.path.join(user_dir, 'processed_data.pkl')
     
-    if not os.path.exists(processed_file):
+    if not has_processed_data(user_dir):
         flash('No processed data found. Please upload a file first.', 'warning')
         return redirect(url_for('index'))
     
     # Load the processed data
-    df = pd.read_pickle(processed_file)
+    handle = dataset_cache.get(user_id, user_dir)
+    df = handle.tasks()
     
     # Process filter values
     filter_values = get_filter_values(request)
     
     # Apply filters and get student summaries
-    student_summaries, student_full_data = analyze_student_data(
+    student_summaries, student_rows = analyze_student_data(
         df, 
         filter_values['start_date'],
         filter_values['end_date'],
         filter_values['min_success_rate'],
         filter_values['min_days'],
-        filter_values['subject']
+        filter_values['subject'],
+        students=handle.students()
     )
     
     # Save processed data
-    save_processed_data(user_dir, student_summaries, student_full_data)
+    save_processed_data(user_dir, student_summaries, student_rows, handle.fingerprint)
     
     # Generate summary data for charts
     summary_data = generate_summary_data(student_summaries)
@@ -103,48 +106,16 @@ def get_filter_values(request):
         'subject': selected_subject
     }
 
-def save_processed_data(user_dir, student_summaries, student_full_data):
+def save_processed_data(user_dir, student_summaries, student_rows, fingerprint):
     """Save processed student data to disk."""
-    # Convert DataFrame in student_full_data to dict for serialization
-    serializable_full_data = {name: df.to_dict('records') for name, df in student_full_data.items()}
-    
     # Save student data for later use
     summary_file = os.path.join(user_dir, 'student_summaries.json')
-    full_data_file = os.path.join(user_dir, 'student_full_data.json')
-    
-    # Convert NumPy types to native Python types before serialization
-    clean_summaries = []
-    for student in student_summaries:
-        clean_student = {}
-        for key, value in student.items():
-            clean_student[key] = convert_to_serializable(value)
-        clean_summaries.append(clean_student)
-    
-    # Process the full data similarly
-    clean_full_data = {}
-    for name, df_dict_list in serializable_full_data.items():
-        clean_records = []
-        for record in df_dict_list:
-            clean_record = {}
-            for key, value in record.items():
-                try:
-                    clean_record[key] = convert_to_serializable(value)
-                except Exception:
-                    # If there's any error, just use the original value
-                    # and convert it to a string if it's not a basic type
-                    if isinstance(value, (str, int, float, bool, type(None))):
-                        clean_record[key] = value
-                    else:
-                        clean_record[key] = str(value)
-            clean_records.append(clean_record)
-        clean_full_data[name] = clean_records
     
-    # Save as JSON files
-    with open(summary_file, 'w') as f:
-        json.dump(clean_summaries, f)
+    # Convert NumPy types to native Python types column by column and save
+    write_json_records(records_to_serializable(student_summaries), summary_file)
     
-    with open(full_data_file, 'w') as f:
-        json.dump(clean_full_data, f)
+    # Index each student's task rows for the detail page
+    write_student_index(user_dir, student_rows, fingerprint)
 
 def generate_summary_data(student_summaries):
     """Generate chart data for the top students."""
@@ -4,7 +4,6 @@ from flask import render_template, flash, redirect, url_for, session
 from urllib.parse import unquote
 import os
 import json
-import pandas as pd
 import unicodedata
 
 from modules.data_processing.student_profile import (
@@ -15,6 +14,9 @@ from modules.data_processing.student_profile import (
     get_subject_comparison_data,
     get_diagnostics_data
 )
+from modules.data_processing.analysis import zero_task_frame
+from modules.data_processing.dataset_cache import dataset_cache
+from modules.data_processing.student_index import has_student_index, read_student_rows
 from modules.charts.chart_generator import generate_progress_charts, generate_subject_comparison
 
 def student_detail(name):
@@ -32,19 +34,15 @@ def student_detail(name):
     
     # Load student summaries
     summary_file = os.path.join(user_dir, 'student_summaries.json')
-    full_data_file = os.path.join(user_dir, 'student_full_data.json')
     
-    if not os.path.exists(summary_file) or not os.path.exists(full_data_file):
+    if not os.path.exists(summary_file) or not has_student_index(user_dir):
         flash('Student data not found. Please analyze data first.', 'warning')
         return redirect(url_for('analyze'))
     
-    # Load student data
+    # Load student summaries
     with open(summary_file, 'r') as f:
         student_summaries = json.load(f)
     
-    with open(full_data_file, 'r') as f:
-        student_full_data_json = json.load(f)
-    
     # Find student in summaries
     student_summary = next((s for s in student_summaries if s["Full_Name"] == decoded_name), None)
     
@@ -63,16 +61,16 @@ def student_detail(name):
     # Get the student name as stored in the data
     actual_name = student_summary["Full_Name"]
     
-    # Convert JSON data back to DataFrame
-    if actual_name in student_full_data_json:
-        student_data = pd.DataFrame(student_full_data_json[actual_name])
-        
-        # Convert dates back to datetime
-        if "Completion_Date" in student_data.columns:
-            student_data["Completion_Date"] = pd.to_datetime(student_data["Completion_Date"])
-    else:
+    # Read only this student's rows through the student index
+    handle = dataset_cache.get(user_id, user_dir)
+    rows = read_student_rows(user_dir, actual_name, handle.fingerprint)
+    if rows is None:
         flash(f'Detailed data for student {decoded_name} not found', 'error')
         return redirect(url_for('analyze'))
+    elif len(rows) > 0:
+        student_data = handle.task_rows(rows)
+    else:
+        student_data = zero_task_frame(handle.students().loc[actual_name].to_dict())
     
     # Generate profile data and charts
     profile_info = get_student_profile_info(student_data)
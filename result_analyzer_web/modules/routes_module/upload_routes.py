@@ -8,6 +8,7 @@ import pandas as pd
 import traceback
 
 from modules.data_processing.file_processor import process_excel_file
+from modules.data_processing.storage import save_tasks
 from modules.utils.file_helpers import allowed_file
 
 def upload_file():
@@ -44,10 +45,12 @@ def upload_file():
         try:
             # Process the uploaded file
             df, subjects = process_excel_file(file_path, filename)
+            if df is None:
+                flash('No task data found in the file. Check the format.', 'error')
+                return redirect(url_for('index'))
             
-            # Save processed data to user session file
-            processed_file = os.path.join(user_dir, 'processed_data.pkl')
-            df.to_pickle(processed_file)
+            # Save processed data to the user's columnar store
+            save_tasks(df, user_dir)
             
             # Store subjects in session
             session['subjects'] = subjects
@@ -0,0 +1,191 @@
+"""Content-addressed cache of rendered chart images.
+
+A chart is stored as ``<kind>-<digest>.<format>``, where the digest is a
+SHA-256 of the chart kind, the output options and the data it is drawn
+from. Rendering is deterministic, so a chart whose data has not changed
+is served from the existing file and matplotlib is not touched;
+identical charts of different users share one file.
+
+Charts are saved as SVG, or as PNG at ``dpi`` reduced to a palette of
+``png_colors`` colors (0 keeps full color), which makes the images a
+fraction of the size with no visible change to flat-colored charts.
+
+Files are written to a temporary name and renamed into place, so a
+reader never sees a partial image. Serving a file refreshes its mtime.
+When the directory grows past ``max_bytes``, the images used least
+recently (oldest mtime) are removed until it is back under ``low_water``
+of the limit. Only files named like cache images, and other PNGs saved
+in the same directory, are counted and evicted; other static files
+(e.g. SVG icons) are left alone.
+"""
+
+import os
+import re
+import uuid
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+logger = logging.getLogger(__name__)
+
+# Bump when chart rendering changes, so images drawn the old way are not served
+CHART_CACHE_VERSION = 4
+
+# Output formats and the content type each is served with
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+# Names the cache gives its images
+CHART_FILENAME = re.compile(r'^[a-z]+-[0-9a-f]{64}\.(png|svg)$')
+
+def _feed(digest, part):
+    """Add one chart input (a frame, a series or a plain value) to ``digest``."""
+    if isinstance(part, (pd.DataFrame, pd.Series)):
+        names = list(part.columns) if isinstance(part, pd.DataFrame) else [part.name]
+        digest.update(repr((type(part).__name__, names, len(part))).encode())
+        digest.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    else:
+        digest.update(repr(part).encode())
+
+def chart_key(kind, *parts):
+    """Return the cache key of chart ``kind`` drawn from ``parts``."""
+    digest = hashlib.sha256(f"v{CHART_CACHE_VERSION}:{kind}:".encode())
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+def save_figure(fig, path, format='png', dpi=100, png_colors=256):
+    """Save ``fig`` to ``path`` through a temporary file; returns its size in bytes."""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    if format == 'png' and png_colors:
+        canvas = FigureCanvasAgg(fig)
+        fig.set_dpi(dpi)
+        canvas.draw()
+        image = Image.fromarray(np.asarray(canvas.buffer_rgba())).convert('RGB')
+        image = image.quantize(png_colors, method=Image.Quantize.FASTOCTREE)
+        image.save(tmp_path, format='png', optimize=True, dpi=(dpi, dpi))
+    else:
+        fig.savefig(tmp_path, format=format, dpi=dpi, metadata={'Date': None} if format == 'svg' else None)
+    size = os.path.getsize(tmp_path)
+    os.replace(tmp_path, path)
+    return size
+
+class ChartCache:
+    """Size-capped directory of chart images addressed by their inputs."""
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, low_water=0.8,
+                 format='png', dpi=100, png_colors=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.format = format
+        self.dpi = dpi
+        self.png_colors = png_colors
+        self._lock = threading.Lock()
+        # Bytes of images in the directory, counted on first use
+        self._bytes = None
+
+    def configure(self, directory=None, max_bytes=None, format=None, dpi=None, png_colors=None):
+        """Update the location, size limit or output options, e.g. from the Flask app config."""
+        if format is not None and format not in CHART_FORMATS:
+            raise ValueError(f"Unsupported chart format: {format}")
+        with self._lock:
+            if directory is not None and directory != self.directory:
+                self.directory = directory
+                self._bytes = None
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            if format is not None:
+                self.format = format
+            if dpi is not None:
+                self.dpi = dpi
+            if png_colors is not None:
+                self.png_colors = png_colors
+
+    def save_options(self, format=None):
+        """Keyword arguments of ``save_figure`` for ``format`` (the configured one if None)."""
+        format = format or self.format
+        if format == 'svg':
+            return {'format': format}
+        return {'format': format, 'dpi': self.dpi, 'png_colors': self.png_colors}
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def filename(self, kind, parts, format=None):
+        """Name of the ``format`` image of chart ``kind`` drawn from ``parts``."""
+        options = self.save_options(format)
+        return f"{kind}-{chart_key(kind, sorted(options.items()), *parts)}.{options['format']}"
+
+    def touch(self, filename):
+        """Mark a cached image as recently used; False if it is not cached."""
+        try:
+            os.utime(self.path(filename))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fetch(self, kind, parts, render, format=None):
+        """Return the filename of chart ``kind`` for ``parts``, rendering it on a miss.
+
+        ``render()`` returns the matplotlib Figure; it is only called when no
+        image for the same kind, inputs and output options exists.
+        """
+        filename = self.filename(kind, parts, format)
+        if not self.touch(filename):
+            os.makedirs(self.directory, exist_ok=True)
+            self.added(save_figure(render(), self.path(filename), **self.save_options(format)))
+        return filename
+
+    def _images(self):
+        """``(mtime, size, path)`` of every image in the directory."""
+        images = []
+        try:
+            entries = os.scandir(self.directory)
+        except FileNotFoundError:
+            return images
+        with entries:
+            for entry in entries:
+                if ((entry.name.endswith('.png') or CHART_FILENAME.match(entry.name))
+                        and entry.is_file()):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    images.append((stat.st_mtime, stat.st_size, entry.path))
+        return images
+
+    def added(self, size):
+        """Count a newly saved image of ``size`` bytes, evicting if over the limit."""
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(image[1] for image in self._images())
+            else:
+                self._bytes += size
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used images until under ``low_water`` of the limit."""
+        images = sorted(self._images())
+        total = sum(image[1] for image in images)
+        target = self.max_bytes * self.low_water
+        removed = 0
+        for mtime, size, path in images:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._bytes = total
+        logger.info(f"Evicted {removed} chart images; {total / 2**20:.1f} MiB left")
@@ -0,0 +1,144 @@
+"""Background rendering of cached chart images on a process pool.
+
+Pages ask for a chart with ``submit`` and get its filename straight away.
+A chart already in the ``ChartCache`` is ready; otherwise it is drawn and
+saved by a worker process, off the request thread and outside the GIL,
+while the page shows a placeholder that polls ``status`` until the image
+exists. A chart that is already being drawn is not queued twice, and
+``draw`` waits for the image when a response needs it.
+
+Workers are started with forkserver (spawn where unavailable), like the
+sheet workers of ``file_processor``. With ``max_workers=0`` charts are
+drawn in the calling thread instead.
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from functools import partial
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.utils.chart_cache import save_figure
+
+logger = logging.getLogger(__name__)
+
+# Worker processes drawing chart images
+CHART_WORKERS = os.cpu_count() or 1
+
+READY = 'ready'
+PENDING = 'pending'
+FAILED = 'failed'
+MISSING = 'missing'
+
+def _render_chart(render, args, path, options):
+    """Draw ``render(*args)`` and save it to ``path``; runs in a chart worker."""
+    return save_figure(render(*args), path, **options)
+
+class ChartRenderer:
+    """Queue of chart images being drawn into a ``ChartCache``."""
+
+    def __init__(self, cache, max_workers=CHART_WORKERS):
+        self.cache = cache
+        self.max_workers = max_workers
+        self._pool = None
+        self._pending = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None):
+        """Update the worker count, e.g. from the Flask app config."""
+        if max_workers is not None and max_workers != self.max_workers:
+            self.shutdown()
+            self.max_workers = max_workers
+
+    def submit(self, kind, parts, render, *args, format=None):
+        """Queue chart ``kind`` for ``parts``; returns ``(filename, ready)``.
+
+        ``render(*args)`` must be a module-level function returning the
+        Figure, so it can be sent to a worker; it is only called when the
+        image is neither cached nor already being drawn. ``format`` is one
+        of the cache's ``CHART_FORMATS`` (its configured one if None).
+        """
+        filename = self.cache.filename(kind, parts, format)
+        if self.cache.touch(filename):
+            return filename, True
+        if self.max_workers == 0:
+            self.cache.fetch(kind, parts, partial(render, *args), format)
+            return filename, True
+
+        os.makedirs(self.cache.directory, exist_ok=True)
+        with self._lock:
+            if filename in self._pending:
+                return filename, False
+            self._failed.discard(filename)
+            future = self._executor().submit(_render_chart, render, args, self.cache.path(filename),
+                                             self.cache.save_options(format))
+            self._pending[filename] = future
+        future.add_done_callback(partial(self._finished, filename))
+        return filename, False
+
+    def draw(self, kind, parts, render, *args, format=None):
+        """Like ``submit``, but wait until the image exists; returns its filename.
+
+        Raises RuntimeError if the chart could not be drawn.
+        """
+        filename, ready = self.submit(kind, parts, render, *args, format=format)
+        if not ready:
+            with self._lock:
+                future = self._pending.get(filename)
+            if future is not None:
+                try:
+                    future.result()
+                except Exception as e:
+                    raise RuntimeError(f"Chart {filename} could not be drawn") from e
+            if not os.path.exists(self.cache.path(filename)):
+                raise RuntimeError(f"Chart {filename} could not be drawn")
+        return filename
+
+    def status(self, filename):
+        """``READY``, ``PENDING``, ``FAILED`` or ``MISSING`` (never drawn or evicted)."""
+        with self._lock:
+            if filename in self._pending:
+                return PENDING
+            if filename in self._failed:
+                return FAILED
+        return READY if os.path.exists(self.cache.path(filename)) else MISSING
+
+    def shutdown(self):
+        """Stop the chart workers, if they were started; queued charts are dropped."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executor(self):
+        # Called with the lock held
+        if self._pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._pool
+
+    def _finished(self, filename, future):
+        try:
+            size = future.result()
+        except CancelledError:
+            size = None
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next chart
+            logger.error(f"Chart worker died while drawing {filename}")
+            self.shutdown()
+            size = None
+            with self._lock:
+                self._failed.add(filename)
+        except Exception:
+            logger.exception(f"Error drawing chart {filename}")
+            size = None
+            with self._lock:
+                self._failed.add(filename)
+        with self._lock:
+            self._pending.pop(filename, None)
+        if size is not None:
+            self.cache.added(size)
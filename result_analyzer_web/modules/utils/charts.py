@@ -0,0 +1,335 @@
+"""Matplotlib drawing of the static student and comparison charts.
+
+Each ``render_*`` function returns a Figure drawn from plain data (frames
+restricted to the columns listed here, or lists), so it can run in a
+chart worker process as well as in a request; saving the image is left
+to the caller (see ``chart_renderer``).
+
+Creating a Figure, its Axes and their styling, and fitting the layout
+cost more than drawing a small chart's data. So each chart type is a
+``ChartTemplate``: the Figure is built once per thread (one per worker
+process) and later renders only replace the data artists (lines, bars,
+labels) and rescale the axes.
+
+The margins then no longer follow each chart's exact labels. Templates
+are kept per layout signature (rounded-up label lengths and the digits
+of the largest value) and the layout is fitted once, to stand-in data
+with that signature, so a chart always comes out the same whichever
+charts the worker drew before. ``reuse=False`` builds a new Figure and
+fits it to the data, as the charts used to be drawn.
+"""
+
+import abc
+import threading
+from datetime import date
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Use non-interactive backend
+import matplotlib.dates as mdates
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
+
+from modules.utils.downsample import bin_sums, lttb_indices
+
+# Task columns each student chart is drawn from; they make up its cache key
+PROGRESS_CHART_COLUMNS = ["Completion_Date", "Success_Rate", "Subject", "Task"]
+SUBJECT_CHART_COLUMNS = ["Subject", "Success_Rate", "Completion_Date"]
+
+# Templates kept per thread, least recently used dropped first
+MAX_TEMPLATES = 16
+
+# Label lengths in layout signatures are rounded up to a multiple of this
+LABEL_STEP = 4
+
+_local = threading.local()
+
+def daily_positions(dates, values, max_points):
+    """Rows of a daily line to plot: all of them, or ``max_points`` picked by LTTB."""
+    days = np.array([day.toordinal() for day in dates])
+    return lttb_indices(days, values, max_points)
+
+def daily_totals(dates, counts, max_points):
+    """Daily counts as ``(dates, counts, days per bar)``, summed per week (or
+    whole weeks) when there are more than ``max_points`` days."""
+    days = [day.toordinal() for day in dates]
+    # Ordinal 1 is a Monday, so bins start on Mondays
+    starts, totals, width = bin_sums(days, counts, max_points, step=7, origin=1)
+    return [date.fromordinal(int(start)) for start in starts], totals, width
+
+def period_label(days):
+    """Name of a bar covering ``days`` days, for chart titles."""
+    return {1: 'Day', 7: 'Week'}.get(days, f'{days} Days')
+
+def _digits(values):
+    """Length of the largest value written out, for layout signatures."""
+    finite = [value for value in values if np.isfinite(value)]
+    return len(str(int(max(finite, default=0))))
+
+def _label_length(labels):
+    """Length of the longest label, rounded up to ``LABEL_STEP``."""
+    longest = max((len(str(label)) for label in labels), default=0)
+    return -(-longest // LABEL_STEP) * LABEL_STEP
+
+def _stand_in_label(length):
+    # Wide capitals, so real labels of the same length fit the margins
+    return 'N' * length
+
+class ChartTemplate(abc.ABC):
+    """A chart's Figure and Axes, built once and redrawn with new data."""
+
+    # Part of the figure the layout of a template is fitted into
+    layout_rect = (0, 0, 1, 1)
+
+    def __init__(self, signature=None):
+        self.fig = Figure(figsize=self.figsize)
+        self._artists = []
+        self.build()
+        if signature is not None:
+            # Fit the layout once, to stand-in data with the same signature
+            self.render(*self.stand_in(signature))
+            self.fig.tight_layout(rect=self.layout_rect)
+
+    @abc.abstractmethod
+    def build(self):
+        """Add the Axes and everything that does not depend on the data."""
+
+    @abc.abstractmethod
+    def update(self, *data):
+        """Draw ``data``; artists added to ``self._artists`` are removed on the next update."""
+
+    def stand_in(self, signature):
+        """Data the layout of charts with ``signature`` is fitted to."""
+        return ()
+
+    def render(self, *data):
+        for artist in self._artists:
+            artist.remove()
+        self._artists = []
+        self.update(*data)
+        return self.fig
+
+class EmptyProgressTemplate(ChartTemplate):
+    figsize = (10, 12)
+
+    def build(self):
+        # Create a simple plot with "No data available" message
+        ax = self.fig.add_subplot(111)
+        ax.text(0.5, 0.5, "No task data available for this student",
+                horizontalalignment='center', verticalalignment='center',
+                transform=ax.transAxes, fontsize=14)
+        ax.set_axis_off()
+
+    def update(self):
+        pass
+
+class ProgressTemplate(ChartTemplate):
+    figsize = (10, 12)
+    # Room for a date label centred on a tick at the right edge
+    layout_rect = (0, 0, 0.96, 1)
+
+    def build(self):
+        fig = self.fig
+
+        # Daily success rate chart (first subplot)
+        self.ax1 = fig.add_subplot(311)
+        self.ax1.xaxis_date()
+        self.line, = self.ax1.plot([], [], marker='o', linestyle='-', color='blue')
+        self.ax1.set_title('Daily Average Success Rate')
+        self.ax1.set_ylabel('Success Rate (%)')
+        self.ax1.set_xlabel('Date')
+        self.ax1.grid(True, linestyle='--', alpha=0.7)
+
+        # Format dates on x-axis
+        self.ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+        fig.autofmt_xdate()
+
+        # Tasks completed per day (second subplot)
+        self.ax2 = fig.add_subplot(312)
+        self.ax2.xaxis_date()
+        self.ax2.set_title('Tasks Completed Per Day')
+        self.ax2.set_ylabel('Number of Tasks')
+        self.ax2.set_xlabel('Date')
+        self.ax2.grid(True, linestyle='--', alpha=0.7, axis='y')
+        self.ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+
+        # Subject performance chart
+        self.ax3 = fig.add_subplot(313)
+        self.ax3.set_title('Average Success Rate by Subject')
+        self.ax3.set_ylabel('Success Rate (%)')
+        self.ax3.set_ylim(0, 105)  # Set y limit to accommodate annotations
+        self.ax3.grid(True, linestyle='--', alpha=0.7, axis='y')
+
+    def stand_in(self, signature):
+        label_length, digits = signature
+        dates = list(pd.date_range('2025-01-01', periods=30).date)
+        daily_data = pd.DataFrame({"Completion_Date": dates, "Success_Rate": np.linspace(0, 100, 30)})
+        task_counts = pd.DataFrame({"Completion_Date": dates, "Task_Count": np.linspace(1, 10 ** digits - 1, 30)})
+        subject_data = pd.DataFrame({"Subject": [_stand_in_label(label_length)], "Success_Rate": [100.0], "Task": [1]})
+        return daily_data, task_counts, subject_data
+
+    def update(self, daily_data, task_counts, subject_data, bar_days=1):
+        self.line.set_data(mdates.date2num(list(daily_data["Completion_Date"])), daily_data["Success_Rate"])
+        self.ax1.relim()
+        self.ax1.autoscale_view()
+
+        # Bars of several days are centred on the days they cover
+        positions = mdates.date2num(list(task_counts["Completion_Date"])) + (bar_days - 1) / 2
+        bars = self.ax2.bar(positions, task_counts["Task_Count"], width=0.8 * bar_days, color='green', alpha=0.7)
+        self._artists.append(bars)
+        self.ax2.set_title(f'Tasks Completed Per {period_label(bar_days)}')
+        self.ax2.relim()
+        self.ax2.autoscale_view()
+
+        # Bar chart for subjects, with the task count as text above bars
+        positions = np.arange(len(subject_data))
+        bars = self.ax3.bar(positions, subject_data["Success_Rate"], color='purple', alpha=0.7)
+        self._artists.append(bars)
+        for bar, count in zip(bars, subject_data["Task"]):
+            height = bar.get_height()
+            self._artists.append(self.ax3.text(bar.get_x() + bar.get_width()/2., height + 2,
+                                               f'{count} tasks', ha='center', va='bottom', rotation=0))
+        self.ax3.set_xticks(positions, subject_data["Subject"])
+        self.ax3.relim()
+        self.ax3.autoscale_view(scaley=False)
+
+        # Rotate x-axis labels for better readability
+        setp(self.ax3.get_xticklabels(), rotation=45, ha='right')
+
+class SubjectsTemplate(ChartTemplate):
+    figsize = (10, 6)
+
+    def build(self):
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_xlabel('Subject')
+        self.ax.set_ylabel('Value')
+        self.ax.set_title('Subject Comparison')
+
+    def stand_in(self, signature):
+        first_length, last_length, digits = signature
+        subjects = [_stand_in_label(first_length), _stand_in_label(last_length)]
+        return subjects, [10 ** digits - 1] * 2, [100.0] * 2, [1] * 2
+
+    def update(self, subjects, tasks, success, days):
+        x = np.arange(len(subjects))
+        width = 0.25
+
+        # Plot bars, in the colors a new Axes would give them
+        self._artists.append(self.ax.bar(x - width, tasks, width, label='Tasks Completed', color='C0'))
+        self._artists.append(self.ax.bar(x, success, width, label='Avg Success Rate (%)', color='C1'))
+        self._artists.append(self.ax.bar(x + width, days, width, label='Days Worked', color='C2'))
+        self.ax.set_xticks(x, subjects)
+        self.ax.legend()
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+class ComparisonTemplate(ChartTemplate):
+    figsize = (10, 6)
+
+    def build(self):
+        self.ax = self.fig.add_subplot(111)
+        self.ax.invert_yaxis()  # Labels read top-to-bottom
+
+    def stand_in(self, signature):
+        comparison_type, label, name_length, digits = signature
+        return [_stand_in_label(name_length)], [float(10 ** digits - 1)], comparison_type, label
+
+    def update(self, names, values, comparison_type, label):
+        # Create horizontal bar chart
+        y_pos = np.arange(len(names))
+        self._artists.append(self.ax.barh(y_pos, values, align='center', color='C0'))
+        self.ax.set_yticks(y_pos, names)
+        self.ax.set_xlabel(label)
+        self.ax.set_title(f'{comparison_type} Comparison')
+
+        # Add value labels to the right of each bar
+        for i, v in enumerate(values):
+            if comparison_type == "Success Rate":
+                self._artists.append(self.ax.text(v + 1, i, f"{v:.1f}%", va='center'))
+            else:
+                self._artists.append(self.ax.text(v + 0.1, i, f"{int(v)}", va='center'))
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+def draw_chart(template_class, signature, *data, reuse=True):
+    """Render ``data`` with this thread's ``template_class`` for layout ``signature``.
+
+    With ``reuse=False`` a new Figure is built and fitted to ``data`` instead.
+    """
+    if not reuse:
+        fig = template_class().render(*data)
+
+        # Adjust layout
+        fig.tight_layout()
+        return fig
+
+    templates = getattr(_local, 'templates', None)
+    if templates is None:
+        templates = _local.templates = OrderedDict()
+    key = (template_class, signature)
+    template = templates.get(key)
+    if template is None:
+        template = templates[key] = template_class(signature)
+        while len(templates) > MAX_TEMPLATES:
+            templates.popitem(last=False)
+    else:
+        templates.move_to_end(key)
+    return template.render(*data)
+
+def render_progress_chart(student_data, max_points=None, reuse=True):
+    """Draw the daily success, tasks per day and per-subject panels for one student.
+
+    Over more than ``max_points`` days, the success line is downsampled by
+    LTTB and the task counts are summed per week (or whole weeks).
+    """
+    # Check if there are any valid dates for the student
+    valid_dates_df = student_data.dropna(subset=["Completion_Date"])
+
+    if len(valid_dates_df) == 0:
+        return draw_chart(EmptyProgressTemplate, (), reuse=reuse)
+
+    # Daily success rate, sorted by date
+    daily_data = valid_dates_df.groupby(valid_dates_df["Completion_Date"].dt.date).agg({
+        "Success_Rate": "mean"
+    }).reset_index()
+    daily_data = daily_data.sort_values("Completion_Date")
+    daily_data = daily_data.iloc[daily_positions(daily_data["Completion_Date"],
+                                                 daily_data["Success_Rate"], max_points)]
+
+    # Task completion chart - count tasks per day
+    task_counts = valid_dates_df.groupby(valid_dates_df["Completion_Date"].dt.date).size().reset_index()
+    task_counts.columns = ["Completion_Date", "Task_Count"]
+    dates, totals, bar_days = daily_totals(task_counts["Completion_Date"], task_counts["Task_Count"], max_points)
+    task_counts = pd.DataFrame({"Completion_Date": dates, "Task_Count": totals})
+
+    # Group by subject, sorted by number of tasks
+    subject_data = student_data.groupby("Subject").agg({
+        "Success_Rate": "mean",
+        "Task": "count"
+    }).reset_index()
+    subject_data = subject_data.sort_values("Task", ascending=False)
+
+    signature = (_label_length(subject_data["Subject"]), _digits(task_counts["Task_Count"]))
+    return draw_chart(ProgressTemplate, signature, daily_data, task_counts, subject_data, bar_days, reuse=reuse)
+
+def render_subject_comparison(student_data, reuse=True):
+    """Draw tasks, average success and days worked side by side for each subject."""
+    subjects = sorted(student_data["Subject"].unique())
+
+    # Calculate subject metrics
+    tasks, success, days = [], [], []
+    for subject in subjects:
+        subject_data = student_data[student_data["Subject"] == subject]
+        tasks.append(len(subject_data))
+        success.append(subject_data["Success_Rate"].mean())
+        days.append(len(subject_data["Completion_Date"].dt.date.unique()))
+
+    signature = (_label_length(subjects[:1]), _label_length(subjects[-1:]), _digits(tasks + success + days))
+    return draw_chart(SubjectsTemplate, signature, subjects, tasks, success, days, reuse=reuse)
+
+def render_comparison_chart(names, values, comparison_type, label, reuse=True):
+    """Draw one horizontal bar per student for the compared metric."""
+    signature = (comparison_type, label, _label_length(names), _digits(values))
+    return draw_chart(ComparisonTemplate, signature, names, values, comparison_type, label, reuse=reuse)
@@ -0,0 +1,59 @@
+"""Downsampling of long daily series for charts.
+
+Largest-Triangle-Three-Buckets (LTTB) keeps the first and last point and,
+from each of ``n_out - 2`` equal buckets in between, the point forming the
+largest triangle with the point kept from the previous bucket and the
+average of the next one. Peaks and dips survive, so a year of days drawn
+as a few hundred points looks the same as the full series. It suits lines
+(e.g. a daily average), not counts: the points it drops are gone, so bars
+of the days left out would vanish from the chart and from its totals.
+Counts are summed over equal bins instead (``bin_sums``), keeping every
+task.
+"""
+
+import numpy as np
+
+def lttb_indices(x, y, n_out):
+    """Positions of the ``n_out`` points LTTB keeps from ``(x, y)``, ascending.
+
+    ``x`` must be sorted. Series of at most ``n_out`` points (or ``n_out``
+    below 3) are kept whole. Missing ``y`` values count as 0.
+    """
+    n = len(x)
+    if n_out is None or n_out < 3 or n <= n_out:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+
+    # Buckets [edges[i], edges[i + 1]) split the points between first and last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+def bin_sums(x, values, n_out, step=1, origin=0):
+    """Sum ``values`` over equal bins of ``x`` so that at most ``n_out`` bins hold points.
+
+    ``x`` must be sorted integers. Bin widths are multiples of ``step`` and
+    bins start at ``origin`` plus a multiple of the width. Returns
+    ``(bin starts, sums, width)`` for the bins holding points; series of at
+    most ``n_out`` points come back unchanged with width 1.
+    """
+    x = np.asarray(x, dtype=np.int64)
+    values = np.asarray(values)
+    if n_out is None or n_out < 2 or len(x) <= n_out:
+        return x, values, 1
+    span = int(x[-1] - x[0]) + 1
+    width = step * -(-span // ((n_out - 1) * step))
+    bins = (x - origin) // width
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    return bins[starts] * width + origin, np.add.reduceat(values, starts), width
@@ -0,0 +1,131 @@
+"""Background job queue for long-running request work.
+
+Jobs run on a thread pool, next to the APScheduler scheduler the app
+already uses for periodic cleanup. Threads (rather than processes) let a
+job update its progress and the process-level dataset cache directly.
+Jobs that share a ``key`` (e.g. a user id) run one at a time in
+submission order, so two uploads never write the same directory together.
+A job is handed to the pool only when the one before it with the same key
+has finished, so a user's backlog never holds a worker that other users'
+jobs could run on.
+
+Job records are plain dicts; ``get`` returns a copy that is safe to
+serialize. Finished records are dropped after ``retention``.
+"""
+
+import uuid
+import logging
+from collections import deque
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+class JobQueue:
+    """Thread-pool job runner with pollable progress."""
+
+    def __init__(self, max_workers=2, retention=timedelta(hours=1)):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        # Jobs waiting behind the running job of each key; a key is
+        # present only while one of its jobs is queued or running
+        self._waiting = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """Queue ``func(*args, report=..., **kwargs)`` and return the new job id.
+
+        ``report(**progress)`` merges its keyword arguments into the job's
+        ``progress`` dict. The function's return value becomes ``result``.
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.now()
+        with self._lock:
+            self._prune(now)
+            self._jobs[job_id] = {
+                'id': job_id,
+                'key': key,
+                'status': QUEUED,
+                'progress': {},
+                'result': None,
+                'error': None,
+                'created': now.isoformat(timespec='seconds'),
+                'finished': None,
+            }
+            job = (job_id, key, func, args, kwargs)
+            if key in self._waiting:
+                self._waiting[key].append(job)
+                return job_id
+            self._waiting[key] = deque()
+        self._start(job)
+        return job_id
+
+    def get(self, job_id):
+        """Return a snapshot of the job record, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return dict(job, progress=dict(job['progress']))
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _start(self, job):
+        try:
+            self._executor.submit(self._run, *job)
+        except RuntimeError as e:
+            # The pool was shut down; nothing queued behind this job will run either
+            with self._lock:
+                jobs = [job] + list(self._waiting.pop(job[1], ()))
+            for job_id, *_ in jobs:
+                self._update(job_id, status=FAILED, error=str(e),
+                             finished=datetime.now().isoformat(timespec='seconds'))
+
+    def _run(self, job_id, key, func, args, kwargs):
+        def report(**progress):
+            with self._lock:
+                self._jobs[job_id]['progress'].update(progress)
+
+        self._update(job_id, status=RUNNING)
+        try:
+            result = func(*args, report=report, **kwargs)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            traceback.print_exc()
+            self._update(job_id, status=FAILED, error=str(e),
+                         finished=datetime.now().isoformat(timespec='seconds'))
+        else:
+            self._update(job_id, status=DONE, result=result,
+                         finished=datetime.now().isoformat(timespec='seconds'))
+
+        # Hand the key's next job to the pool, or forget the key
+        with self._lock:
+            waiting = self._waiting[key]
+            next_job = waiting.popleft() if waiting else None
+            if next_job is None:
+                del self._waiting[key]
+        if next_job is not None:
+            self._start(next_job)
+
+    def _prune(self, now):
+        cutoff = (now - self.retention).isoformat(timespec='seconds')
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['finished'] is not None and job['finished'] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+# Shared by every request in this process
+job_queue = JobQueue()
@@ -0,0 +1,115 @@
+"""JSON serialization of analysis results.
+
+Results are converted column by column instead of value by value. Each
+column (a frame column, or one key across a list of records) is turned
+into a list of native Python values with one vectorized operation per
+dtype. Only columns that mix types fall back to ``convert_to_serializable``.
+Files are written in chunks with the C JSON encoder (``json.dumps``);
+``json.dump`` would use the much slower pure-Python encoder.
+"""
+
+import os
+import json
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Timestamps are written in this format, as convert_to_serializable does
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Records encoded per json.dumps() call when writing
+WRITE_CHUNK_SIZE = 2000
+
+def convert_to_serializable(obj):
+    """Convert non-serializable objects to serializable format."""
+    if isinstance(obj, (np.integer, np.int64)):
+        return int(obj)
+    elif isinstance(obj, (np.floating, np.float64)):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif obj is pd.NaT:
+        # Missing dates are written as null, as serializable_column does
+        return None
+    elif isinstance(obj, pd.Timestamp):
+        return obj.strftime(DATETIME_FORMAT)
+    elif isinstance(obj, datetime):
+        return obj.strftime(DATETIME_FORMAT)
+    else:
+        # Just return the object as is
+        return obj
+
+def serializable_column(column):
+    """Return the values of a Series as a list of JSON-ready native values."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype(object)
+
+    if pd.api.types.is_datetime64_any_dtype(column):
+        text = column.dt.strftime(DATETIME_FORMAT)
+        return text.astype(object).where(column.notna(), None).tolist()
+    if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+        # tolist() yields Python ints/floats/bools
+        return column.tolist()
+
+    # Object columns: plain strings (or nothing) need no conversion
+    if pd.api.types.infer_dtype(column, skipna=True) in ('string', 'empty'):
+        return column.tolist()
+    return [convert_to_serializable(value) for value in column.tolist()]
+
+def frame_to_records(df):
+    """Convert a DataFrame to JSON-ready records, one conversion per column."""
+    columns = [serializable_column(df[col]) for col in df.columns]
+    keys = list(df.columns)
+    return [dict(zip(keys, values)) for values in zip(*columns)]
+
+def serializable_values(values):
+    """Return a list of arbitrary values as JSON-ready native values.
+
+    The list is converted in one step when all values share a kind;
+    otherwise each value goes through ``convert_to_serializable``.
+    """
+    kind = pd.api.types.infer_dtype(values, skipna=False)
+    if kind in ('string', 'empty'):
+        return list(values)
+    if kind == 'integer':
+        return np.asarray(values, dtype=np.int64).tolist()
+    if kind == 'floating':
+        return np.asarray(values, dtype=np.float64).tolist()
+    return [convert_to_serializable(value) for value in values]
+
+def records_to_serializable(records):
+    """Convert a list of flat dicts to JSON-ready dicts, one key at a time.
+
+    Records are grouped by their key set, so dicts with different keys
+    (e.g. zero-task summaries) keep exactly their own keys. Order is preserved.
+    """
+    groups = {}
+    for position, record in enumerate(records):
+        groups.setdefault(tuple(record), []).append(position)
+
+    clean = [None] * len(records)
+    for keys, positions in groups.items():
+        group = [records[i] for i in positions]
+        columns = [serializable_values([record[key] for record in group]) for key in keys]
+        for position, values in zip(positions, zip(*columns)):
+            clean[position] = dict(zip(keys, values))
+    return clean
+
+def write_json_records(records, path, chunk_size=WRITE_CHUNK_SIZE):
+    """Stream a list of JSON-ready records to ``path`` as a JSON array.
+
+    The file is written beside ``path`` and swapped in, so readers never see
+    a partial file.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write('[')
+        for start in range(0, len(records), chunk_size):
+            if start:
+                f.write(', ')
+            # Each chunk is encoded as a list; strip its brackets to splice it in
+            f.write(json.dumps(records[start:start + chunk_size])[1:-1])
+        f.write(']')
+    os.replace(tmp_path, path)
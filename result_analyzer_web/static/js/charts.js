@@ -219,3 +219,63 @@ function createStudentComparisonChart(canvasId, labels, data, title, metricLabel
         }
     });
 }
+
+// Swap in chart images drawn in the background. Each [data-chart-status]
+// element polls its status URL until the image is ready, then shows it
+// (or, with data-chart-link, a download link named after that attribute).
+function loadChartImages() {
+    document.querySelectorAll('[data-chart-status]').forEach(container => {
+        if (container.querySelector('img, a')) return;
+
+        let delay = 500;
+        const deadline = Date.now() + 120000;
+
+        function show(url) {
+            const link = container.dataset.chartLink;
+            if (link) {
+                const a = document.createElement('a');
+                a.href = url;
+                a.download = link;
+                a.className = 'btn btn-outline-secondary btn-sm';
+                a.innerHTML = '<i class="bi bi-download"></i> Chart image';
+                container.replaceChildren(a);
+            } else {
+                const img = document.createElement('img');
+                img.src = url;
+                img.className = 'img-fluid';
+                img.alt = container.dataset.chartAlt || 'Chart';
+                container.replaceChildren(img);
+            }
+        }
+
+        function fail() {
+            const message = document.createElement('div');
+            message.className = 'alert alert-warning mb-0';
+            message.textContent = 'The chart could not be drawn. Please reload the page.';
+            container.replaceChildren(message);
+        }
+
+        function poll() {
+            fetch(container.dataset.chartStatus, { headers: { 'Accept': 'application/json' } })
+                .then(response => {
+                    if (!response.ok) throw new Error(response.statusText);
+                    return response.json();
+                })
+                .then(data => {
+                    if (data.status === 'ready') {
+                        show(data.url);
+                    } else if (data.status === 'pending' && Date.now() < deadline) {
+                        setTimeout(poll, delay);
+                        delay = Math.min(delay * 1.5, 5000);
+                    } else {
+                        fail();
+                    }
+                })
+                .catch(fail);
+        }
+
+        poll();
+    });
+}
+
+document.addEventListener('DOMContentLoaded', loadChartImages);
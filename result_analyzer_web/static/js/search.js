@@ -1,76 +1,164 @@
 /**
- * Search functionality for the student results table
+ * Search, sorting and paging for the student results table.
+ *
+ * The table shows one page of the results. Searching, clicking a sortable
+ * header or changing page asks the server (the table's data-source URL)
+ * for the rows to show, so only the visible page is ever sent.
  */
 
 document.addEventListener('DOMContentLoaded', function() {
     const searchInput = document.getElementById('studentSearch');
     const searchButton = document.getElementById('searchButton');
     const resultsTable = document.getElementById('resultsTable');
-    
-    if (!searchInput || !searchButton || !resultsTable) return;
-    
-    // Function to perform search
-    function performSearch() {
-        const searchTerm = searchInput.value.toLowerCase().trim();
-        const rows = resultsTable.querySelectorAll('tbody tr');
-        
-        let matchCount = 0;
-        
-        rows.forEach(row => {
-            const name = row.cells[0].textContent.toLowerCase();
-            const grade = row.cells[1].textContent.toLowerCase();
-            const subjects = row.cells[7] ? row.cells[7].textContent.toLowerCase() : '';
-            
-            // Show row if search term is found in name, grade, or subjects
-            if (name.includes(searchTerm) || grade.includes(searchTerm) || subjects.includes(searchTerm)) {
-                row.style.display = '';
-                matchCount++;
-            } else {
-                row.style.display = 'none';
-            }
-        });
-        
-        // Add a "no results" message if no matches were found
-        let noResultsRow = resultsTable.querySelector('.no-results-row');
-        if (matchCount === 0) {
-            if (!noResultsRow) {
-                const tbody = resultsTable.querySelector('tbody');
-                noResultsRow = document.createElement('tr');
-                noResultsRow.className = 'no-results-row';
-                const td = document.createElement('td');
-                td.setAttribute('colspan', '8');
-                td.className = 'text-center py-3';
-                td.textContent = `No students match your search for "${searchTerm}". Try a different search term.`;
-                noResultsRow.appendChild(td);
-                tbody.appendChild(noResultsRow);
-            }
-        } else if (noResultsRow) {
-            noResultsRow.remove();
+
+    if (!searchInput || !searchButton || !resultsTable || !resultsTable.dataset.source) return;
+
+    const tbody = resultsTable.querySelector('tbody');
+    const prevButton = document.getElementById('resultsPrev');
+    const nextButton = document.getElementById('resultsNext');
+    const rangeText = document.getElementById('resultsRange');
+
+    const state = {
+        page: 1,
+        perPage: parseInt(resultsTable.dataset.perPage, 10) || 50,
+        sort: null,
+        order: 'asc',
+        query: ''
+    };
+    let pages = parseInt(resultsTable.dataset.pages, 10) || 1;
+    let requestId = 0;
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value === null || value === undefined ? '' : String(value);
+        return div.innerHTML;
+    }
+
+    // Same row classes as the server-rendered first page
+    function rowClass(student) {
+        if (student.Zero_Tasks) return 'zero-tasks';
+        if (student.Avg_Success >= 80) return 'high-success';
+        if (student.Avg_Success >= 50) return 'medium-success';
+        return 'low-success';
+    }
+
+    function messageRow(text) {
+        return `<tr class="no-results-row"><td colspan="8" class="text-center py-3">${escapeHtml(text)}</td></tr>`;
+    }
+
+    function render(data) {
+        if (data.students.length === 0) {
+            tbody.innerHTML = state.query
+                ? messageRow(`No students match your search for "${state.query}". Try a different search term.`)
+                : messageRow('No students match the current filters. Try adjusting your criteria.');
+        } else {
+            tbody.innerHTML = data.students.map(student => {
+                const success = student.Zero_Tasks || student.Avg_Success === null
+                    ? 'N/A' : `${escapeHtml(student.Avg_Success)}%`;
+                return `<tr class="${rowClass(student)}">
+                    <td>${escapeHtml(student.Full_Name)}</td>
+                    <td>${escapeHtml(student.Grade)}</td>
+                    <td>${escapeHtml(student.Days_Worked)}</td>
+                    <td>${escapeHtml(student.Total_Tasks)}</td>
+                    <td>${escapeHtml(student.Diagnostics_Count)}</td>
+                    <td>${escapeHtml(student.Max_Streak)}</td>
+                    <td>${success}</td>
+                    <td>
+                        <a href="${escapeHtml(student.url)}" class="btn btn-primary btn-sm">
+                            <i class="bi bi-file-person"></i> Profile
+                        </a>
+                    </td>
+                </tr>`;
+            }).join('');
+        }
+
+        state.page = data.page;
+        pages = data.pages;
+        if (rangeText) {
+            const first = (data.page - 1) * data.per_page + 1;
+            rangeText.textContent = data.matched
+                ? `Showing ${first}-${first + data.students.length - 1} of ${data.matched}` +
+                  (data.matched < data.total ? ` (filtered from ${data.total})` : '')
+                : '';
         }
+        if (prevButton) prevButton.disabled = data.page <= 1;
+        if (nextButton) nextButton.disabled = data.page >= data.pages;
     }
-    
+
+    // Fetch and show the current page; answers to superseded requests are dropped
+    function load() {
+        const params = new URLSearchParams({ page: state.page, per_page: state.perPage, q: state.query });
+        if (state.sort) {
+            params.set('sort', state.sort);
+            params.set('order', state.order);
+        }
+        const id = ++requestId;
+        fetch(`${resultsTable.dataset.source}?${params}`, { headers: { 'Accept': 'application/json' } })
+            .then(response => {
+                if (!response.ok) throw new Error(response.statusText);
+                return response.json();
+            })
+            .then(data => {
+                if (id === requestId) render(data);
+            })
+            .catch(() => {
+                if (id === requestId) tbody.innerHTML = messageRow('Could not load the results. Please reload the page.');
+            });
+    }
+
+    function performSearch() {
+        state.query = searchInput.value.trim();
+        state.page = 1;
+        load();
+    }
+
     // Search when button is clicked
     searchButton.addEventListener('click', performSearch);
-    
+
     // Search when Enter key is pressed in search box
     searchInput.addEventListener('keyup', function(e) {
         if (e.key === 'Enter') {
             performSearch();
         }
     });
-    
+
     // Clear search when the search box is emptied
     searchInput.addEventListener('input', function() {
-        if (this.value === '') {
-            resultsTable.querySelectorAll('tbody tr').forEach(row => {
-                row.style.display = '';
-            });
-            
-            // Remove any "no results" row
-            const noResultsRow = resultsTable.querySelector('.no-results-row');
-            if (noResultsRow) {
-                noResultsRow.remove();
-            }
+        if (this.value === '' && state.query !== '') {
+            performSearch();
         }
     });
+
+    // Sort on the server: first click ascending, then toggle
+    resultsTable.querySelectorAll('th.sortable').forEach(th => {
+        th.addEventListener('click', () => {
+            const ascending = th.dataset.sort !== state.sort || th.classList.contains('sort-desc');
+            resultsTable.querySelectorAll('th').forEach(el => {
+                el.classList.remove('sort-asc', 'sort-desc');
+            });
+            th.classList.add(ascending ? 'sort-asc' : 'sort-desc');
+
+            state.sort = th.dataset.sort;
+            state.order = ascending ? 'asc' : 'desc';
+            state.page = 1;
+            load();
+        });
+    });
+
+    if (prevButton) {
+        prevButton.addEventListener('click', () => {
+            if (state.page > 1) {
+                state.page -= 1;
+                load();
+            }
+        });
+    }
+    if (nextButton) {
+        nextButton.addEventListener('click', () => {
+            if (state.page < pages) {
+                state.page += 1;
+                load();
+            }
+        });
+    }
 });
@@ -0,0 +1,89 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_tasks(n_students=12, n_rows=400, n_days=90, seed=0):
+    """A small processed task table, as ``transform_wide_to_long`` builds it.
+
+    Days repeat and have gaps, runs cross 64-day bitset words, and some rows
+    are not Done, have no date or belong to a third subject.
+    """
+    rng = np.random.default_rng(seed)
+    student = rng.integers(0, n_students, n_rows)
+    days = rng.integers(0, n_days, n_rows)
+    # Student 0 works every day from day 60 to 70, across a bitset word boundary
+    student[:11] = 0
+    days[:11] = np.arange(60, 71)
+    dates = pd.Timestamp('2025-01-01') + pd.to_timedelta(days, unit='D')
+    dates = pd.Series(dates).where(rng.random(n_rows) > 0.03)
+    diagnostics = [{"Diagnostic Math": 70.0, "Diagnostic English": 55.0} if i % 3 == 0 else {}
+                   for i in range(n_students + 2)]
+    df = pd.DataFrame({
+        "Name": [f"Student{i:02d}" for i in student],
+        "Surname": "Test",
+        "Phone": [f"050{i:07d}" for i in student],
+        "Grade": student % 4 + 5,
+        "School": "School",
+        "Registration_Date": pd.Timestamp('2024-09-01'),
+        "Parent_Number": "",
+        "Subject": rng.choice(["Math", "English", "Science"], n_rows, p=[0.5, 0.4, 0.1]),
+        "Task": [f"Task {i % 15}" for i in range(n_rows)],
+        "Completion_Date": dates,
+        "Status": np.where(rng.random(n_rows) < 0.85, "Done", "In Progress"),
+        "Success_Rate": rng.uniform(0, 100, n_rows).round(1),
+        "Diagnostics": [diagnostics[i] for i in student],
+    })
+    # Two students without any task row in the filters, one of them not Done at all
+    extra = df.iloc[:2].copy()
+    extra["Name"] = [f"Student{n_students:02d}", f"Student{n_students + 1:02d}"]
+    extra["Phone"] = ["0509999998", "0509999999"]
+    extra["Status"] = ["In Progress", "Done"]
+    extra["Completion_Date"] = [pd.Timestamp('2025-01-05'), pd.Timestamp('2024-06-01')]
+    extra["Diagnostics"] = [diagnostics[n_students], diagnostics[n_students + 1]]
+    df = pd.concat([df, extra], ignore_index=True)
+    df["Full_Name"] = df["Name"] + " " + df["Surname"]
+    return df
+
+def make_export(n_rows=60, seed=0):
+    """A small upload in the wide, one-column-group-per-subject export format."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2025-02-01') + pd.to_timedelta(rng.integers(0, 40, n_rows), unit='D')
+    statuses = np.array(["Done", "In Progress", "Done"])
+    rates = rng.uniform(0, 100, n_rows).round(1).astype(object)
+    rates[::7] = [f"{rate}%" for rate in rates[::7]]
+    rates[::11] = "Not Started"
+    return pd.DataFrame({
+        "Name": [f"Name{i % (n_rows // 3 + 1)}" for i in range(n_rows)],
+        "Surname": "Test",
+        "Phone Number": [f"+994{i:07d}" for i in range(n_rows)],
+        "Grade": rng.integers(1, 12, n_rows),
+        "School": [f"School {i % 3}" for i in range(n_rows)],
+        "Diagnostic Math - Accuracy": np.where(rng.random(n_rows) < 0.5, rng.uniform(0, 100, n_rows).round(1), np.nan),
+        "Practice Task": [f"Task {i % 9}" for i in range(n_rows)],
+        "Completion Date": dates,
+        "Practice Status": statuses[rng.integers(0, len(statuses), n_rows)],
+        "Success/Progress Rate": rates,
+        "Practice Task (English)": [f"Task {i % 5}" for i in range(n_rows)],
+        "Completion Date (English)": dates + pd.Timedelta(days=1),
+        "Practice Status (English)": statuses[rng.integers(0, len(statuses), n_rows)],
+        "Success/Progress Rate (English)": rng.uniform(0, 100, n_rows).round(1),
+    })
+
+@pytest.fixture
+def tasks_df():
+    return make_tasks()
+
+@pytest.fixture
+def flask_app(tmp_path, monkeypatch):
+    # The app logs to app.log in the working directory
+    monkeypatch.chdir(tmp_path)
+    import app as app_module
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    monkeypatch.setitem(app_module.app.config, 'CHART_PRECOMPUTE_TOP_N', 0)
+    monkeypatch.setitem(app_module.app.config, 'TESTING', True)
+    return app_module.app
@@ -0,0 +1,73 @@
+"""Date windows answered from the activity grids match a task table scan."""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.data_processing.activity import build_activity, load_activity, window_aggregates, write_activity
+from modules.data_processing.analysis import filter_mask, student_aggregates
+from modules.data_processing.storage import build_student_table, file_version, processed_data_path, save_tasks
+
+WINDOWS = [
+    ('2025-01-01', '2025-03-31', 'All'),
+    ('2024-01-01', '2026-01-01', 'All'),
+    ('2025-01-10', '2025-02-20', 'All'),
+    ('2025-03-02', '2025-03-12', 'Math'),
+    ('2025-02-01', '2025-03-05', 'English'),
+    ('2025-01-15', '2025-01-15', 'Science'),
+    ('2025-02-10', '2025-02-01', 'All'),
+    ('2025-01-01', '2025-03-31', 'History'),
+]
+
+@pytest.mark.parametrize("start, end, subject", WINDOWS)
+def test_window_aggregates_match_scan(tasks_df, start, end, subject):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    students = build_student_table(tasks_df)
+    activity = build_activity(tasks_df, students.index)
+    expected = student_aggregates(tasks_df, filter_mask(tasks_df, start, end, selected_subject=subject))
+
+    actual = window_aggregates(activity, students, start, end, selected_subject=subject)
+
+    assert list(actual.stats.index) == list(expected.stats.index)
+    assert list(actual.stats.columns) == list(expected.stats.columns)
+    for column in expected.stats.columns:
+        if column == "Avg_Success":
+            # Sums in another order may round a tie the other way
+            np.testing.assert_allclose(actual.stats[column].astype(float), expected.stats[column].astype(float),
+                                       atol=0.0101)
+        else:
+            assert list(actual.stats[column]) == list(expected.stats[column]), column
+    assert actual.rows.keys() == expected.rows.keys()
+    for name, positions in expected.rows.items():
+        np.testing.assert_array_equal(actual.rows[name], positions)
+
+def test_success_rate_threshold_needs_a_scan(tasks_df):
+    students = build_student_table(tasks_df)
+    activity = build_activity(tasks_df, students.index)
+    start, end = pd.Timestamp('2025-01-01'), pd.Timestamp('2025-03-31')
+    assert window_aggregates(activity, students, start, end, min_success_rate=50) is None
+    assert window_aggregates(activity, students, start, end, min_success_rate=activity.min_rate) is not None
+    assert window_aggregates(activity, students, start, end + pd.Timedelta(hours=12)) is None
+
+def test_time_of_day_skips_the_grids(tasks_df):
+    tasks_df["Completion_Date"] += pd.Timedelta(hours=9)
+    assert build_activity(tasks_df, build_student_table(tasks_df).index) is None
+
+def test_grids_over_the_cap_fall_back_with_a_warning(tasks_df, caplog):
+    with caplog.at_level(logging.WARNING, logger="modules.data_processing.activity"):
+        assert build_activity(tasks_df, build_student_table(tasks_df).index, max_cells=1000) is None
+    assert "Activity grids skipped" in caplog.text
+
+def test_stored_grids_follow_the_task_table_version(tasks_df, tmp_path):
+    user_dir = str(tmp_path)
+    save_tasks(tasks_df, user_dir)
+    activity = write_activity(user_dir)
+    version = file_version(processed_data_path(user_dir))
+
+    loaded = load_activity(user_dir, version)
+    assert loaded is not None
+    for name, value in activity._asdict().items():
+        np.testing.assert_array_equal(getattr(loaded, name), value, err_msg=name)
+    assert load_activity(user_dir, (0, 0)) is None
@@ -0,0 +1,119 @@
+"""The /analyze summaries match the original per-student loop."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.data_processing.analysis import SUMMARY_COLUMNS, analyze_student_data
+from modules.data_processing.storage import build_student_table
+
+def baseline_max_streak(dates):
+    """The original day-by-day streak loop."""
+    if len(dates) <= 1:
+        return len(dates)
+    streak_count = 1
+    max_streak = 1
+    for i in range(1, len(dates)):
+        if (dates[i] - dates[i-1]).days == 1:
+            streak_count += 1
+            max_streak = max(max_streak, streak_count)
+        else:
+            streak_count = 1
+    return max_streak
+
+def baseline_summaries(df, start_date, end_date, min_success_rate=0, min_days=0,
+                       selected_subject='All', min_tasks=0, zero_tasks_only=False):
+    """The original analyze() loop over the task table."""
+    filtered_df = df.copy()
+    if selected_subject != "All":
+        filtered_df = filtered_df[filtered_df["Subject"] == selected_subject]
+    tasks_df = filtered_df[
+        (filtered_df["Completion_Date"] >= start_date) &
+        (filtered_df["Completion_Date"] <= end_date) &
+        (filtered_df["Success_Rate"] >= min_success_rate) &
+        (filtered_df["Status"] == "Done")
+    ]
+
+    all_student_info = {}
+    for _, row in df.iterrows():
+        all_student_info.setdefault(row["Full_Name"], row)
+
+    student_summaries = []
+    active_students = set()
+    for student_name, group in tasks_df.groupby("Full_Name"):
+        active_students.add(student_name)
+        completion_dates = sorted(group["Completion_Date"].dt.date.unique())
+        days_worked = len(completion_dates)
+        total_tasks = len(group)
+        if days_worked >= min_days and total_tasks >= min_tasks:
+            first_record = group.iloc[0]
+            diagnostics = first_record["Diagnostics"]
+            student_summaries.append({
+                "Full_Name": student_name,
+                "Phone": first_record["Phone"],
+                "Grade": first_record["Grade"],
+                "Days_Worked": days_worked,
+                "Total_Tasks": total_tasks,
+                "Diagnostics_Count": len(diagnostics) if isinstance(diagnostics, dict) else 0,
+                "Max_Streak": baseline_max_streak(completion_dates),
+                "Avg_Success": round(group["Success_Rate"].mean(), 2),
+                "Subjects": ", ".join(sorted(group["Subject"].unique()))
+            })
+
+    if zero_tasks_only:
+        student_summaries = []
+    if zero_tasks_only or (min_tasks == 0 and min_days == 0):
+        for student_name in set(all_student_info) - active_students:
+            info = all_student_info[student_name]
+            diagnostics = info["Diagnostics"]
+            student_summaries.append({
+                "Full_Name": student_name,
+                "Phone": info["Phone"],
+                "Grade": info["Grade"],
+                "Days_Worked": 0,
+                "Total_Tasks": 0,
+                "Diagnostics_Count": len(diagnostics) if isinstance(diagnostics, dict) else 0,
+                "Max_Streak": 0,
+                "Avg_Success": 0,
+                "Subjects": ""
+            })
+    if min_tasks > 0:
+        student_summaries = [s for s in student_summaries if s["Total_Tasks"] >= min_tasks]
+    return student_summaries
+
+def by_name(summaries):
+    return {s["Full_Name"]: {column: s[column] for column in SUMMARY_COLUMNS} for s in summaries}
+
+FILTERS = [
+    dict(start_date='2025-01-01', end_date='2025-03-31'),
+    dict(start_date='2025-01-10', end_date='2025-02-20', min_success_rate=40),
+    dict(start_date='2025-01-01', end_date='2025-03-31', selected_subject='English', min_days=3),
+    dict(start_date='2025-02-01', end_date='2025-03-15', min_tasks=5),
+    dict(start_date='2025-03-01', end_date='2025-03-10', zero_tasks_only=True),
+    dict(start_date='2026-01-01', end_date='2026-02-01'),
+]
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_summaries_match_baseline(tasks_df, filters):
+    filters = dict(filters, start_date=pd.Timestamp(filters['start_date']), end_date=pd.Timestamp(filters['end_date']))
+    expected = by_name(baseline_summaries(tasks_df, **filters))
+
+    summaries, student_rows = analyze_student_data(tasks_df, students=build_student_table(tasks_df), **filters)
+    actual = by_name(summaries)
+
+    assert actual.keys() == expected.keys()
+    for name, row in expected.items():
+        assert actual[name] == pytest.approx(row), name
+    assert actual.keys() <= student_rows.keys()
+
+def test_student_rows_point_at_the_filtered_tasks(tasks_df):
+    start, end = pd.Timestamp('2025-01-10'), pd.Timestamp('2025-02-20')
+    summaries, student_rows = analyze_student_data(tasks_df, start, end, min_days=1)
+
+    for summary in summaries:
+        rows = tasks_df.iloc[student_rows[summary["Full_Name"]]]
+        assert (rows["Full_Name"] == summary["Full_Name"]).all()
+        assert (rows["Status"] == "Done").all()
+        assert rows["Completion_Date"].between(start, end).all()
+        assert len(rows) == summary["Total_Tasks"]
+        assert np.all(np.diff(student_rows[summary["Full_Name"]]) > 0)
@@ -0,0 +1,164 @@
+"""Appending an upload stores only the tasks that are not stored yet."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_tasks
+from modules.data_processing import activity as activity_module, storage
+from modules.data_processing.activity import (
+    append_activity, build_activity, load_activity, update_activity, write_activity
+)
+from modules.data_processing.analysis import filter_mask, student_aggregates, update_student_aggregates
+from modules.data_processing.storage import (
+    TASK_KEY_COLUMNS, build_student_table, file_version, load_students, load_tasks, merge_tasks,
+    processed_data_path, save_tasks, task_keys
+)
+
+@pytest.fixture(params=["columnar", "pickle"])
+def store(request, monkeypatch):
+    if request.param == "pickle":
+        monkeypatch.setattr(storage, "COLUMNAR_AVAILABLE", False)
+    elif not storage.COLUMNAR_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    return request.param
+
+def key_rows(df):
+    """TASK_KEY_COLUMNS of each row as comparable tuples."""
+    return list(zip(df["Full_Name"].astype(str), df["Subject"].astype(str), df["Task"].astype(str),
+                    pd.to_datetime(df["Completion_Date"])))
+
+def next_week(existing):
+    """An upload repeating half of ``existing`` with new tasks, one of a new student."""
+    repeated = existing.iloc[::2]
+    fresh = make_tasks(n_rows=60, seed=1)
+    fresh["Completion_Date"] = fresh["Completion_Date"] + pd.Timedelta(days=120)
+    newcomer = fresh.iloc[:3].copy()
+    newcomer["Name"] = "Newcomer"
+    newcomer["Full_Name"] = "Newcomer Test"
+    newcomer["Phone"] = "0501111111"
+    # Task codes read back as numbers in one export and as text in another
+    repeated = repeated.assign(Task=repeated["Task"].astype(str))
+    return pd.concat([repeated, fresh, newcomer], ignore_index=True)
+
+def write(df, directory):
+    directory.mkdir()
+    save_tasks(df, str(directory))
+    return str(directory)
+
+def test_merge_appends_only_new_tasks(store, tasks_df, tmp_path):
+    user_dir = write(tasks_df, tmp_path / "user")
+    upload = next_week(tasks_df)
+    new_dir = write(upload, tmp_path / "new")
+    before = load_tasks(user_dir)
+
+    added = merge_tasks(user_dir, new_dir)
+    merged = load_tasks(user_dir)
+
+    is_new = ~np.isin(task_keys(upload), task_keys(tasks_df))
+    assert key_rows(added) == key_rows(upload[is_new])
+    assert len(merged) == len(before) + is_new.sum()
+    # Stored rows keep their positions; the new ones follow
+    assert key_rows(merged.iloc[:len(before)]) == key_rows(before)
+    assert key_rows(merged.iloc[len(before):]) == key_rows(upload[is_new])
+    assert merged["Diagnostics"].tolist() == before["Diagnostics"].tolist() + upload["Diagnostics"][is_new].tolist()
+
+def test_merging_again_appends_nothing(store, tasks_df, tmp_path):
+    user_dir = write(tasks_df, tmp_path / "user")
+    new_dir = write(next_week(tasks_df), tmp_path / "new")
+    merge_tasks(user_dir, new_dir)
+    merged = load_tasks(user_dir)
+
+    added = merge_tasks(user_dir, new_dir)
+
+    assert len(added) == 0
+    assert key_rows(load_tasks(user_dir)) == key_rows(merged)
+
+def test_merge_adds_new_students(store, tasks_df, tmp_path):
+    user_dir = write(tasks_df, tmp_path / "user")
+    students = load_students(user_dir)
+    new_dir = write(next_week(tasks_df), tmp_path / "new")
+
+    merge_tasks(user_dir, new_dir)
+    merged = load_students(user_dir)
+
+    assert list(merged.index) == list(students.index) + ["Newcomer Test"]
+    assert merged.loc["Newcomer Test", "Phone"] == "0501111111"
+    assert merged["Phone"].iloc[:len(students)].tolist() == students["Phone"].tolist()
+
+def test_updated_aggregates_match_a_full_aggregation(store, tasks_df, tmp_path):
+    user_dir = write(tasks_df, tmp_path / "user")
+    new_dir = write(next_week(tasks_df), tmp_path / "new")
+    start, end = pd.Timestamp('2025-01-01'), pd.Timestamp('2025-12-31')
+    before = load_tasks(user_dir)
+    aggregates = student_aggregates(before, filter_mask(before, start, end))
+
+    added = merge_tasks(user_dir, new_dir)
+    merged = load_tasks(user_dir)
+    mask = filter_mask(merged, start, end)
+    updated = update_student_aggregates(aggregates, merged, mask, pd.unique(added["Full_Name"].astype(str)))
+    expected = student_aggregates(merged, mask)
+
+    pd.testing.assert_frame_equal(updated.stats, expected.stats, check_dtype=False, check_categorical=False)
+    assert updated.rows.keys() == expected.rows.keys()
+    for name, positions in expected.rows.items():
+        np.testing.assert_array_equal(updated.rows[name], positions)
+
+def test_task_keys_ignore_task_code_types():
+    df = pd.DataFrame({"Full_Name": ["A B"] * 2, "Subject": ["Math"] * 2, "Task": [12, "12"],
+                       "Completion_Date": [pd.Timestamp('2025-01-01')] * 2})
+    keys = task_keys(df[TASK_KEY_COLUMNS])
+    assert keys[0] == keys[1]
+
+def assert_same_activity(actual, expected):
+    for name, value in expected._asdict().items():
+        if name == "cell_rates":
+            # Sums added in another order
+            np.testing.assert_allclose(getattr(actual, name), value, rtol=1e-9, err_msg=name)
+        else:
+            np.testing.assert_array_equal(getattr(actual, name), value, err_msg=name)
+
+@pytest.mark.parametrize("shift_days", [120, 30, -40])
+def test_append_activity_matches_a_rebuild(tasks_df, shift_days):
+    existing = tasks_df[tasks_df["Subject"] != "Science"].reset_index(drop=True)
+    added = next_week(tasks_df)
+    added["Completion_Date"] += pd.Timedelta(days=shift_days - 120)
+    merged = pd.concat([existing, added], ignore_index=True)
+    students = build_student_table(merged)
+
+    grown = append_activity(build_activity(existing, build_student_table(existing).index),
+                            added, students.index, len(existing))
+
+    # A new subject, a new student and, for -40, dates before the stored ones
+    assert_same_activity(grown, build_activity(merged, students.index))
+
+def test_merged_upload_only_bins_the_new_rows(store, tasks_df, tmp_path, monkeypatch):
+    user_dir = write(tasks_df, tmp_path / "user")
+    before = write_activity(user_dir)
+    new_dir = write(next_week(tasks_df), tmp_path / "new")
+    added = merge_tasks(user_dir, new_dir)
+
+    built = []
+    def spy(df, *args, **kwargs):
+        built.append(len(df))
+        return build_activity(df, *args, **kwargs)
+    monkeypatch.setattr(activity_module, "build_activity", spy)
+    grown = update_activity(user_dir, before, added)
+
+    assert built == [len(added)]
+    merged = load_tasks(user_dir)
+    students = load_students(user_dir)
+    assert_same_activity(grown, build_activity(merged, students.index))
+    assert_same_activity(load_activity(user_dir, file_version(processed_data_path(user_dir))), grown)
+    # Students without new rows keep their bitsets
+    n_grids, n_students, n_words = before.day_bits.shape
+    untouched = np.flatnonzero(~students.index[:n_students].isin(added["Full_Name"].astype(str)))
+    np.testing.assert_array_equal(grown.day_bits[:n_grids, untouched, :n_words], before.day_bits[:, untouched])
+
+def test_update_without_grids_rebuilds_them(store, tasks_df, tmp_path):
+    user_dir = write(tasks_df, tmp_path / "user")
+    added = merge_tasks(user_dir, write(next_week(tasks_df), tmp_path / "new"))
+
+    grown = update_activity(user_dir, None, added)
+
+    assert_same_activity(grown, build_activity(load_tasks(user_dir), load_students(user_dir).index))
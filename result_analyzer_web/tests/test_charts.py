@@ -0,0 +1,199 @@
+"""Chart downsampling, the chart image cache, the renderer and /charts."""
+
+import os
+import time
+import uuid
+from datetime import date
+from urllib.parse import quote
+
+import numpy as np
+import pytest
+from matplotlib.figure import Figure
+
+from conftest import make_tasks
+from modules.data_processing.activity import write_activity
+from modules.data_processing.storage import save_tasks
+from modules.utils.chart_cache import ChartCache
+from modules.utils.chart_renderer import FAILED, MISSING, READY, ChartRenderer
+from modules.utils.charts import daily_totals, render_comparison_chart
+from modules.utils.downsample import bin_sums, lttb_indices
+
+TIMEOUT = 60
+
+@pytest.mark.parametrize("n", [3, 10, 365, 1000])
+@pytest.mark.parametrize("n_out", [3, 4, 50, 250])
+def test_lttb_keeps_the_endpoints_and_n_out_points(n, n_out):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.integers(1, 4, n))
+    y = rng.uniform(0, 100, n)
+
+    kept = lttb_indices(x, y, n_out)
+
+    assert len(kept) == min(n, n_out)
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert np.all(np.diff(kept) > 0)
+
+def test_lttb_keeps_peaks_and_short_series():
+    y = np.zeros(1000)
+    y[137], y[612] = 100, -100
+    kept = lttb_indices(np.arange(1000), y, 20)
+    assert 137 in kept and 612 in kept
+
+    np.testing.assert_array_equal(lttb_indices(np.arange(5), np.ones(5), 10), np.arange(5))
+    np.testing.assert_array_equal(lttb_indices(np.arange(5), np.ones(5), 2), np.arange(5))
+    np.testing.assert_array_equal(lttb_indices(np.arange(5), [1, np.nan, 3, 4, 5], 3)[[0, -1]], [0, 4])
+
+@pytest.mark.parametrize("n_out", [2, 10, 52])
+@pytest.mark.parametrize("step, origin", [(1, 0), (7, 1)])
+def test_bin_sums_keep_every_value(n_out, step, origin):
+    rng = np.random.default_rng(n_out)
+    x = np.sort(rng.choice(np.arange(700000, 700400), 300, replace=False))
+    values = rng.integers(1, 5, len(x))
+
+    starts, sums, width = bin_sums(x, values, n_out, step, origin)
+
+    assert sums.sum() == values.sum()
+    assert len(starts) <= n_out
+    assert width % step == 0
+    assert np.all((starts - origin) % width == 0)
+    assert np.all(np.diff(starts) > 0)
+    # Each value is in the bin starting at or before its day
+    bins = np.searchsorted(starts, x, side='right') - 1
+    assert np.all(x < starts[bins] + width)
+    np.testing.assert_array_equal(np.bincount(bins, weights=values), sums)
+
+def test_bin_sums_leave_short_series_alone():
+    starts, sums, width = bin_sums([1, 2, 5], [3, 4, 5], 3)
+    assert (starts.tolist(), sums.tolist(), width) == ([1, 2, 5], [3, 4, 5], 1)
+
+def test_weekly_bars_start_on_mondays():
+    days = [date(2025, 1, 1).toordinal() + i for i in range(400)]
+    dates = [date.fromordinal(day) for day in days]
+
+    starts, totals, width = daily_totals(dates, np.ones(len(dates), dtype=int), 100)
+
+    assert width % 7 == 0
+    assert all(start.weekday() == 0 for start in starts)
+    assert sum(totals) == len(dates)
+
+def small_figure(value):
+    fig = Figure(figsize=(2, 2))
+    fig.add_subplot().bar([0], [value])
+    return fig
+
+@pytest.fixture
+def cache(tmp_path):
+    return ChartCache(str(tmp_path / "charts"), dpi=50)
+
+def test_fetch_renders_each_chart_once(cache):
+    calls = []
+    def render():
+        calls.append(1)
+        return small_figure(1)
+
+    first = cache.fetch("bars", [1], render)
+    again = cache.fetch("bars", [1], render)
+    other = cache.fetch("bars", [2], render)
+    svg = cache.fetch("bars", [1], render, format="svg")
+
+    assert first == again and len({first, other, svg}) == 3
+    assert len(calls) == 3
+    assert svg.endswith(".svg") and os.path.exists(cache.path(svg))
+
+def test_eviction_removes_the_least_recently_used_images(cache):
+    names = [cache.fetch("bars", [i], lambda i=i: small_figure(i)) for i in range(6)]
+    sizes = {name: os.path.getsize(cache.path(name)) for name in names}
+    now = time.time()
+    for age, name in enumerate(reversed(names)):
+        os.utime(cache.path(name), (now - 100 * age, now - 100 * age))
+    # The oldest image was viewed last
+    cache.touch(names[0])
+    icon = os.path.join(cache.directory, "icon.svg")
+    with open(icon, "w") as f:
+        f.write("<svg/>")
+
+    cache.configure(max_bytes=sum(sizes.values()) - 1)
+    cache.added(0)
+
+    left = set(os.listdir(cache.directory))
+    assert os.path.basename(icon) in left
+    kept = [name for name in names if name in left]
+    assert names[0] in kept and names[1] not in kept
+    # Evicted oldest first, down to the low-water mark
+    assert kept == [names[0]] + names[len(names) - len(kept) + 1:]
+    assert sum(sizes[name] for name in kept) <= cache.max_bytes * cache.low_water
+    assert sum(sizes[name] for name in kept) + sizes[names[-len(kept)]] > cache.max_bytes * cache.low_water
+    assert cache._bytes == sum(sizes[name] for name in kept)
+
+def wait_for(renderer, filename):
+    deadline = time.monotonic() + TIMEOUT
+    while renderer.status(filename) not in (READY, FAILED):
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    return renderer.status(filename)
+
+COMPARISON = (["Ada", "Bob"], [3.0, 5.0], "Days Worked", "Days Worked")
+
+def test_renderer_status(cache):
+    renderer = ChartRenderer(cache, max_workers=1)
+    try:
+        assert renderer.status("comparison-" + "0" * 64 + ".png") == MISSING
+        filename, ready = renderer.submit("comparison", list(COMPARISON[:3]), render_comparison_chart, *COMPARISON)
+        assert wait_for(renderer, filename) == READY
+        assert renderer.submit("comparison", list(COMPARISON[:3]), render_comparison_chart, *COMPARISON) == (filename, True)
+
+        broken, _ = renderer.submit("comparison", ["broken"], render_comparison_chart, None, None, None, None)
+        assert wait_for(renderer, broken) == FAILED
+        with pytest.raises(RuntimeError):
+            renderer.draw("comparison", ["broken"], render_comparison_chart, None, None, None, None)
+    finally:
+        renderer.shutdown()
+
+def test_renderer_draws_in_the_request_without_workers(cache):
+    renderer = ChartRenderer(cache, max_workers=0)
+    filename, ready = renderer.submit("comparison", list(COMPARISON[:3]), render_comparison_chart, *COMPARISON)
+    assert ready and renderer.status(filename) == READY
+
+@pytest.fixture
+def chart_client(flask_app, tmp_path, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module.chart_cache, "directory", str(tmp_path / "charts"))
+    monkeypatch.setattr(app_module.chart_cache, "_bytes", None)
+    monkeypatch.setattr(app_module.chart_renderer, "max_workers", 0)
+    user_id = uuid.uuid4().hex
+    user_dir = tmp_path / "uploads" / user_id
+    user_dir.mkdir(parents=True)
+    save_tasks(make_tasks(), str(user_dir))
+    write_activity(str(user_dir))
+
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+    assert client.post("/analyze", data={"start_date": "2025-01-01", "end_date": "2025-03-31"}).status_code == 200
+    return client, user_id
+
+def test_chart_route_revalidates_with_etag(chart_client, tmp_path):
+    client, user_id = chart_client
+    url = f"/charts/{user_id}/{quote('Student00 Test')}/progress.png"
+
+    first = client.get(url)
+    assert first.status_code == 200 and first.mimetype == "image/png"
+    assert first.headers["ETag"] and first.headers["Last-Modified"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    assert len(os.listdir(tmp_path / "charts")) == 1
+
+    revalidated = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304 and revalidated.data == b""
+    assert revalidated.headers["ETag"] == first.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    assert client.get(f"/charts/{user_id}/{quote('Student00 Test')}/subjects.svg").mimetype == "image/svg+xml"
+    assert client.get(f"/charts/{user_id}/Nobody/progress.png").status_code == 404
+    assert client.get(f"/charts/{user_id}/{quote('Student00 Test')}/other.png").status_code == 404
+    assert client.get(f"/charts/someone-else/{quote('Student00 Test')}/progress.png").status_code == 404
+
+def test_chart_status_route(chart_client, tmp_path):
+    client, _ = chart_client
+    assert client.get("/charts/status/not-a-chart.png").status_code == 404
+    missing = client.get("/charts/status/progress-" + "0" * 64 + ".png").get_json()
+    assert missing["status"] == MISSING
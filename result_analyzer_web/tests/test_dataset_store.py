@@ -0,0 +1,133 @@
+"""The content-addressed cache of processed uploads."""
+
+import os
+
+import pytest
+
+from conftest import make_export, make_tasks
+from modules.data_processing import dataset_store
+from modules.data_processing.activity import ACTIVITY_FILE, write_activity
+from modules.data_processing.dataset_store import (
+    DATASET_REF_FILE, DATASETS_DIR, link_cached, reference_count, release, store, sweep, upload_digest
+)
+from modules.data_processing.storage import STUDENTS_FILE, TASKS_FILE, load_tasks, save_tasks
+
+SUBJECTS = ['English', 'Math']
+
+@pytest.fixture
+def upload_folder(tmp_path):
+    return str(tmp_path / 'uploads')
+
+def user_dir(upload_folder, user_id):
+    path = os.path.join(upload_folder, user_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def processed(upload_folder, user_id, seed=0):
+    """A user directory holding freshly processed artifacts."""
+    path = user_dir(upload_folder, user_id)
+    save_tasks(make_tasks(seed=seed), path)
+    write_activity(path)
+    return path
+
+def write_upload(tmp_path, name='export.csv', seed=0):
+    path = str(tmp_path / name)
+    make_export(seed=seed).to_csv(path, index=False)
+    return path
+
+def stray_files(path):
+    return sorted(name for name in os.listdir(path) if name.endswith('.tmp'))
+
+def test_digest_follows_content_type_and_version(tmp_path, monkeypatch):
+    path = write_upload(tmp_path)
+    digest = upload_digest(path, 'export.csv')
+
+    assert upload_digest(path, 'renamed.CSV') == digest
+    assert upload_digest(write_upload(tmp_path, 'copy.csv'), 'copy.csv') == digest
+    assert upload_digest(write_upload(tmp_path, 'other.csv', seed=1), 'other.csv') != digest
+    assert upload_digest(path, 'export.xlsx') != digest
+    monkeypatch.setattr(dataset_store, 'PROCESSING_VERSION', dataset_store.PROCESSING_VERSION + 1)
+    assert upload_digest(path, 'export.csv') != digest
+
+def test_store_then_link_shares_the_artifacts(upload_folder):
+    first = processed(upload_folder, 'alice')
+    store(upload_folder, 'd1', 'alice', first, SUBJECTS)
+    second = user_dir(upload_folder, 'bob')
+
+    assert link_cached(upload_folder, 'd1', 'bob', second) == SUBJECTS
+    for name in (TASKS_FILE, STUDENTS_FILE, ACTIVITY_FILE):
+        assert os.path.samefile(os.path.join(first, name), os.path.join(second, name))
+    assert reference_count(upload_folder, 'd1') == 2
+    assert load_tasks(second).equals(load_tasks(first))
+
+def test_linking_the_same_upload_again_leaves_no_temporary_files(upload_folder):
+    store(upload_folder, 'd1', 'alice', processed(upload_folder, 'alice'), SUBJECTS)
+    path = user_dir(upload_folder, 'bob')
+    link_cached(upload_folder, 'd1', 'bob', path)
+    listing = sorted(os.listdir(path))
+
+    assert link_cached(upload_folder, 'd1', 'bob', path) == SUBJECTS
+    assert sorted(os.listdir(path)) == listing
+    assert stray_files(path) == []
+    assert stray_files(os.path.join(upload_folder, DATASETS_DIR, 'd1')) == []
+
+def test_copies_where_links_are_unsupported(upload_folder, monkeypatch):
+    first = processed(upload_folder, 'alice')
+    store(upload_folder, 'd1', 'alice', first, SUBJECTS)
+
+    def no_links(src, dst):
+        raise OSError("hard links not supported")
+    monkeypatch.setattr(os, 'link', no_links)
+    second = user_dir(upload_folder, 'bob')
+    link_cached(upload_folder, 'd1', 'bob', second)
+    link_cached(upload_folder, 'd1', 'bob', second)
+
+    tasks = os.path.join(second, TASKS_FILE)
+    assert not os.path.samefile(os.path.join(first, TASKS_FILE), tasks)
+    with open(os.path.join(first, TASKS_FILE), 'rb') as a, open(tasks, 'rb') as b:
+        assert a.read() == b.read()
+    assert stray_files(second) == []
+
+def test_unknown_digest_is_not_cached(upload_folder):
+    path = user_dir(upload_folder, 'bob')
+    assert link_cached(upload_folder, 'missing', 'bob', path) is None
+    assert not os.path.exists(os.path.join(path, DATASET_REF_FILE))
+
+def test_release_and_sweep(upload_folder):
+    alice = processed(upload_folder, 'alice')
+    store(upload_folder, 'd1', 'alice', alice, SUBJECTS)
+    bob = user_dir(upload_folder, 'bob')
+    link_cached(upload_folder, 'd1', 'bob', bob)
+    store(upload_folder, 'd2', 'carol', processed(upload_folder, 'carol', seed=1), SUBJECTS)
+
+    release(upload_folder, 'alice', alice)
+    assert reference_count(upload_folder, 'd1') == 1
+    release(upload_folder, 'alice', alice)
+    assert reference_count(upload_folder, 'd1') == 1
+    assert sweep(upload_folder) == 0
+
+    # Bob moves to carol's upload; nobody references d1 any more
+    link_cached(upload_folder, 'd2', 'bob', bob)
+    assert reference_count(upload_folder, 'd1') == 0
+    assert reference_count(upload_folder, 'd2') == 2
+    assert sweep(upload_folder) == 1
+    assert os.listdir(os.path.join(upload_folder, DATASETS_DIR)) == ['d2']
+    assert link_cached(upload_folder, 'd1', 'alice', alice) is None
+
+def test_uploading_the_same_file_twice(flask_app, tmp_path):
+    import app as app_module
+    folder = flask_app.config['UPLOAD_FOLDER']
+    path = user_dir(folder, 'alice')
+    upload = write_upload(tmp_path)
+    reports = []
+
+    subjects = app_module.process_upload('alice', path, upload, 'export.csv', lambda **kw: reports.append(kw))
+    listing = sorted(os.listdir(path))
+    tasks = load_tasks(path)
+    again = app_module.process_upload('alice', path, upload, 'export.csv', lambda **kw: reports.append(kw))
+
+    assert subjects and again == subjects
+    assert sorted(os.listdir(path)) == listing
+    assert stray_files(path) == []
+    assert load_tasks(path).equals(tasks)
+    assert reference_count(folder, upload_digest(upload, 'export.csv')) == 1
@@ -0,0 +1,144 @@
+"""Reading uploads: chunked CSVs and streamed workbooks match whole-file reads."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_export
+from modules.data_processing import file_processor
+from modules.data_processing.file_processor import (
+    iter_csv_batches, iter_upload_tasks, process_excel_file, transform_wide_to_long
+)
+from modules.data_processing.schema import build_column_plan, csv_read_hints, text_columns
+
+def long_table(parts):
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+def assert_same_tasks(actual, expected):
+    """Same task rows and values; categorical and object columns compare equal."""
+    assert list(actual.columns) == list(expected.columns)
+    assert len(actual) == len(expected)
+    for column in expected.columns:
+        if column == "Completion_Date":
+            pd.testing.assert_series_equal(pd.to_datetime(actual[column]), pd.to_datetime(expected[column]),
+                                           check_names=False)
+        elif column == "Success_Rate":
+            np.testing.assert_allclose(actual[column].astype(float), expected[column].astype(float))
+        else:
+            assert actual[column].astype(object).tolist() == expected[column].astype(object).tolist(), column
+
+@pytest.fixture
+def export():
+    df = make_export(n_rows=50)
+    # Leading zeros and a "+" must survive as text
+    df.loc[::4, "Phone Number"] = "0501234567"
+    return df
+
+@pytest.fixture
+def csv_path(export, tmp_path):
+    path = str(tmp_path / "export.csv")
+    export.to_csv(path, index=False)
+    return path
+
+def test_csv_read_hints_type_the_schema_columns(csv_path):
+    plan = build_column_plan(pd.read_csv(csv_path, nrows=0).columns)
+    dtype, parse_dates = csv_read_hints(plan)
+    assert dtype["Name"] is str and dtype["Surname"] is str and dtype["Phone Number"] is str
+    assert dtype["Practice Status"] == dtype["Practice Status (English)"] == "category"
+    assert parse_dates == ["Completion Date", "Completion Date (English)"]
+
+    batch = next(iter_csv_batches(csv_path, batch_size=20))
+    assert len(batch) == 20
+    assert isinstance(batch["Practice Status"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(batch["Completion Date (English)"])
+    assert batch["Phone Number"].iloc[0] == "0501234567"
+    assert batch["Phone Number"].iloc[1].startswith("+994")
+
+@pytest.mark.parametrize("batch_size", [7, 50, 1000])
+def test_chunked_csv_matches_a_whole_read(csv_path, export, batch_size):
+    whole = pd.read_csv(csv_path, dtype={"Name": str, "Surname": str, "Phone Number": str})
+    expected = transform_wide_to_long(whole)
+
+    actual = long_table(list(iter_upload_tasks(csv_path, "export.csv", batch_size=batch_size)))
+
+    assert "Sheet" not in actual.columns
+    assert_same_tasks(actual, expected)
+    assert set(actual["Phone"]) <= set(export["Phone Number"])
+    assert "0501234567" in set(actual["Phone"])
+
+def test_progress_counts_csv_rows(csv_path):
+    calls = []
+    list(iter_upload_tasks(csv_path, "export.csv", progress=lambda rows, rate: calls.append(rows), batch_size=20))
+    assert calls == [20, 40, 50]
+
+def test_upper_case_extensions(csv_path, tmp_path, export):
+    upper = str(tmp_path / "DATA.CSV")
+    export.to_csv(upper, index=False)
+    expected, subjects = process_excel_file(csv_path, "export.csv")
+
+    actual, upper_subjects = process_excel_file(upper, "DATA.CSV")
+
+    assert upper_subjects == subjects == ["Math", "English"]
+    assert_same_tasks(actual, expected)
+
+def read_excel_tasks(path, sheet=0):
+    """Task rows of one worksheet the way uploads were read before streaming."""
+    columns = pd.read_excel(path, sheet_name=sheet, engine='openpyxl', nrows=0).columns
+    dtype = {column: str for column in text_columns(build_column_plan(columns))}
+    return transform_wide_to_long(pd.read_excel(path, sheet_name=sheet, engine='openpyxl', dtype=dtype))
+
+@pytest.fixture
+def workbook(tmp_path):
+    """Three grade sheets: numeric phones, a sheet without English, one without tasks."""
+    grade_5 = make_export(n_rows=40, seed=1)
+    grade_5["Phone Number"] = np.arange(501000000, 501000040)
+    grade_6 = make_export(n_rows=25, seed=2)
+    grade_6 = grade_6.drop(columns=[column for column in grade_6.columns if "(English)" in column])
+    grade_6["Name"] = grade_6["Name"] + "_6"
+    grade_7 = make_export(n_rows=10, seed=3)
+    grade_7["Practice Task"] = "Not Started"
+    grade_7["Practice Task (English)"] = np.nan
+    sheets = {"Grade 5": grade_5, "Grade 6": grade_6, "Grade 7": grade_7}
+
+    path = str(tmp_path / "grades.xlsx")
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for name, sheet in sheets.items():
+            sheet.to_excel(writer, sheet_name=name, index=False)
+    return path, list(sheets)
+
+@pytest.fixture
+def shared_pool():
+    yield file_processor.sheet_pool()
+    file_processor.shutdown_sheet_pool()
+
+class NoPool:
+    def submit(self, *args, **kwargs):
+        raise AssertionError("small workbooks are parsed in this process")
+
+@pytest.mark.parametrize("batch_size", [7, 1000])
+def test_streamed_sheet_matches_read_excel(workbook, tmp_path, batch_size):
+    path, _ = workbook
+    single = str(tmp_path / "single.xlsx")
+    pd.read_excel(path, sheet_name="Grade 5").to_excel(single, index=False)
+
+    actual = long_table(list(iter_upload_tasks(single, "single.xlsx", batch_size=batch_size, pool=NoPool())))
+
+    assert "Sheet" not in actual.columns
+    assert_same_tasks(actual, read_excel_tasks(single))
+    assert actual["Phone"].iloc[0] == "501000000"
+
+@pytest.mark.parametrize("in_pool", [False, True], ids=["below-threshold", "above-threshold"])
+def test_sheets_match_read_excel(workbook, in_pool, request):
+    path, names = workbook
+    assert [rows for _, rows in file_processor.workbook_sheets(path)] == [41, 26, 11]
+    expected = long_table([read_excel_tasks(path, name).assign(Sheet=name) for name in names])
+    # 78 spreadsheet rows: a threshold of 0 sends them to the pool, the default keeps them here
+    options = {"pool": request.getfixturevalue("shared_pool"), "pool_min_rows": 0} if in_pool else {"pool": NoPool()}
+    progress = []
+
+    actual = long_table(list(iter_upload_tasks(path, "grades.XLSX", lambda rows, rate: progress.append(rows),
+                                               batch_size=10, **options)))
+
+    assert_same_tasks(actual, expected)
+    assert actual["Sheet"].unique().tolist() == ["Grade 5", "Grade 6"]
+    assert progress[-1] == 75 and progress == sorted(progress)
@@ -0,0 +1,126 @@
+"""Background jobs: ordering per key, failures and the /jobs/<id> status."""
+
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from modules.utils.job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+TIMEOUT = 10
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=2)
+    yield queue
+    queue.shutdown(wait=True)
+
+def wait_for(queue, job_id, statuses=(DONE, FAILED)):
+    deadline = time.monotonic() + TIMEOUT
+    while queue.get(job_id)['status'] not in statuses:
+        assert time.monotonic() < deadline, queue.get(job_id)
+        time.sleep(0.005)
+    return queue.get(job_id)
+
+def blocked(started, release, value):
+    def job(report):
+        started.set()
+        assert release.wait(TIMEOUT)
+        return value
+    return job
+
+def test_jobs_with_one_key_run_in_submission_order(queue):
+    ran = []
+    started, release = threading.Event(), threading.Event()
+    first = queue.submit('user', blocked(started, release, 'first'))
+    assert started.wait(TIMEOUT)
+    later = [queue.submit('user', lambda report, i=i: ran.append(i) or i) for i in range(5)]
+
+    time.sleep(0.05)
+    assert queue.get(first)['status'] == RUNNING
+    assert all(queue.get(job_id)['status'] == QUEUED for job_id in later)
+    release.set()
+
+    assert [wait_for(queue, job_id)['result'] for job_id in [first] + later] == ['first', 0, 1, 2, 3, 4]
+    assert ran == [0, 1, 2, 3, 4]
+
+def test_a_users_backlog_does_not_hold_the_workers(queue):
+    started, release = threading.Event(), threading.Event()
+    queue.submit('busy', blocked(started, release, None))
+    assert started.wait(TIMEOUT)
+    backlog = [queue.submit('busy', lambda report: None) for _ in range(3)]
+
+    # Only one of the two workers is taken while the busy user's jobs wait
+    other = queue.submit('other', lambda report: 'done')
+    assert wait_for(queue, other)['result'] == 'done'
+    assert all(queue.get(job_id)['status'] == QUEUED for job_id in backlog)
+
+    release.set()
+    for job_id in backlog:
+        assert wait_for(queue, job_id)['status'] == DONE
+
+def test_failures_are_reported_and_the_key_continues(queue):
+    def fail(report):
+        report(rows_read=10)
+        raise ValueError("bad upload")
+    failed = queue.submit('user', fail)
+    after = queue.submit('user', lambda report: 'ok')
+
+    job = wait_for(queue, failed)
+    assert (job['status'], job['error'], job['progress']) == (FAILED, 'bad upload', {'rows_read': 10})
+    assert job['finished'] is not None
+    assert wait_for(queue, after)['result'] == 'ok'
+
+def test_progress_and_result(queue):
+    def work(n, report):
+        for i in range(1, n + 1):
+            report(rows_read=i)
+        return ['Math']
+    job = wait_for(queue, queue.submit('user', work, 3))
+    assert (job['status'], job['result'], job['progress']) == (DONE, ['Math'], {'rows_read': 3})
+    assert queue.get('unknown') is None
+
+def test_keys_are_forgotten_when_their_jobs_finish(queue):
+    job_ids = [queue.submit(f'user{i % 4}', lambda report: None) for i in range(40)]
+    for job_id in job_ids:
+        wait_for(queue, job_id)
+    assert queue._waiting == {}
+
+def test_jobs_after_shutdown_fail(queue):
+    queue.shutdown(wait=True)
+    job = queue.get(queue.submit('user', lambda report: None))
+    assert job['status'] == FAILED
+
+def test_finished_jobs_expire(queue):
+    queue.retention = timedelta(seconds=-1)
+    first = wait_for(queue, queue.submit('user', lambda report: None))['id']
+    time.sleep(1.1)
+    queue.submit('user', lambda report: None)
+    assert queue.get(first) is None
+
+def test_job_status_route(flask_app):
+    import app as app_module
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 'alice'
+    json = {'Accept': 'application/json'}
+    started, release = threading.Event(), threading.Event()
+    job_id = app_module.job_queue.submit('alice', blocked(started, release, ['Math']))
+    assert started.wait(TIMEOUT)
+
+    running = client.get(f'/jobs/{job_id}', headers=json).get_json()
+    assert (running['job_id'], running['status']) == (job_id, RUNNING)
+    assert 'redirect_url' not in running
+    assert b'processing' in client.get(f'/jobs/{job_id}').data.lower()
+
+    release.set()
+    wait_for(app_module.job_queue, job_id)
+    done = client.get(f'/jobs/{job_id}', headers=json).get_json()
+    assert done['status'] == DONE and done['redirect_url'].endswith('/analyze')
+    assert client.get(f'/jobs/{job_id}').status_code == 302
+
+    # Unknown jobs and other users' jobs are not reported
+    assert client.get('/jobs/nope', headers=json).status_code == 404
+    other = app_module.job_queue.submit('bob', lambda report: None)
+    assert client.get(f'/jobs/{other}', headers=json).status_code == 404
@@ -0,0 +1,121 @@
+"""Paging, sorting and search of the /analyze results table."""
+
+import uuid
+
+import pytest
+
+from conftest import make_tasks
+from modules.data_processing.activity import write_activity
+from modules.data_processing.results_table import MAX_PAGE_SIZE, ResultsIndex
+from modules.data_processing.storage import save_tasks
+
+N_STUDENTS = 40
+FILTERS = {'start_date': '2025-01-01', 'end_date': '2025-03-31'}
+
+@pytest.fixture
+def client(flask_app, tmp_path):
+    user_id = uuid.uuid4().hex
+    user_dir = tmp_path / 'uploads' / user_id
+    user_dir.mkdir(parents=True)
+    save_tasks(make_tasks(n_students=N_STUDENTS, n_rows=1200), str(user_dir))
+    write_activity(str(user_dir))
+
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+@pytest.fixture
+def analyzed(client):
+    assert client.post('/analyze', data=FILTERS).status_code == 200
+    return client
+
+def students_page(client, **params):
+    response = client.get('/analyze/students', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+def all_rows(client, **params):
+    """Every row of the table, page by page."""
+    first = students_page(client, page=1, **params)
+    rows = first['students']
+    for page in range(2, first['pages'] + 1):
+        rows += students_page(client, page=page, **params)['students']
+    return rows
+
+def test_no_analysis_is_404(client):
+    response = client.get('/analyze/students')
+    assert response.status_code == 404
+    assert 'error' in response.get_json()
+
+def test_pages_cover_every_student_once(analyzed):
+    first = students_page(analyzed, per_page=7)
+    rows = all_rows(analyzed, per_page=7)
+
+    # Every student shows: the two without tasks in the window as zero-task rows
+    assert first['total'] == first['matched'] == N_STUDENTS + 2
+    assert first['pages'] == -(-first['total'] // 7)
+    assert len(first['students']) == 7
+    assert len({row['Full_Name'] for row in rows}) == len(rows) == first['total']
+    assert sum(row['Zero_Tasks'] for row in rows) == 2
+    assert all(row['url'].startswith('/student/') for row in rows)
+
+@pytest.mark.parametrize("sort, field", [('tasks', 'Total_Tasks'), ('days', 'Days_Worked'),
+                                         ('streak', 'Max_Streak'), ('grade', 'Grade')])
+@pytest.mark.parametrize("order", ['asc', 'desc'])
+def test_sort_numbers(analyzed, sort, field, order):
+    values = [row[field] for row in all_rows(analyzed, per_page=9, sort=sort, order=order)]
+    assert values == sorted(values, reverse=order == 'desc')
+
+def test_sort_names_ignores_case(analyzed):
+    names = [row['Full_Name'] for row in all_rows(analyzed, sort='name', order='desc')]
+    assert names == sorted(names, key=str.casefold, reverse=True)
+
+@pytest.mark.parametrize("order", ['asc', 'desc'])
+def test_zero_task_students_sort_last_by_success(analyzed, order):
+    rows = all_rows(analyzed, per_page=10, sort='success', order=order)
+    assert [row['Zero_Tasks'] for row in rows] == [False] * (len(rows) - 2) + [True] * 2
+    rates = [row['Avg_Success'] for row in rows[:-2]]
+    assert rates == sorted(rates, reverse=order == 'desc')
+
+def test_ties_keep_the_analysis_order(analyzed):
+    analysis_order = [row['Full_Name'] for row in all_rows(analyzed)]
+    rows = all_rows(analyzed, sort='grade', order='desc')
+    for grade in {row['Grade'] for row in rows}:
+        names = [row['Full_Name'] for row in rows if row['Grade'] == grade]
+        assert names == [name for name in analysis_order if name in names]
+
+def test_unknown_sort_keeps_the_analysis_order(analyzed):
+    assert all_rows(analyzed, sort='nope') == all_rows(analyzed)
+
+def test_search_by_name_and_subject(analyzed):
+    page = students_page(analyzed, q='  STUDENT0 ')
+    assert page['total'] == N_STUDENTS + 2
+    assert page['matched'] == 10
+    assert all(row['Full_Name'].startswith('Student0') for row in page['students'])
+
+    rows = all_rows(analyzed, q='science', sort='tasks', order='desc')
+    everyone = all_rows(analyzed)
+    assert rows and len(rows) < len(everyone)
+    assert {row['Full_Name'] for row in rows} == {row['Full_Name'] for row in everyone if 'Science' in row['Subjects']}
+
+def test_search_without_matches(analyzed):
+    page = students_page(analyzed, q='nobody', page=3)
+    assert (page['matched'], page['page'], page['pages'], page['students']) == (0, 1, 1, [])
+
+def test_page_and_size_are_clamped(analyzed):
+    last = students_page(analyzed, per_page=10, page=99)
+    assert last['page'] == last['pages'] == 5
+    assert len(last['students']) == (N_STUDENTS + 2) % 10
+    assert students_page(analyzed, page=-1)['page'] == 1
+    assert students_page(analyzed, per_page=0)['per_page'] == 1
+    assert students_page(analyzed, per_page=10 ** 6)['per_page'] == MAX_PAGE_SIZE
+
+def test_search_results_are_reused():
+    index = ResultsIndex([{'Full_Name': f'Student {i}', 'Grade': 5, 'Subjects': 'Math'} for i in range(5)])
+    index.max_queries = 2
+    first = index.matches('Student 1')
+    assert index.matches('student 1') is first
+    index.matches('2')
+    index.matches('3')
+    assert index.matches('Student 1') is not first
@@ -0,0 +1,78 @@
+"""Column-wise JSON conversion writes what the row-wise loop wrote."""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_tasks
+from modules.data_processing.analysis import analyze_student_data
+from modules.utils.serialization import (
+    convert_to_serializable, frame_to_records, records_to_serializable, write_json_records
+)
+
+def legacy_json(records):
+    """The original per-value cleaning loop and json.dump."""
+    return json.dumps([{key: convert_to_serializable(value) for key, value in record.items()}
+                       for record in records])
+
+def written(records, tmp_path, chunk_size):
+    path = tmp_path / "summaries.json"
+    write_json_records(records_to_serializable(records), str(path), chunk_size=chunk_size)
+    return path.read_text()
+
+MIXED = [
+    {"Full_Name": "Ada Test", "Grade": np.int64(5), "Days": np.int32(3), "Avg_Success": np.float64(67.5),
+     "Last_Seen": pd.Timestamp("2025-03-04 10:30:00"), "Started": datetime(2025, 1, 2), "Note": None},
+    {"Full_Name": "Émile Test", "Grade": 6, "Days": np.int32(0), "Avg_Success": np.nan,
+     "Last_Seen": pd.Timestamp("2025-03-05"), "Started": datetime(2025, 1, 3), "Note": "late"},
+    # Zero-task summaries carry other keys
+    {"Full_Name": "Zoe Test", "Grade": np.int64(7), "Avg_Success": 0, "Zero_Tasks": True},
+    {"Full_Name": "Yan Test", "Grade": np.int64(7), "Avg_Success": 0, "Zero_Tasks": True},
+]
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 2000])
+def test_records_match_the_row_wise_json(tmp_path, chunk_size):
+    text = written(MIXED, tmp_path, chunk_size)
+
+    assert text == legacy_json(MIXED)
+    loaded = json.loads(text)
+    assert [list(record) for record in loaded] == [list(record) for record in MIXED]
+    assert loaded[0]["Last_Seen"] == "2025-03-04 10:30:00" and loaded[1]["Last_Seen"] == "2025-03-05 00:00:00"
+    assert loaded[0]["Started"] == "2025-01-02 00:00:00"
+    assert loaded[0]["Grade"] == 5 and isinstance(loaded[0]["Days"], int)
+    assert loaded[0]["Note"] is None
+    # NaN is written as the row-wise json.dump wrote it
+    assert np.isnan(loaded[1]["Avg_Success"])
+    assert loaded[3]["Zero_Tasks"] is True
+
+def test_missing_dates_are_null(tmp_path):
+    records = [{"Last_Seen": pd.Timestamp("2025-03-04")}, {"Last_Seen": pd.NaT}]
+
+    loaded = json.loads(written(records, tmp_path, 2000))
+
+    assert loaded == [{"Last_Seen": "2025-03-04 00:00:00"}, {"Last_Seen": None}]
+    frame = pd.DataFrame({"Last_Seen": [pd.Timestamp("2025-03-04"), pd.NaT]})
+    assert frame_to_records(frame) == loaded
+
+@pytest.mark.parametrize("zero_tasks_only", [False, True])
+def test_student_summaries_match_the_row_wise_json(tmp_path, zero_tasks_only):
+    df = make_tasks()
+    summaries, _ = analyze_student_data(df, pd.Timestamp("2025-03-01"), pd.Timestamp("2025-03-10"),
+                                        zero_tasks_only=zero_tasks_only)
+    assert summaries
+
+    assert written(summaries, tmp_path, 5) == legacy_json(summaries)
+
+def test_frame_records_match_the_row_wise_values():
+    df = make_tasks(n_rows=50)
+    df.loc[::7, "Success_Rate"] = np.nan
+    df.loc[::9, "Completion_Date"] = pd.NaT
+
+    records = frame_to_records(df)
+
+    expected = [{key: None if value is pd.NaT else convert_to_serializable(value) for key, value in row.items()}
+                for row in df.astype(object).to_dict('records')]
+    assert json.dumps(records) == json.dumps(expected)
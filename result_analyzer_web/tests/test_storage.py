@@ -0,0 +1,101 @@
+"""Compacted task table dtypes and their round trip through storage."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_tasks
+from modules.data_processing import storage
+from modules.data_processing.storage import (
+    CATEGORICAL_COLUMNS, DIAGNOSTICS_FILE, FLOAT32_COLUMNS, compact_frame, load_diagnostics, load_students,
+    load_tasks, save_tasks, widen_floats
+)
+
+# float32 keeps about 7 significant digits
+FLOAT32_RTOL = 1e-7
+
+@pytest.fixture(params=["columnar", "pickle"])
+def store(request, monkeypatch):
+    if request.param == "pickle":
+        monkeypatch.setattr(storage, "COLUMNAR_AVAILABLE", False)
+    elif not storage.COLUMNAR_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    return request.param
+
+@pytest.fixture
+def tasks():
+    df = make_tasks()
+    # Rates with decimals float32 cannot hold exactly
+    df["Success_Rate"] = (df["Success_Rate"] + 0.03).round(2)
+    df.loc[::17, "Success_Rate"] = np.nan
+    return df
+
+def assert_compacted(df):
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            assert isinstance(df[col].dtype, pd.CategoricalDtype), col
+            assert list(df[col].cat.categories) == sorted(df[col].cat.categories), col
+    for col in FLOAT32_COLUMNS:
+        assert df[col].dtype == np.float32, col
+
+def assert_same_values(actual, expected):
+    for col in expected.columns:
+        if col in FLOAT32_COLUMNS:
+            np.testing.assert_allclose(actual[col].astype(np.float64), expected[col], rtol=FLOAT32_RTOL)
+        elif col != "Diagnostics":
+            assert actual[col].astype(object).tolist() == expected[col].astype(object).tolist(), col
+    assert actual["Diagnostics"].tolist() == expected["Diagnostics"].tolist()
+
+def test_stored_dtypes_round_trip(store, tasks, tmp_path):
+    save_tasks(tasks, str(tmp_path))
+
+    stored = load_tasks(str(tmp_path))
+
+    assert list(stored.columns) == list(tasks.columns)
+    assert_compacted(stored)
+    assert_same_values(stored, tasks)
+    # The readers widen rates back to the decimals that were uploaded
+    widened = widen_floats(stored.copy())
+    assert widened["Success_Rate"].dtype == np.float64
+    pd.testing.assert_series_equal(widened["Success_Rate"], tasks["Success_Rate"])
+
+def test_compact_frame_matches_the_stored_table(tasks, tmp_path):
+    if not storage.COLUMNAR_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    save_tasks(tasks, str(tmp_path))
+    stored = load_tasks(str(tmp_path))
+
+    compacted = compact_frame(tasks)
+
+    assert_compacted(compacted)
+    assert tasks["Success_Rate"].dtype == np.float64
+    for col in CATEGORICAL_COLUMNS + FLOAT32_COLUMNS:
+        if col in tasks.columns:
+            assert compacted[col].dtype == stored[col].dtype, col
+    assert compacted.memory_usage(deep=True).sum() < tasks.memory_usage(deep=True).sum()
+
+def test_columns_arrow_cannot_type_are_kept_as_text(store, tasks, tmp_path):
+    tasks["Grade"] = tasks["Grade"].astype(object)
+    tasks.loc[::5, "Grade"] = "5A"
+
+    save_tasks(tasks, str(tmp_path))
+    stored = load_tasks(str(tmp_path), columns=["Full_Name", "Grade", "Success_Rate"])
+
+    assert list(stored.columns) == ["Full_Name", "Grade", "Success_Rate"]
+    assert stored["Grade"].astype(str).tolist() == tasks["Grade"].astype(str).tolist()
+    np.testing.assert_allclose(stored["Success_Rate"], tasks["Success_Rate"], rtol=FLOAT32_RTOL)
+
+def test_reupload_without_diagnostics_drops_the_old_ones(store, tasks, tmp_path):
+    user_dir = str(tmp_path)
+    save_tasks(tasks, user_dir)
+    reupload = tasks.drop(columns=["Diagnostics"])
+
+    save_tasks(reupload, user_dir)
+
+    assert not os.path.exists(os.path.join(user_dir, DIAGNOSTICS_FILE))
+    assert load_diagnostics(user_dir) == {}
+    assert "Diagnostics" not in load_tasks(user_dir).columns
+    # Students still list their (now empty) diagnostics
+    assert load_students(user_dir)["Diagnostics"].tolist() == [{}] * tasks["Full_Name"].nunique()
@@ -0,0 +1,101 @@
+"""The streak kernels match a day-by-day loop over each student's dates."""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from modules.data_processing.streaks import (
+    bitset_streaks, calculate_max_streak, day_bitsets, streak_stats, student_streak_stats, to_day_ordinals,
+    window_words
+)
+
+def baseline_stats(days, as_of=None):
+    """Active days, max/current streak and longest run of one student's day ordinals."""
+    days = sorted(set(days))
+    if not days:
+        return 0, 0, 0, None, None
+    runs = [[days[0], days[0]]]
+    for day in days[1:]:
+        if day == runs[-1][1] + 1:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    longest = max(runs, key=lambda run: run[1] - run[0])   # earliest on ties
+    current = runs[-1][1] - runs[-1][0] + 1
+    if as_of is not None and runs[-1][1] not in (as_of, as_of - 1):
+        current = 0
+    return len(days), longest[1] - longest[0] + 1, current, longest[0], longest[1]
+
+def random_days(n_students, n_days, n_tasks, seed):
+    rng = np.random.default_rng(seed)
+    students = rng.integers(0, n_students, n_tasks)
+    # Mostly dense days so that long runs and runs over word boundaries appear
+    days = np.where(rng.random(n_tasks) < 0.7, rng.integers(0, n_days, n_tasks),
+                    rng.integers(n_days // 3, n_days // 3 + 80, n_tasks) % n_days)
+    return students, days
+
+def as_rows(stats):
+    return [
+        (int(stats.active_days[i]), int(stats.max_streak[i]), int(stats.current_streak[i]),
+         None if np.isnat(stats.longest_start[i]) else int(stats.longest_start[i].astype(np.int64)),
+         None if np.isnat(stats.longest_end[i]) else int(stats.longest_end[i].astype(np.int64)))
+        for i in range(len(stats.active_days))
+    ]
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("as_of", [None, 150, 200])
+def test_streak_stats_match_baseline(seed, as_of):
+    n_students = 30
+    students, days = random_days(n_students, 200, 3000, seed)
+    expected = [baseline_stats(days[students == i], as_of) for i in range(n_students + 1)]
+
+    assert as_rows(streak_stats(students, days, n_students + 1, as_of=as_of)) == expected
+
+def test_streak_stats_without_tasks():
+    stats = streak_stats([], [], 3)
+    assert as_rows(stats) == [(0, 0, 0, None, None)] * 3
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("n_days", [1, 63, 64, 65, 200])
+def test_bitset_streaks_match_streak_stats(seed, n_days):
+    n_students = 30
+    students, days = random_days(n_students, n_days, 2500, seed)
+    first_day = 20000
+    words = day_bitsets(students, days, n_students, n_days)
+
+    assert as_rows(bitset_streaks(words, first_day)) == as_rows(streak_stats(students, days + first_day, n_students))
+
+def test_bitset_streaks_run_across_every_bit():
+    # Full words carry one run from day 0 to the end
+    words = day_bitsets(np.zeros(200, dtype=np.int64), np.arange(200), 1, 200)
+    assert as_rows(bitset_streaks(words)) == [(200, 200, 200, 0, 199)]
+
+@pytest.mark.parametrize("lo, hi", [(0, 200), (10, 60), (50, 130), (64, 128), (63, 65), (199, 200), (90, 90)])
+def test_window_words(lo, hi):
+    n_students = 30
+    students, days = random_days(n_students, 200, 2500, 7)
+    window, first_day = window_words(day_bitsets(students, days, n_students, 200), lo, hi)
+    inside = (days >= lo) & (days < hi)
+
+    assert as_rows(bitset_streaks(window, first_day)) == as_rows(streak_stats(students[inside], days[inside], n_students))
+
+def test_calculate_max_streak():
+    start = date(2025, 1, 30)
+    dates = [start + timedelta(days=d) for d in (0, 1, 2, 2, 5, 6, 7, 8, 20)]
+    assert calculate_max_streak(dates) == 4
+    assert calculate_max_streak(list(reversed(dates))) == 4
+    assert calculate_max_streak([start]) == 1
+    assert calculate_max_streak([]) == 0
+
+@pytest.mark.parametrize("as_of", [None, 20])
+def test_student_streak_stats(as_of):
+    start = date(2025, 1, 30)
+    days = to_day_ordinals([start + timedelta(days=d) for d in (8, 0, 1, 2, 2, 5, 6, 7, 20)])
+    stats = student_streak_stats(days, as_of=None if as_of is None else int(days.min()) + as_of)
+    assert (stats.active_days, stats.max_streak, stats.current_streak) == (8, 4, 1)
+    assert (str(stats.longest_start), str(stats.longest_end)) == ("2025-02-04", "2025-02-07")
+
+    empty = student_streak_stats(np.array([], dtype=np.int64))
+    assert (empty.active_days, empty.max_streak, empty.current_streak) == (0, 0, 0)
+    assert np.isnat(empty.longest_start) and np.isnat(empty.longest_end)
@@ -0,0 +1,73 @@
+"""The student index: row lookups, fingerprints and atomic replacement."""
+
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from modules.data_processing.student_index import (
+    has_student_index, index_path, read_student_rows, write_student_index
+)
+
+ROWS = {"Ada Test": [0, 3, 7], "Émile Test": np.array([2, 5]), "No Tasks": []}
+
+@pytest.fixture
+def user_dir(tmp_path):
+    return str(tmp_path)
+
+def test_rows_round_trip(user_dir):
+    assert not has_student_index(user_dir)
+    assert read_student_rows(user_dir, "Ada Test") is None
+
+    write_student_index(user_dir, ROWS, "rev1", batch_size=2)
+
+    assert has_student_index(user_dir)
+    for name, rows in ROWS.items():
+        found = read_student_rows(user_dir, name, "rev1")
+        assert found.dtype == np.intp
+        np.testing.assert_array_equal(found, np.asarray(rows, dtype=np.intp))
+
+def test_missing_students_are_not_found(user_dir):
+    write_student_index(user_dir, ROWS, "rev1")
+    assert read_student_rows(user_dir, "Nobody", "rev1") is None
+    # A student listed without tasks is found, with no rows
+    assert len(read_student_rows(user_dir, "No Tasks", "rev1")) == 0
+
+def test_another_revision_finds_nothing(user_dir):
+    write_student_index(user_dir, ROWS, "rev1")
+    assert read_student_rows(user_dir, "Ada Test", "rev2") is None
+    assert read_student_rows(user_dir, "Ada Test") is not None
+
+    write_student_index(user_dir, {"Ada Test": [9]}, "rev2")
+
+    assert read_student_rows(user_dir, "Ada Test", "rev1") is None
+    np.testing.assert_array_equal(read_student_rows(user_dir, "Ada Test", "rev2"), [9])
+    assert read_student_rows(user_dir, "Émile Test", "rev2") is None
+
+def test_rewrites_replace_the_index_atomically(user_dir):
+    write_student_index(user_dir, ROWS, "rev1")
+    reader = sqlite3.connect(f"file:{index_path(user_dir)}?mode=ro", uri=True)
+    try:
+        write_student_index(user_dir, {"Ada Test": [1]}, "rev2")
+        # A reader that opened the old index keeps reading it whole
+        assert reader.execute("SELECT value FROM meta").fetchone() == ("rev1",)
+        assert reader.execute("SELECT COUNT(*) FROM student_rows").fetchone() == (len(ROWS),)
+    finally:
+        reader.close()
+    assert os.listdir(user_dir) == [os.path.basename(index_path(user_dir))]
+
+def test_a_failed_write_keeps_the_old_index(user_dir):
+    write_student_index(user_dir, ROWS, "rev1")
+    def rows():
+        yield "Ada Test", [1]
+        raise RuntimeError("analysis failed")
+    class Failing(dict):
+        def items(self):
+            return rows()
+
+    with pytest.raises(RuntimeError):
+        write_student_index(user_dir, Failing(), "rev2", batch_size=1)
+
+    assert os.listdir(user_dir) == [os.path.basename(index_path(user_dir))]
+    np.testing.assert_array_equal(read_student_rows(user_dir, "Ada Test", "rev1"), ROWS["Ada Test"])